@@ -0,0 +1,24 @@
+"""Tools for inspecting and maintaining the dated TouchDesigner sketch archive."""
+
+from .codec import PayloadCodec, get_codec, has_codec, register_codec
+from .container import Frame, ToeFile, open_toe
+from .errors import (
+    ArchiveError,
+    CodecUnavailableError,
+    MissingDependencyError,
+    ToeFormatError,
+)
+
+__all__ = [
+    "ArchiveError",
+    "CodecUnavailableError",
+    "Frame",
+    "MissingDependencyError",
+    "PayloadCodec",
+    "ToeFile",
+    "ToeFormatError",
+    "get_codec",
+    "has_codec",
+    "open_toe",
+    "register_codec",
+]
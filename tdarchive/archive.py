@@ -0,0 +1,53 @@
+"""Discovery of the dated sketch folders and the files inside them."""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterator, NamedTuple, Optional
+
+DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# File suffix -> manifest kind.
+KINDS = {".toe": "toe", ".tdc": "tdc", ".obj": "obj"}
+
+
+class ArchiveEntry(NamedTuple):
+    path: str  # relative to the archive root, always with "/" separators
+    day: str
+    kind: str
+    size: int
+    mtime_ns: int
+
+    def abspath(self, root: "os.PathLike[str] | str") -> str:
+        return os.path.join(os.fspath(root), *self.path.split("/"))
+
+
+def kind_of(name: str) -> Optional[str]:
+    return KINDS.get(os.path.splitext(name)[1].lower())
+
+
+def iter_archive(root: "os.PathLike[str] | str" = ".") -> Iterator[ArchiveEntry]:
+    """Yield every tracked file kind below the ``YYYY-MM-DD/`` folders.
+
+    Entries come out sorted by day and then by path, so manifests are stable.
+    """
+    root = os.fspath(root)
+    days = sorted(
+        entry.name
+        for entry in os.scandir(root)
+        if entry.is_dir() and DAY_PATTERN.match(entry.name)
+    )
+    for day in days:
+        found = []
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, day)):
+            dirnames.sort()
+            for name in filenames:
+                kind = kind_of(name)
+                if kind is None:
+                    continue
+                full = os.path.join(dirpath, name)
+                st = os.stat(full)
+                rel = os.path.relpath(full, root).replace(os.sep, "/")
+                found.append(ArchiveEntry(rel, day, kind, st.st_size, st.st_mtime_ns))
+        yield from sorted(found)
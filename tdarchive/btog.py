@@ -0,0 +1,256 @@
+"""Geometry entries of import caches (``Btog``) as NumPy views.
+
+A geometry entry (kind 0 in the .tdc entry table) is a big-endian,
+bgeo-like stream::
+
+    5 bytes   "BtogV"
+    u32 x 9   version, points, prims, point groups, prim groups,
+              point / vertex / prim / detail attribute counts
+    attribute definitions for points, then the point records
+    attribute definitions for vertices
+    prim runs: ffffffff, u16 count, u32 type, then per prim
+               u32 vertex count, u8 '<' (closed), and per vertex a point
+               index (u16 below 65536 points, else u32) plus the vertex
+               attributes
+    attribute definitions for the detail, then one detail record
+    00 ff
+
+An attribute definition is a u16 name length, the name, a u16 component
+count and a u32 type (0 float, 1 int, 4 index, 5 vector).  It is followed by
+the default values, or, for an index attribute, by a u32 string count and
+u16-length strings.  A point record is the 4-float ``P`` followed by each
+point attribute.
+
+Point and detail records have a fixed size, so :class:`Geometry` exposes them
+as zero-copy structured views over the caller's buffer (normally the mmap
+of the whole cache; see :class:`tdarchive.tdc.TdcFile`).  Prims are variable
+length, so one pass over the prim headers records where each one starts.
+Vertex records are gathered into one array the first time they are asked
+for.
+
+The ``P`` records in the archived caches are scrambled.  Their last three
+bytes are always ``b2 83 03``, and they do not read as coordinates.  ``P``
+is still exposed as the raw 4-float view so callers can tell points apart,
+but rest positions for deformation have to come from elsewhere.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .errors import ArchiveError, MissingDependencyError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+MAGIC = b"BtogV"
+HEADER = struct.Struct(">5s9I")
+RUN = struct.Struct(">IHI")
+PRIM = struct.Struct(">IB")
+RUN_MARKER = 0xFFFFFFFF
+PRIM_POLY = 1
+
+TYPE_FLOAT = 0
+TYPE_INT = 1
+TYPE_INDEX = 4
+TYPE_VECTOR = 5
+_DTYPES = {TYPE_FLOAT: ">f4", TYPE_INT: ">i4", TYPE_INDEX: ">i4", TYPE_VECTOR: ">f4"}
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+_ATTR = struct.Struct(">HI")
+
+
+class GeometryFormatError(ArchiveError, ValueError):
+    """A geometry entry is truncated or uses a layout this reader doesn't know."""
+
+
+class Attribute(NamedTuple):
+    name: str
+    size: int  # components
+    type: int
+    default: Tuple[float, ...]
+    strings: Tuple[str, ...]  # index attributes only
+
+    @property
+    def dtype(self) -> Tuple[str, str, Tuple[int, ...]]:
+        return (self.name, _DTYPES[self.type], (self.size,) if self.size > 1 else ())
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise MissingDependencyError("geometry views need the 'numpy' package")
+
+
+def _read_attributes(buf, offset: int, count: int) -> Tuple[List[Attribute], int]:
+    attrs = []
+    try:
+        for _ in range(count):
+            (length,) = _U16.unpack_from(buf, offset)
+            name = bytes(buf[offset + 2:offset + 2 + length]).decode("utf-8", "surrogateescape")
+            offset += 2 + length
+            size, kind = _ATTR.unpack_from(buf, offset)
+            offset += _ATTR.size
+            if kind not in _DTYPES:
+                raise GeometryFormatError(f"attribute {name!r} has unknown type {kind}")
+            default: Tuple[float, ...] = ()
+            strings: List[str] = []
+            if kind == TYPE_INDEX:
+                (nstrings,) = _U32.unpack_from(buf, offset)
+                offset += _U32.size
+                for _ in range(nstrings):
+                    (length,) = _U16.unpack_from(buf, offset)
+                    strings.append(bytes(buf[offset + 2:offset + 2 + length]).decode(
+                        "utf-8", "surrogateescape"))
+                    offset += 2 + length
+            else:
+                default = struct.unpack_from(">%d%s" % (size, "i" if kind == TYPE_INT else "f"),
+                                             buf, offset)
+                offset += 4 * size
+            attrs.append(Attribute(name, size, kind, default, tuple(strings)))
+    except struct.error:
+        raise GeometryFormatError("attribute table runs past the entry") from None
+    return attrs, offset
+
+
+def _record_dtype(attrs, leading=()):
+    _require_numpy()
+    return np.dtype(list(leading) + [a.dtype for a in attrs])
+
+
+class Geometry:
+    """Points, prims and attributes of one geometry entry."""
+
+    def __init__(self, buf):
+        _require_numpy()
+        self._buf = memoryview(buf)
+        if len(buf) < HEADER.size:
+            raise GeometryFormatError("truncated geometry header")
+        (magic, self.version, self.npoints, self.nprims, self.npoint_groups,
+         self.nprim_groups, npa, nva, npra, nda) = HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise GeometryFormatError(f"bad geometry magic {bytes(magic)!r}")
+        if self.npoint_groups or self.nprim_groups or npra:
+            raise GeometryFormatError("groups and prim attributes are not supported")
+
+        attrs, offset = _read_attributes(buf, HEADER.size, npa)
+        self.point_attributes = tuple(attrs)
+        self.point_dtype = _record_dtype(attrs, [("P", ">f4", (4,))])
+        self._points_at = offset
+        offset += self.point_dtype.itemsize * self.npoints
+
+        attrs, offset = _read_attributes(buf, offset, nva)
+        self.vertex_attributes = tuple(attrs)
+        index = ">u2" if self.npoints < 0x10000 else ">u4"
+        self.vertex_dtype = _record_dtype(attrs, [("point", index)])
+        self._prims_at = offset
+        self.prim_starts, self.closed, offset = self._scan_prims(offset)
+
+        attrs, offset = _read_attributes(buf, offset, nda)
+        self.detail_attributes = tuple(attrs)
+        self.detail_dtype = _record_dtype(attrs)
+        self._detail_at = offset
+        offset += self.detail_dtype.itemsize
+        if bytes(buf[offset:offset + 2]) != b"\0\xff" or offset + 2 != len(buf):
+            raise GeometryFormatError("geometry does not end after the detail record")
+        self._vertices = None
+        self._attrs: Dict[str, Attribute] = {
+            a.name: a for a in self.point_attributes + self.vertex_attributes
+            + self.detail_attributes
+        }
+
+    def _scan_prims(self, offset: int):
+        """``(vertex start per prim + total, closed flags, end offset)``."""
+        buf, vsize = self._buf, self.vertex_dtype.itemsize
+        starts = np.empty(self.nprims + 1, dtype=np.int64)
+        closed = np.empty(self.nprims, dtype=bool)
+        self._prim_offsets = np.empty(self.nprims, dtype=np.int64)
+        prim = vertex = 0
+        try:
+            while prim < self.nprims:
+                marker, count, kind = RUN.unpack_from(buf, offset)
+                if marker != RUN_MARKER or kind != PRIM_POLY or count == 0:
+                    raise GeometryFormatError(f"unsupported prim run at {offset}")
+                offset += RUN.size
+                for _ in range(min(count, self.nprims - prim)):
+                    nverts, flag = PRIM.unpack_from(buf, offset)
+                    starts[prim] = vertex
+                    closed[prim] = flag == 0x3C
+                    self._prim_offsets[prim] = offset + PRIM.size
+                    vertex += nverts
+                    offset += PRIM.size + nverts * vsize
+                    prim += 1
+        except struct.error:
+            raise GeometryFormatError("prim list runs past the entry") from None
+        starts[self.nprims] = vertex
+        return starts, closed, offset
+
+    # fixed-size records: views over the buffer
+
+    @property
+    def points(self):
+        """Structured view of every point record (``P`` plus point attributes)."""
+        return np.frombuffer(self._buf, self.point_dtype, self.npoints, self._points_at)
+
+    @property
+    def detail_record(self):
+        return np.frombuffer(self._buf, self.detail_dtype, 1, self._detail_at)[0]
+
+    def point(self, name: str):
+        """Zero-copy ``(points, size)`` view of a point attribute (or ``P``)."""
+        return self.points[name]
+
+    def detail(self, name: str):
+        return self.detail_record[name]
+
+    def strings(self, name: str) -> Tuple[str, ...]:
+        """The string table of an index attribute, such as ``pCaptPath``."""
+        return self._attrs[name].strings
+
+    @property
+    def P(self):
+        """Raw ``P`` records; scrambled in the archived caches (see module docs)."""
+        return self.point("P")
+
+    # variable-size prims: gathered once
+
+    @property
+    def nvertices(self) -> int:
+        return int(self.prim_starts[-1])
+
+    @property
+    def vertices(self):
+        """Every vertex record, in prim order, as one structured array."""
+        if self._vertices is None:
+            size = self.vertex_dtype.itemsize
+            counts = np.diff(self.prim_starts)
+            first = np.repeat(self._prim_offsets, counts)
+            within = np.arange(self.nvertices) - np.repeat(self.prim_starts[:-1], counts)
+            offsets = first + within * size
+            raw = np.frombuffer(self._buf, np.uint8)
+            records = raw[offsets[:, None] + np.arange(size)]
+            self._vertices = records.reshape(-1).view(self.vertex_dtype)
+        return self._vertices
+
+    @property
+    def index(self):
+        """Point index of each vertex; ``prim_starts`` splits it into prims."""
+        return self.vertices["point"]
+
+    def vertex(self, name: str):
+        return self.vertices[name]
+
+    def attribute(self, name: str) -> Optional[Attribute]:
+        return self._attrs.get(name)
+
+    def __getitem__(self, name: str):
+        """An attribute by name, looked up on points, vertices and the detail."""
+        if name == "P" or name in self.point_dtype.names:
+            return self.point(name)
+        if name in self.vertex_dtype.names:
+            return self.vertex(name)
+        if self.detail_dtype.names and name in self.detail_dtype.names:
+            return self.detail(name)
+        raise KeyError(name)
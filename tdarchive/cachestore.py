@@ -0,0 +1,204 @@
+"""Shared, content-addressed store for ``TDImportCache`` files.
+
+Copying a sketch forward to a new day copies its import caches too, so the
+same multi-megabyte ``.tdc`` can appear in many dated folders.
+:func:`dedup` copies each distinct cache found under the ``YYYY-MM-DD/``
+folders into ``STORE/objects/<blake2b>.tdc`` and replaces every copy in the
+archive with a hard link to that object.
+TouchDesigner still finds each cache at its usual path, but the bytes live
+on disk once.
+
+``STORE/refs.json`` records which archive path resolves to which object.
+:func:`relink` uses it to rebuild the links in a fresh checkout, and to
+restore caches that were deleted or never checked out.  :func:`resolve`
+looks up the object for one path, and :func:`report` shows what
+deduplication would free without touching anything.  Where hard links are
+not possible (the store is on another filesystem), the archive files are
+left alone, and :func:`relink` restores missing caches as plain copies.
+
+A store object and every archive copy linked to it are one inode, so an
+in-place write through any of those paths would change them all and leave
+the object failing its digest.  Objects are therefore made read-only
+(``0o444``), which makes the linked archive copies read-only too.  If
+TouchDesigner needs to rebuild a linked cache, delete that file first so
+it writes a fresh one; the next :func:`dedup` stores the new contents as a
+new object.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from typing import Dict, List, NamedTuple
+
+from .archive import DAY_PATTERN
+from .errors import ArchiveError
+from .index import blake2_file
+
+CACHE_DIR = "TDImportCache"
+OBJECTS = "objects"
+REFS = "refs.json"
+READ_ONLY = 0o444  # store objects; see the module docs
+
+
+class CacheStoreError(ArchiveError):
+    """The store has no object for a cache, or an object fails its digest."""
+
+
+class DedupReport(NamedTuple):
+    caches: int  # cache files found in the archive
+    distinct: int
+    cache_bytes: int  # apparent size of every cache file
+    unique_bytes: int  # size of the distinct contents
+    linked: int  # files replaced by links in this run
+    saved_bytes: int  # bytes freed in this run
+
+    @property
+    def duplicate_bytes(self) -> int:
+        return self.cache_bytes - self.unique_bytes
+
+
+def find_caches(root: "os.PathLike[str] | str" = ".") -> List[str]:
+    """Archive-relative paths of every file in a ``TDImportCache`` folder of a day."""
+    root = os.fspath(root)
+    days = sorted(
+        entry.name
+        for entry in os.scandir(root)
+        if entry.is_dir() and DAY_PATTERN.match(entry.name)
+    )
+    out = []
+    for day in days:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, day)):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            if os.path.basename(dirpath) != CACHE_DIR:
+                continue
+            for name in sorted(filenames):
+                full = os.path.join(dirpath, name)
+                out.append(os.path.relpath(full, root).replace(os.sep, "/"))
+    return out
+
+
+def _object_path(store: str, digest: str, name: str) -> str:
+    return os.path.join(store, OBJECTS, digest + os.path.splitext(name)[1])
+
+
+def _load_refs(store: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(store, REFS), encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_refs(store: str, refs: Dict[str, str]) -> None:
+    path = os.path.join(store, REFS)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(dict(sorted(refs.items())), fh, indent=1)
+    os.replace(tmp, path)
+
+
+def _link_into(source: str, target: str) -> bool:
+    """Atomically replace ``target`` with a hard link to ``source``."""
+    tmp = target + ".tdlink"
+    try:
+        os.link(source, tmp)
+    except OSError:
+        return False
+    os.replace(tmp, target)
+    return True
+
+
+def report(root: "os.PathLike[str] | str" = ".") -> DedupReport:
+    """What :func:`dedup` would find, without writing anything."""
+    root = os.fspath(root)
+    sizes: Dict[str, int] = {}
+    total = 0
+    paths = find_caches(root)
+    for rel in paths:
+        full = os.path.join(root, *rel.split("/"))
+        size = os.path.getsize(full)
+        sizes[blake2_file(full)] = size
+        total += size
+    return DedupReport(len(paths), len(sizes), total, sum(sizes.values()), 0, 0)
+
+
+def dedup(
+    root: "os.PathLike[str] | str", store: "os.PathLike[str] | str"
+) -> DedupReport:
+    """Put every cache into ``store`` and hard-link the archive copies to it.
+
+    Objects, and so the archive copies linked to them, are made read-only.
+    """
+    root, store = os.fspath(root), os.fspath(store)
+    os.makedirs(os.path.join(store, OBJECTS), exist_ok=True)
+    refs = _load_refs(store)
+    sizes: Dict[str, int] = {}
+    total = linked = saved = 0
+    paths = find_caches(root)
+    for rel in paths:
+        full = os.path.join(root, *rel.split("/"))
+        st = os.stat(full)
+        digest = blake2_file(full)
+        obj = _object_path(store, digest, rel)
+        if not os.path.exists(obj):
+            # A copy, so sealing the object leaves this file alone until it
+            # is linked below like every other copy.
+            shutil.copyfile(full, obj + ".tmp")
+            os.chmod(obj + ".tmp", READ_ONLY)
+            os.replace(obj + ".tmp", obj)
+            saved -= st.st_size  # the store copy itself
+        else:
+            os.chmod(obj, READ_ONLY)
+        refs[rel] = os.path.basename(obj)
+        total += st.st_size
+        sizes[digest] = st.st_size
+        if not os.path.samefile(full, obj):
+            if _link_into(obj, full):
+                linked += 1
+                if st.st_nlink == 1:
+                    saved += st.st_size
+    _save_refs(store, refs)
+    return DedupReport(len(paths), len(sizes), total, sum(sizes.values()), linked, saved)
+
+
+def resolve(store: "os.PathLike[str] | str", relpath: str) -> str:
+    """The store object an archive cache path resolves to."""
+    store = os.fspath(store)
+    name = _load_refs(store).get(relpath)
+    if name is None:
+        raise CacheStoreError(f"{relpath} is not recorded in {store}")
+    return os.path.join(store, OBJECTS, name)
+
+
+def relink(
+    root: "os.PathLike[str] | str",
+    store: "os.PathLike[str] | str",
+    verify: bool = True,
+) -> int:
+    """Point every recorded cache path in ``root`` at its store object.
+
+    Missing caches are created and existing copies are replaced, so a fresh
+    checkout ends up with one copy of each cache on disk.  Returns the
+    number of paths relinked.
+    """
+    root, store = os.fspath(root), os.fspath(store)
+    count = 0
+    for rel, name in _load_refs(store).items():
+        obj = os.path.join(store, OBJECTS, name)
+        if not os.path.exists(obj):
+            raise CacheStoreError(f"{obj}: object for {rel} is missing")
+        if verify and blake2_file(obj) != os.path.splitext(name)[0]:
+            raise CacheStoreError(f"{obj}: object fails its digest")
+        os.chmod(obj, READ_ONLY)
+        target = os.path.join(root, *rel.split("/"))
+        if os.path.exists(target) and os.path.samefile(target, obj):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not _link_into(obj, target):
+            if os.path.lexists(target):
+                os.unlink(target)  # it may be a read-only link to an old object
+            shutil.copyfile(obj, target)
+        count += 1
+    return count
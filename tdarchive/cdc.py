@@ -0,0 +1,234 @@
+"""Content-defined chunking (FastCDC) and a deduplicating chunk store.
+
+Each file is cut where a 32-bit gear hash of its recent bytes matches a
+mask.  A stricter mask is used before the average chunk size and a looser
+one after it (FastCDC's normalized chunking), with hard minimum and maximum
+sizes.  An edit only moves the boundaries near it, so consecutive versions
+of a sketch share most of their chunks.
+
+The gear hash of a position depends only on the 32 bytes before it.  So a
+single hash pass over the whole buffer gives the same cut points as FastCDC's
+per-chunk hash whenever the minimum size is at least 32.  With NumPy that
+pass is vectorized.  Without it, a plain loop computes the same result.
+
+Chunks hold decoded payloads when the codec re-encodes them exactly, and the
+stored bytes otherwise, as in :mod:`tdarchive.zstore`.  Layout::
+
+    STORE/chunks/3f/3fa9...      one file per distinct chunk (BLAKE2b name)
+    STORE/recipes/2021-01-13/gridz.toe.json
+
+A mirror only has to copy the chunk files it does not already have.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .archive import iter_archive
+from .codec import PayloadCodec, get_codec, has_codec
+from .storage import MODE_PAYLOAD, MODE_STORED, content_digest, encode_toe, prepare_file
+from .zstore import StoreError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+MIN_SIZE = 1024
+AVG_SIZE = 4096
+MAX_SIZE = 32768
+CHUNK_DIR = "chunks"
+RECIPE_DIR = "recipes"
+RECIPE_SUFFIX = ".json"
+_WORD = 0xFFFFFFFF
+
+GEAR = [
+    int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=4).digest(), "big")
+    for i in range(256)
+]
+
+
+def _mask(bits: int) -> int:
+    # Test the high bits: they depend on all 32 bytes in the window.
+    return ((1 << bits) - 1) << (32 - bits)
+
+
+def gear_hashes(data) -> Sequence[int]:
+    """Rolling gear hash ending at each byte of ``data``."""
+    if np is not None:
+        g = np.array(GEAR, dtype=np.uint32)[np.frombuffer(data, dtype=np.uint8)]
+        h = g.copy()
+        for k in range(1, 32):
+            h[k:] += g[:-k] << np.uint32(k)
+        return h
+    out = []
+    h = 0
+    for b in bytes(data):
+        h = ((h << 1) + GEAR[b]) & _WORD
+        out.append(h)
+    return out
+
+
+def cut_points(
+    data, min_size: int = MIN_SIZE, avg_size: int = AVG_SIZE, max_size: int = MAX_SIZE
+) -> List[int]:
+    """End offsets of the chunks of ``data``; the last one is ``len(data)``."""
+    if min_size < 32:
+        raise ValueError("min_size must be at least 32")
+    n = len(data)
+    if n <= min_size:
+        return [n] if n else []
+    bits = max(1, avg_size.bit_length() - 1)
+    mask_s, mask_l = _mask(bits + 1), _mask(bits - 1)
+    h = gear_hashes(data)
+    if np is not None:
+        # Candidate positions for each mask, then the sequential walk only
+        # touches those.
+        hits_s = np.flatnonzero((h & np.uint32(mask_s)) == 0).tolist()
+        hits_l = np.flatnonzero((h & np.uint32(mask_l)) == 0).tolist()
+    else:
+        hits_s = [i for i, v in enumerate(h) if not v & mask_s]
+        hits_l = [i for i, v in enumerate(h) if not v & mask_l]
+    cuts = []
+    start = 0
+    si = li = 0
+    while n - start > min_size:
+        lo, mid = start + min_size, start + avg_size
+        hi = min(start + max_size, n)
+        end = None
+        while si < len(hits_s) and hits_s[si] < lo:
+            si += 1
+        if si < len(hits_s) and hits_s[si] < min(mid, hi):
+            end = hits_s[si] + 1
+        else:
+            while li < len(hits_l) and hits_l[li] < max(lo, mid):
+                li += 1
+            if li < len(hits_l) and hits_l[li] < hi:
+                end = hits_l[li] + 1
+        if end is None:
+            end = hi
+        cuts.append(end)
+        start = end
+    if start < n:
+        cuts.append(n)
+    return cuts
+
+
+def chunks(data, **sizes) -> Iterator[memoryview]:
+    view = memoryview(data)
+    start = 0
+    for end in cut_points(data, **sizes):
+        yield view[start:end]
+        start = end
+
+
+class ChunkStats(NamedTuple):
+    files: int
+    logical_bytes: int  # sum of every file's chunked data
+    chunks: int  # chunk references across all recipes
+    unique_chunks: int
+    unique_bytes: int
+    new_chunks: int  # chunks this run had to write
+    new_bytes: int
+
+    @property
+    def dedup_ratio(self) -> float:
+        return self.logical_bytes / self.unique_bytes if self.unique_bytes else 1.0
+
+
+class ChunkStore:
+    """Chunk files plus one JSON recipe per archive file."""
+
+    def __init__(self, directory: "os.PathLike[str] | str"):
+        self.directory = os.fspath(directory)
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.directory, CHUNK_DIR, digest[:2], digest)
+
+    def recipe_path(self, relpath: str) -> str:
+        return os.path.join(self.directory, RECIPE_DIR, *relpath.split("/")) + RECIPE_SUFFIX
+
+    def put(self, data) -> Tuple[str, bool]:
+        """Store one chunk; returns its digest and whether it was new."""
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        return digest, True
+
+    def get(self, digest: str) -> bytes:
+        with open(self.chunk_path(digest), "rb") as fh:
+            return fh.read()
+
+    def recipes(self) -> Iterator[str]:
+        base = os.path.join(self.directory, RECIPE_DIR)
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(RECIPE_SUFFIX):
+                    full = os.path.join(dirpath, name[: -len(RECIPE_SUFFIX)])
+                    yield os.path.relpath(full, base).replace(os.sep, "/")
+
+    def read_recipe(self, relpath: str) -> Dict:
+        with open(self.recipe_path(relpath), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def write_recipe(self, relpath: str, recipe: Dict) -> None:
+        path = self.recipe_path(relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(recipe, fh, separators=(",", ":"))
+
+    def restore(self, relpath: str, codec: Optional[PayloadCodec] = None) -> bytes:
+        """Original bytes of one archive file, checked against its digest."""
+        recipe = self.read_recipe(relpath)
+        data = b"".join(self.get(d) for d in recipe["chunks"])
+        if recipe["mode"] == MODE_PAYLOAD:
+            frames = [tuple(f) for f in recipe["frames"]]
+            data = encode_toe(data, frames, codec or get_codec())
+        if content_digest(data).hex() != recipe["blake2b"]:
+            raise StoreError(f"{relpath}: restored bytes do not match the original")
+        return data
+
+
+def pack(
+    root: "os.PathLike[str] | str", store: "os.PathLike[str] | str", **sizes
+) -> ChunkStats:
+    """Chunk every archive file into ``store``, writing only unseen chunks."""
+    root = os.fspath(root)
+    cs = ChunkStore(store)
+    codec = get_codec() if has_codec() else None
+    unique: Dict[str, int] = {}
+    files = logical = refs = new = new_bytes = 0
+    for entry in iter_archive(root):
+        if entry.kind == "toe":
+            mode, data, digest, frames = prepare_file(entry.abspath(root), codec)
+        else:
+            with open(entry.abspath(root), "rb") as fh:
+                data = fh.read()
+            mode, digest, frames = MODE_STORED, content_digest(data), []
+        recipe = []
+        for piece in chunks(data, **sizes):
+            chunk_id, fresh = cs.put(piece)
+            recipe.append(chunk_id)
+            unique[chunk_id] = len(piece)
+            if fresh:
+                new += 1
+                new_bytes += len(piece)
+        cs.write_recipe(entry.path, {
+            "blake2b": digest.hex(), "mode": mode, "frames": frames, "chunks": recipe,
+        })
+        files += 1
+        logical += len(data)
+        refs += len(recipe)
+    return ChunkStats(
+        files, logical, refs, len(unique), sum(unique.values()), new, new_bytes
+    )
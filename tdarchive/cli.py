@@ -0,0 +1,586 @@
+"""Command line entry point: ``python -m tdarchive <command>``."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from . import (
+    cachestore, cdc, clip, deltastore, diff, expand, index, lineage, listing, merge, merkle, network,
+    pack, payloads, search, sweep, textconv, timeline, zstore,
+)
+from .codec import get_codec, has_codec
+from .container import open_toe
+from .errors import ArchiveError
+from .lazy import LazyNetwork
+from .tdc import KIND_CLIP, KIND_GEOMETRY, TdcFile
+
+
+def _positive_int(text: str) -> int:
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got {text!r}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def cmd_info(args: argparse.Namespace) -> int:
+    for path in args.files:
+        with open_toe(path) as toe:
+            print(f"{toe.path}: {toe.size} bytes, {len(toe.frames)} frame(s)")
+            for frame in toe.frames:
+                print(
+                    f"  frame {frame.index} @{frame.offset}: "
+                    f"stored {frame.stored_size} raw {frame.raw_size}"
+                )
+    return 0
+
+
+def cmd_tdc(args: argparse.Namespace) -> int:
+    for path in args.files:
+        with TdcFile(path) as cache:
+            print(f"{cache.path}: {cache.size} bytes, {len(cache.entries)} entries")
+            for entry in cache.entries:
+                print(f"  {entry.name}  kind {entry.kind}  size {entry.size}")
+                if entry.kind != KIND_GEOMETRY:
+                    continue
+                geo = cache.geometry(entry)
+                print(f"    {geo.npoints} points, {geo.nprims} prims, {geo.nvertices} vertices")
+                for cls, attrs in (("point", geo.point_attributes),
+                                   ("vertex", geo.vertex_attributes),
+                                   ("detail", geo.detail_attributes)):
+                    for a in attrs:
+                        print(f"    {cls:<7}{a.name}[{a.size}]")
+                del geo
+    return 0
+
+
+def cmd_ls(args: argparse.Namespace) -> int:
+    codec = None if args.headers_only else (get_codec() if has_codec() else None)
+    for row in listing.list_archive(args.root, codec, args.budget, decode=codec is not None):
+        comps = ",".join(row.top_level) + ("" if row.complete or codec is None else ",...")
+        print(
+            f"{row.path:<40}{row.size:>10}{row.raw_size:>10}  {row.frames}  "
+            f"{row.build or '-':<16}{row.saved:<26}{comps}"
+        )
+    return 0
+
+
+def cmd_sweep(args: argparse.Namespace) -> int:
+    records = sweep.sweep(args.root, args.executor, args.jobs)
+    if args.output == "-":
+        sweep.write_manifest(records, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            sweep.write_manifest(records, fh)
+    return 0
+
+
+def cmd_index(args: argparse.Namespace) -> int:
+    records, stats = index.update_index(args.root, args.index, args.executor, args.jobs)
+    print(
+        f"{stats.unchanged} unchanged, {stats.rehashed} rehashed, "
+        f"{stats.decoded} decoded, {stats.removed} removed",
+        file=sys.stderr,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            sweep.write_manifest(records, fh)
+    return 0
+
+
+def cmd_graph_mem(args: argparse.Namespace) -> int:
+    report = network.memory_report(args.files)
+    print(
+        f"{report['networks']} networks, {report['operators']} operators: "
+        f"{report['retained'] / 1024:.1f} KiB retained, "
+        f"{report['peak'] / 1024:.1f} KiB peak, "
+        f"{report['arrays'] / 1024:.1f} KiB in arrays"
+    )
+    return 0
+
+
+def cmd_subtree(args: argparse.Namespace) -> int:
+    lazy = LazyNetwork.open(args.file)
+    try:
+        net = lazy.subtree(args.comp)
+    except KeyError:
+        print(f"tdarchive: {args.comp} not found in {args.file}", file=sys.stderr)
+        return 1
+    for op in net:
+        print(f"{op.path}\t{op.family}:{op.type}")
+    return 0
+
+
+def _print_diff(old: str, new: str, changes, stats) -> None:
+    print(f"--- {old}\n+++ {new}")
+    for change in changes:
+        print(f"  {change}")
+    print(
+        f"  {len(changes)} change(s); {stats.visited} of {stats.operators} "
+        f"operators visited, {stats.compared} compared"
+    )
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    if args.lineage:
+        for old, new, changes, stats in diff.diff_lineage(args.root, args.lineage):
+            _print_diff(old, new, changes, stats)
+        return 0
+    if len(args.files) != 2:
+        args.parser.error("diff needs two files or --lineage NAME")
+    _print_diff(*args.files, *diff.diff_files(*args.files))
+    return 0
+
+
+def cmd_lineages(args: argparse.Namespace) -> int:
+    for chain in lineage.detect(args.root, args.threshold):
+        if len(chain.paths) < 2 and not args.all:
+            continue
+        print(f"{chain.name} ({len(chain.paths)})")
+        for path in chain.paths:
+            print(f"  {path}")
+    return 0
+
+
+def cmd_timeline(args: argparse.Namespace) -> int:
+    points = timeline.lineage_timeline(args.root, args.name, args.cache)
+    print(f"{'day':<12}{'ops':>6}{'raw':>10}{'+ops':>6}{'-ops':>6}"
+          f"{'parms':>7}{'wires':>7}{'other':>7}")
+    for p in points:
+        print(
+            f"{p.day:<12}{p.operators:>6}{p.raw_size:>10}{p.added:>6}{p.removed:>6}"
+            f"{p.params:>7}{p.wires:>7}{p.other:>7}"
+        )
+    return 0
+
+
+def cmd_expand(args: argparse.Namespace) -> int:
+    for path in args.files:
+        print(expand.expand(path, args.output, force=args.force))
+    return 0
+
+
+def cmd_collapse(args: argparse.Namespace) -> int:
+    print(expand.collapse(args.toc, args.output))
+    return 0
+
+
+def cmd_bench_expand(args: argparse.Namespace) -> int:
+    report = expand.benchmark(args.root)
+    print(
+        f"{report['files']} files, {report['raw_bytes'] / 1e6:.1f} MB decoded: "
+        f"expand {report['expand_mb_per_s']:.1f} MB/s, "
+        f"collapse {report['collapse_mb_per_s']:.1f} MB/s"
+    )
+    for path in report["mismatched"]:
+        print(f"not byte-identical after round trip: {path}")
+    return 1 if report["mismatched"] else 0
+
+
+def cmd_zstore(args: argparse.Namespace) -> int:
+    if args.action == "pack":
+        stats = zstore.pack(args.root, args.store, args.level)
+        print(
+            f"{stats.files} files ({stats.payload_mode} in payload mode): "
+            f"{stats.original_bytes} -> {stats.store_bytes} bytes "
+            f"+ {stats.dictionary_bytes} dictionary, saved {stats.saved_bytes}"
+        )
+    elif args.action == "restore":
+        count = zstore.ZStore(args.store).restore_all(args.root)
+        print(f"restored {count} files into {args.root}")
+    else:
+        r = zstore.report(args.root, args.store)
+        print(
+            f"{r['files']} files: {r['original_bytes']} -> {r['store_bytes']} bytes "
+            f"+ {r['dictionary_bytes']} dictionary, saved {r['saved_bytes']}\n"
+            f"native p50 {r['native_p50_ms']:.3f} ms p99 {r['native_p99_ms']:.3f} ms\n"
+            f"store  p50 {r['store_p50_ms']:.3f} ms p99 {r['store_p99_ms']:.3f} ms"
+        )
+    return 0
+
+
+def cmd_payloads(args: argparse.Namespace) -> int:
+    store = payloads.PayloadStore(args.store) if args.store else None
+    report = payloads.extract(args.files, store, args.min_size)
+    for split in report.files:
+        print(
+            f"{split.source}: graph {split.graph_bytes} text {split.text_bytes} "
+            f"binary {split.binary_bytes} bytes, {len(split.payloads)} payload(s)"
+        )
+        for payload in split.payloads:
+            print(f"  {payload.member} {payload.size} {payload.digest}")
+    print(
+        f"{report.unique} distinct payloads, {report.unique_bytes} of "
+        f"{report.total_bytes} bytes unique ({report.duplicate_bytes} duplicated)"
+    )
+    return 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    path = args.index or os.path.join(args.root, search.DEFAULT_SEARCH_INDEX)
+    if args.rebuild or not os.path.exists(path):
+        search.build(args.root).save(path)
+    idx = search.SearchIndex.load(path)
+    start = time.perf_counter()
+    hits = idx.search(args.query, args.field or None)
+    elapsed = (time.perf_counter() - start) * 1e3
+    if args.first:
+        hits = hits[:1]
+    for hit in hits:
+        where = f"{hit.operator}.{hit.key}" if hit.key else hit.operator
+        text = hit.text if len(hit.text) <= 80 else hit.text[:77] + "..."
+        print(f"{hit.path}\t{where}\t{hit.field}\t{text!r}")
+    print(f"{len(hits)} hit(s) in {elapsed:.2f} ms", file=sys.stderr)
+    return 0
+
+
+def cmd_deltastore(args: argparse.Namespace) -> int:
+    if args.action == "pack":
+        groups = lineage.as_groups(lineage.detect(args.root)) if args.detect else None
+        stats = deltastore.pack(args.root, args.store, groups, keyframe=args.keyframe)
+        print(
+            f"{stats.versions} versions in {stats.lineages} lineages "
+            f"({stats.bases} stored whole): {stats.original_bytes} -> "
+            f"{stats.store_bytes} bytes, saved {stats.saved_bytes}"
+        )
+    elif args.action == "restore":
+        ds = deltastore.DeltaStore(args.store)
+        for rel in args.versions or ds.paths():
+            target = os.path.join(args.root, *rel.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as fh:
+                fh.write(ds.restore(rel))
+            print(target)
+    else:
+        r = deltastore.report(args.root, args.store, args.versions or None)
+        print(
+            f"{r['versions']} versions: {r['original_bytes']} -> {r['store_bytes']} "
+            f"bytes, saved {r['saved_bytes']}\n"
+            f"reconstruct p50 {r['p50_ms']:.3f} ms p99 {r['p99_ms']:.3f} ms"
+        )
+    return 0
+
+
+def cmd_chunks(args: argparse.Namespace) -> int:
+    if args.action == "pack":
+        s = cdc.pack(args.root, args.store)
+        print(
+            f"{s.files} files, {s.logical_bytes} bytes in {s.chunks} chunks; "
+            f"{s.unique_chunks} unique ({s.unique_bytes} bytes), "
+            f"dedup ratio {s.dedup_ratio:.2f}\n"
+            f"{s.new_chunks} new chunks written ({s.new_bytes} bytes)"
+        )
+        return 0
+    store = cdc.ChunkStore(args.store)
+    for rel in store.recipes():
+        target = os.path.join(args.root, *rel.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as fh:
+            fh.write(store.restore(rel))
+    return 0
+
+
+def cmd_textconv(args: argparse.Namespace) -> int:
+    text = textconv.textconv(args.file)
+    sys.stdout.buffer.write(text.encode("utf-8", "surrogateescape"))
+    return 0
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    out = args.output or args.ours
+    conflicts = merge.merge_files(args.base, args.ours, args.theirs, out)
+    label = args.path or out
+    for conflict in conflicts:
+        print(f"tdarchive merge: {label}: {conflict}", file=sys.stderr)
+    return 1 if conflicts else 0
+
+
+def cmd_git_setup(args: argparse.Namespace) -> int:
+    command = f"{args.python or shlex.quote(sys.executable)} -m tdarchive"
+    settings = [
+        ("diff.tdarchive.textconv", f"{command} textconv"),
+        ("merge.tdarchive.name", "TouchDesigner network merge"),
+        ("merge.tdarchive.driver", f"{command} merge %O %A %B %P"),
+    ]
+    for key, value in settings:
+        subprocess.run(["git", "config", key, value], check=True)
+        print(f"{key} = {value}")
+    return 0
+
+
+def cmd_pack(args: argparse.Namespace) -> int:
+    if args.action == "create":
+        print(pack.pack_folder(args.target, args.output))
+        return 0
+    with pack.Pack(args.target) as pk:
+        if args.action == "list":
+            for m in pk.members:
+                method = "zstd" if m.method == pack.METHOD_ZSTD else "raw"
+                print(f"{m.name:<60}{method:>6}{m.raw_size:>12}{m.size:>12}")
+        else:
+            for name in args.members or pk.names():
+                print(pk.extract(name, args.output or "."))
+    return 0
+
+
+def _report_differences(first, diffs) -> int:
+    if first is None:
+        print("ok")
+        return 0
+    print(f"first differing subtree: {first}")
+    for d in diffs:
+        print(f"  {d}")
+    return 1
+
+
+def cmd_merkle(args: argparse.Namespace) -> int:
+    if args.action == "build":
+        manifest = merkle.build(args.root, args.jobs)
+        manifest.save(args.manifest)
+        print(manifest.root)
+        return 0
+    if args.action == "compare" and args.other is None:
+        args.parser.error("compare needs two manifests")
+    expected = merkle.MerkleManifest.load(args.manifest)
+    if args.action == "verify":
+        return _report_differences(*merkle.verify(args.root, expected, args.jobs))
+    other = merkle.MerkleManifest.load(args.other)
+    return _report_differences(
+        merkle.first_difference(expected, other), merkle.differences(expected, other)
+    )
+
+
+def cmd_importcache(args: argparse.Namespace) -> int:
+    if args.action != "report" and not args.store:
+        args.parser.error(f"importcache {args.action} needs a store directory")
+    if args.action == "relink":
+        print(f"relinked {cachestore.relink(args.root, args.store)} caches")
+        return 0
+    if args.action == "report":
+        r = cachestore.report(args.root)
+    else:
+        r = cachestore.dedup(args.root, args.store)
+    print(f"{r.caches} caches, {r.distinct} distinct")
+    print(f"{r.cache_bytes} bytes in the archive, {r.unique_bytes} unique "
+          f"({r.duplicate_bytes} duplicated)")
+    if args.action == "dedup":
+        print(f"linked {r.linked} copies, freed {r.saved_bytes} bytes")
+    return 0
+
+
+def cmd_bench_clip(args: argparse.Namespace) -> int:
+    with TdcFile(args.file) as cache:
+        entry = args.entry or next(
+            (e.name for e in cache.entries if e.kind == KIND_CLIP), None)
+        if entry is None:
+            args.parser.error(f"{args.file}: no clip entry")
+        view = cache.view(entry)
+        row = clip.benchmark(view, args.repeat)
+        view.release()
+    print(f"{entry}: {row['tracks']} tracks x {row['frames']} frames, {row['bytes']} bytes")
+    print(f"  per-track  {row['per_track_s'] * 1000:8.2f} ms")
+    print(f"  vectorized {row['vectorized_s'] * 1000:8.2f} ms  ({row['speedup']:.1f}x)")
+    print(f"  identical  {row['identical']}")
+    return 0 if row["identical"] else 1
+
+
+def cmd_bench_sweep(args: argparse.Namespace) -> int:
+    print(f"{'executor':<10}{'seconds':>10}{'files/s':>10}{'MB/s':>10}")
+    for row in sweep.benchmark(args.root, workers=args.jobs, repeat=args.repeat):
+        print(
+            f"{row['executor']:<10}{row['seconds']:>10.3f}"
+            f"{row['files_per_s']:>10.1f}{row['mb_per_s']:>10.1f}"
+        )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="tdarchive", description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("info", help="show .toe container frames")
+    p.add_argument("files", nargs="+")
+    p.set_defaults(func=cmd_info)
+
+    p = sub.add_parser("tdc", help="show import cache entries and geometry attributes")
+    p.add_argument("files", nargs="+")
+    p.set_defaults(func=cmd_tdc)
+
+    p = sub.add_parser("ls", help="list sketches from headers and payload prefixes")
+    p.add_argument("--root", default=".")
+    p.add_argument("--headers-only", action="store_true",
+                   help="skip decoding even when a codec is installed")
+    p.add_argument("--budget", type=int, default=listing.DEFAULT_BUDGET,
+                   help="decoded bytes to read per file at most, once .build is found")
+    p.set_defaults(func=cmd_ls)
+
+    p = sub.add_parser("sweep", help="write a JSON-lines manifest of the archive")
+    p.add_argument("--root", default=".")
+    p.add_argument("-o", "--output", default="-")
+    p.add_argument("-j", "--jobs", type=_positive_int)
+    p.add_argument("--executor", choices=sweep.EXECUTORS, default="process")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("index", help="incrementally update the manifest index")
+    p.add_argument("--root", default=".")
+    p.add_argument("--index", help=f"index file (default ROOT/{index.DEFAULT_INDEX})")
+    p.add_argument("-o", "--output", help="also write the manifest here")
+    p.add_argument("-j", "--jobs", type=_positive_int)
+    p.add_argument("--executor", choices=sweep.EXECUTORS, default="process")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("graph-mem", help="measure memory of decoded networks")
+    p.add_argument("files", nargs="+")
+    p.set_defaults(func=cmd_graph_mem)
+
+    p = sub.add_parser("subtree", help="list the operators of one COMP")
+    p.add_argument("file")
+    p.add_argument("comp")
+    p.set_defaults(func=cmd_subtree)
+
+    p = sub.add_parser("diff", help="structural diff of two versions of a sketch")
+    p.add_argument("files", nargs="*", help="old and new .toe (or .toc)")
+    p.add_argument("--lineage", metavar="NAME",
+                   help="diff every consecutive pair of NAME (e.g. gridz.toe) in the archive")
+    p.add_argument("--root", default=".")
+    p.set_defaults(func=cmd_diff, parser=p)
+
+    p = sub.add_parser("lineages", help="cluster sketches into version chains by content")
+    p.add_argument("--root", default=".")
+    p.add_argument("--threshold", type=float, default=lineage.DEFAULT_THRESHOLD,
+                   help="minimum estimated Jaccard similarity to link two files")
+    p.add_argument("--all", action="store_true", help="also list single-file lineages")
+    p.set_defaults(func=cmd_lineages)
+
+    p = sub.add_parser("timeline", help="per-day operator and parameter churn of a sketch")
+    p.add_argument("name", help="sketch file name, e.g. gridz.toe")
+    p.add_argument("--root", default=".")
+    p.add_argument("--cache", help=f"cache file (default ROOT/{timeline.DEFAULT_CACHE})")
+    p.set_defaults(func=cmd_timeline)
+
+    p = sub.add_parser("expand", help="expand .toe files into text trees")
+    p.add_argument("files", nargs="+")
+    p.add_argument("-o", "--output", help="output directory (default: next to each file)")
+    p.add_argument("-f", "--force", action="store_true", help="replace existing trees")
+    p.set_defaults(func=cmd_expand)
+
+    p = sub.add_parser("collapse", help="rebuild a .toe from an expanded tree")
+    p.add_argument("toc")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=cmd_collapse)
+
+    p = sub.add_parser("bench-expand", help="round-trip every .toe and report MB/s")
+    p.add_argument("--root", default=".")
+    p.set_defaults(func=cmd_bench_expand)
+
+    p = sub.add_parser("zstore", help="zstd dictionary storage mode")
+    p.add_argument("action", choices=("pack", "restore", "report"))
+    p.add_argument("store")
+    p.add_argument("--root", default=".",
+                   help="archive to pack/report on, or target directory for restore")
+    p.add_argument("--level", type=int, default=zstore.DEFAULT_LEVEL)
+    p.set_defaults(func=cmd_zstore)
+
+    p = sub.add_parser("payloads", help="split files into graph and embedded data")
+    p.add_argument("files", nargs="+", help=".toe files or expanded .toc trees")
+    p.add_argument("--store", help="deduplicate binary payloads into this directory")
+    p.add_argument("--min-size", type=int, default=0)
+    p.set_defaults(func=cmd_payloads)
+
+    p = sub.add_parser("search", help="substring search over operators and parameters")
+    p.add_argument("query")
+    p.add_argument("--root", default=".")
+    p.add_argument("--index", help=f"index file (default ROOT/{search.DEFAULT_SEARCH_INDEX})")
+    p.add_argument("--field", action="append", choices=search.FIELDS,
+                   help="restrict to a field; may be repeated")
+    p.add_argument("--first", action="store_true", help="only the earliest hit")
+    p.add_argument("--rebuild", action="store_true")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("deltastore", help="delta-compressed store of sketch lineages")
+    p.add_argument("action", choices=("pack", "restore", "report"))
+    p.add_argument("store")
+    p.add_argument("versions", nargs="*", help="archive paths to restore or report on")
+    p.add_argument("--root", default=".",
+                   help="archive to pack/report on, or target directory for restore")
+    p.add_argument("--keyframe", type=_positive_int, default=deltastore.DEFAULT_KEYFRAME,
+                   help="store every Nth version of a lineage whole")
+    p.add_argument("--detect", action="store_true",
+                   help="group versions by content similarity instead of file name")
+    p.set_defaults(func=cmd_deltastore)
+
+    p = sub.add_parser("chunks", help="content-defined chunk store for the archive")
+    p.add_argument("action", choices=("pack", "restore"))
+    p.add_argument("store")
+    p.add_argument("--root", default=".",
+                   help="archive to pack, or target directory for restore")
+    p.set_defaults(func=cmd_chunks)
+
+    p = sub.add_parser("textconv", help="render a .toe or .tdc as text for git diff")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_textconv)
+
+    p = sub.add_parser("merge", help="three-way merge of .toe files (git merge driver)")
+    p.add_argument("base")
+    p.add_argument("ours", help="also the output unless -o is given, as git expects")
+    p.add_argument("theirs")
+    p.add_argument("path", nargs="?", help="path of the file in the repository, for messages")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("git-setup", help="register the git drivers in this repository")
+    p.add_argument("--python",
+                   help="interpreter git should run the drivers with (default: this one)")
+    p.set_defaults(func=cmd_git_setup)
+
+    p = sub.add_parser("pack", help="single-file packs of a sketch folder")
+    p.add_argument("action", choices=("create", "list", "extract"))
+    p.add_argument("target", help="folder to pack, or the pack to list/extract")
+    p.add_argument("members", nargs="*", help="members to extract (default: all)")
+    p.add_argument("-o", "--output", help="pack file to write, or extraction directory")
+    p.set_defaults(func=cmd_pack)
+
+    p = sub.add_parser("merkle", help="Merkle manifest: build, verify or compare")
+    p.add_argument("action", choices=("build", "verify", "compare"))
+    p.add_argument("manifest", nargs="?", default=merkle.DEFAULT_MANIFEST)
+    p.add_argument("other", nargs="?", help="second manifest for compare")
+    p.add_argument("--root", default=".")
+    p.add_argument("-j", "--jobs", type=_positive_int)
+    p.set_defaults(func=cmd_merkle, parser=p)
+
+    p = sub.add_parser("importcache", help="shared store for TDImportCache files")
+    p.add_argument("action", choices=("dedup", "report", "relink"))
+    p.add_argument("store", nargs="?", help="content-addressed store directory")
+    p.add_argument("--root", default=".")
+    p.set_defaults(func=cmd_importcache, parser=p)
+
+    p = sub.add_parser("bench-clip", help="compare clip decoders on a .tdc cache")
+    p.add_argument("file")
+    p.add_argument("--entry", help="clip entry name (default: the first clip)")
+    p.add_argument("--repeat", type=_positive_int, default=5)
+    p.set_defaults(func=cmd_bench_clip, parser=p)
+
+    p = sub.add_parser("bench-sweep", help="compare sweep executors")
+    p.add_argument("--root", default=".")
+    p.add_argument("-j", "--jobs", type=_positive_int)
+    p.add_argument("--repeat", type=_positive_int, default=3)
+    p.set_defaults(func=cmd_bench_sweep)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ArchiveError as exc:
+        print(f"tdarchive: {exc}", file=sys.stderr)
+        return 1
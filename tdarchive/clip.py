@@ -0,0 +1,195 @@
+"""Animation clips stored in import caches (kind 1 ``.tdc`` entries).
+
+A clip entry is text::
+
+    {
+       rate = 30
+       start = -1
+       tracklength = 612
+       tracks = 438
+       {
+          name = rp_sophia_animated_003_idling/..._hip:tx
+          data_rle = -3.46926 -3.42277 ... @4 -0.288701 ...
+       }
+       ...
+    }
+
+``data_rle`` holds one value per frame, except that ``@N v`` stands for
+``N`` copies of ``v``.  Tracks are channels such as ``joint:tx`` or
+``joint:rz``.
+
+:func:`decode_clip` decodes every track in one pass.  It joins the data
+lines of all tracks into one buffer and parses every number with a single
+NumPy call.  Token and run boundaries come from the bytes, and one
+``repeat`` expands the runs.  The result is a contiguous
+``(tracks, tracklength)`` float32 array.  :func:`parse_tracks` is the
+per-track reader it replaces, kept as the reference for :func:`benchmark`.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .errors import ArchiveError, MissingDependencyError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+RLE_MARK = b"@"
+_SETTING = re.compile(rb"^\s*(\w+) = (\S+)\s*$", re.M)
+_TRACK = re.compile(rb"name = ([^\n]*)\n\s*data_rle = ([^\n]*)\n")
+
+
+class ClipFormatError(ArchiveError, ValueError):
+    """A clip entry is missing settings or a track has the wrong length."""
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise MissingDependencyError("clip decoding needs the 'numpy' package")
+
+
+class Clip:
+    """All tracks of a clip as one ``(tracks, frames)`` float32 array."""
+
+    def __init__(self, rate: float, start: int, names: Sequence[str], data):
+        self.rate = rate
+        self.start = start
+        self.names = tuple(sys.intern(n) for n in names)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"<Clip {len(self.names)} tracks x {self.length} frames @ {self.rate:g} fps>"
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.index
+
+    @property
+    def length(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the first frame to the last."""
+        return (self.length - 1) / self.rate
+
+    def track(self, name: str):
+        """One track's samples (a view into :attr:`data`)."""
+        return self.data[self.index[name]]
+
+    def rows(self, names: Sequence[str]):
+        """Row numbers of ``names``, for gathering several tracks at once."""
+        return np.fromiter((self.index[n] for n in names), dtype=np.intp, count=len(names))
+
+
+def _settings(text: bytes) -> Tuple[float, int, int, int]:
+    parts = text.split(b"{", 2)
+    if len(parts) < 2:
+        raise ClipFormatError("clip entry has no '{' block")
+    head = parts[1]  # settings sit before the first track
+    found = {k.decode(): v for k, v in _SETTING.findall(head)}
+    try:
+        return (float(found["rate"]), int(found["start"]),
+                int(found["tracklength"]), int(found["tracks"]))
+    except (KeyError, ValueError) as exc:
+        raise ClipFormatError(f"clip settings are incomplete: {exc}") from None
+
+
+def decode_clip(text) -> Clip:
+    """Decode a clip entry (bytes or a memoryview of the cache) in one pass."""
+    _require_numpy()
+    text = bytes(text)
+    rate, start, length, count = _settings(text)
+    pairs = _TRACK.findall(text)
+    if len(pairs) != count:
+        raise ClipFormatError(f"clip declares {count} tracks, found {len(pairs)}")
+    names = [n.strip().decode("utf-8", "surrogateescape") for n, _ in pairs]
+
+    # All data lines in one buffer; token boundaries come from the bytes.
+    lines = [d for _, d in pairs]
+    blob = b" ".join(lines)
+    line_at = np.cumsum([0] + [len(d) + 1 for d in lines[:-1]])
+    raw = np.frombuffer(blob, dtype=np.uint8)
+    space = raw <= 0x20
+    token_at = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    numbers = np.fromstring(blob.replace(RLE_MARK, b" "), dtype=np.float64, sep=" ")
+    if len(numbers) != len(token_at):
+        raise ClipFormatError("clip data has tokens that are not numbers")
+    first = np.searchsorted(token_at, line_at)
+    track = np.repeat(np.arange(count), np.diff(first, append=len(token_at)))
+
+    # A run count applies to the value token right after it.
+    runs = np.searchsorted(token_at, np.flatnonzero(raw == RLE_MARK[0]))
+    repeats = np.ones(len(token_at), dtype=np.int64)
+    if len(runs) and runs[-1] + 1 >= len(token_at):
+        raise ClipFormatError("clip data ends with a run count")
+    repeats[runs + 1] = numbers[runs].astype(np.int64)
+    keep = np.ones(len(token_at), dtype=bool)
+    keep[runs] = False
+    lengths = np.bincount(track[keep], weights=repeats[keep], minlength=count)
+    bad = np.flatnonzero(lengths != length)
+    if len(bad):
+        raise ClipFormatError(
+            f"track {names[bad[0]]!r} has {int(lengths[bad[0]])} samples, expected {length}"
+        )
+    data = np.repeat(numbers[keep].astype(np.float32), repeats[keep])
+    return Clip(rate, start, names, data.reshape(count, length))
+
+
+def parse_tracks(text) -> Clip:
+    """Per-track reference decoder; :func:`decode_clip` gives the same result."""
+    _require_numpy()
+    text = bytes(text)
+    rate, start, length, count = _settings(text)
+    names: List[str] = []
+    rows = []
+    for name, rle in _TRACK.findall(text):
+        names.append(name.strip().decode("utf-8", "surrogateescape"))
+        values: List[float] = []
+        tokens = iter(rle.split())
+        for token in tokens:
+            if token.startswith(RLE_MARK):
+                values.extend([float(next(tokens))] * int(token[1:]))
+            else:
+                values.append(float(token))
+        if len(values) != length:
+            raise ClipFormatError(f"track {names[-1]!r} has {len(values)} samples")
+        rows.append(values)
+    if len(rows) != count:
+        raise ClipFormatError(f"clip declares {count} tracks, found {len(rows)}")
+    return Clip(rate, start, names, np.array(rows, dtype=np.float32))
+
+
+def benchmark(text, repeat: int = 5) -> Dict:
+    """Best-of-``repeat`` seconds for the per-track and vectorized decoders."""
+    if repeat < 1:
+        raise ValueError(f"repeat must be at least 1, got {repeat}")
+    text = bytes(text)
+    best: Dict[str, Optional[float]] = {"per_track": None, "vectorized": None}
+    results = {}
+    for key, fn in (("per_track", parse_tracks), ("vectorized", decode_clip)):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[key] = fn(text)
+            elapsed = time.perf_counter() - start
+            if best[key] is None or elapsed < best[key]:
+                best[key] = elapsed
+    a, b = results["per_track"], results["vectorized"]
+    return {
+        "tracks": len(b),
+        "frames": b.length,
+        "bytes": len(text),
+        "per_track_s": best["per_track"],
+        "vectorized_s": best["vectorized"],
+        "speedup": best["per_track"] / best["vectorized"],
+        "identical": a.names == b.names and bool(np.array_equal(a.data, b.data)),
+    }
@@ -0,0 +1,104 @@
+"""Payload codec registry.
+
+A .toe payload is a sequence of 8-byte cipher blocks wrapped around a
+compressed stream, and TouchDesigner does not document either layer.  The
+container reader therefore hands payload bytes to a pluggable codec instead
+of hard-coding one.  A codec follows the shape of :func:`zlib.decompressobj`
+so it can be driven chunk by chunk.  The decoded payload holds the same
+members that TouchDesigner's ``toeexpand`` writes out (``.n`` node files,
+``.parm`` parameter files, DAT ``.text`` and so on); the codec also knows how
+those members are framed inside it.
+
+Codecs are registered in-process with :func:`register_codec`, or named in the
+``TDARCHIVE_CODEC`` environment variable as ``"package.module:attribute"`` so
+that worker processes pick up the same codec as their parent.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+from typing import Iterable, Iterator, Optional, Protocol, Tuple
+
+from .errors import CodecUnavailableError
+
+ENV_VAR = "TDARCHIVE_CODEC"
+
+
+class Decompressor(Protocol):
+    def decompress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class PayloadCodec:
+    """Base class for payload codecs.
+
+    Reading needs :meth:`decompressobj` and :meth:`split_members`; writing
+    .toe files back also needs :meth:`compressobj` and :meth:`join_members`.
+    """
+
+    name = "abstract"
+
+    def decompressobj(self) -> Decompressor:
+        raise NotImplementedError
+
+    def compressobj(self) -> Compressor:
+        """Return a compressor whose total output is block aligned."""
+        raise NotImplementedError
+
+    def split_members(self, payload) -> Iterator[Tuple[str, int, int]]:
+        """Yield ``(name, start, end)`` for each member of a decoded payload."""
+        raise NotImplementedError
+
+    def join_members(self, members: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+        """Frame ``(name, data)`` pairs back into a decoded payload stream."""
+        raise NotImplementedError
+
+
+_codec: Optional[PayloadCodec] = None
+
+
+def register_codec(codec: Optional[PayloadCodec]) -> None:
+    """Install ``codec`` for this process; ``None`` removes it."""
+    global _codec
+    _codec = codec
+
+
+def _load_from_env() -> Optional[PayloadCodec]:
+    spec = os.environ.get(ENV_VAR)
+    if not spec:
+        return None
+    module_name, _, attr = spec.partition(":")
+    try:
+        target = getattr(importlib.import_module(module_name), attr or "codec")
+    except (ImportError, AttributeError) as exc:
+        raise CodecUnavailableError(f"cannot load codec {spec!r}: {exc}") from exc
+    return target() if isinstance(target, type) else target
+
+
+def get_codec() -> PayloadCodec:
+    """Return the active codec, loading it from the environment if needed."""
+    global _codec
+    if _codec is None:
+        _codec = _load_from_env()
+    if _codec is None:
+        raise CodecUnavailableError(
+            f"no .toe payload codec registered; set {ENV_VAR}=module:attr "
+            "or call tdarchive.register_codec()"
+        )
+    return _codec
+
+
+def has_codec() -> bool:
+    try:
+        get_codec()
+    except CodecUnavailableError:
+        return False
+    return True
@@ -0,0 +1,287 @@
+"""Memory-mapped reader for the .toe container.
+
+A .toe file is one or more frames laid end to end::
+
+    b"10"            magic
+    u32 big-endian   stored payload length
+    u32 big-endian   decoded payload length
+    payload          stored length bytes, a whole number of 8-byte blocks
+
+Almost every sketch is a single frame; larger files such as
+``2021-06-09/block-time.toe`` carry a second one.  The reader maps the file,
+validates every frame header up front and only touches payload pages when a
+caller iterates over them, so opening a file costs a handful of syscalls
+regardless of its size.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from .codec import PayloadCodec, get_codec
+from .errors import ToeFormatError
+
+MAGIC = b"10"
+FRAME_HEADER = struct.Struct(">2sII")
+BLOCK_SIZE = 8
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class Frame(NamedTuple):
+    index: int
+    offset: int
+    stored_size: int
+    raw_size: int
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + FRAME_HEADER.size
+
+    @property
+    def end(self) -> int:
+        return self.data_offset + self.stored_size
+
+
+def parse_frames(buf, size: int) -> Tuple[Frame, ...]:
+    """Walk the frame headers in ``buf`` without touching payload bytes."""
+    frames = []
+    offset = 0
+    while offset < size:
+        if size - offset < FRAME_HEADER.size:
+            raise ToeFormatError(f"truncated frame header at offset {offset}")
+        magic, stored, raw = FRAME_HEADER.unpack_from(buf, offset)
+        if magic != MAGIC:
+            raise ToeFormatError(f"bad magic {magic!r} at offset {offset}")
+        if stored == 0 or stored % BLOCK_SIZE:
+            raise ToeFormatError(
+                f"frame {len(frames)} stored length {stored} is not a "
+                f"positive multiple of {BLOCK_SIZE}"
+            )
+        frame = Frame(len(frames), offset, stored, raw)
+        if frame.end > size:
+            raise ToeFormatError(
+                f"frame {frame.index} needs {frame.end} bytes, file has {size}"
+            )
+        frames.append(frame)
+        offset = frame.end
+    if not frames:
+        raise ToeFormatError("empty file")
+    return tuple(frames)
+
+
+class ToeFile:
+    """A read-only, memory-mapped .toe container.
+
+    Payload accessors return :class:`memoryview` slices of the mapping, so
+    they must be released before :meth:`close` is called.
+    """
+
+    def __init__(self, path: "os.PathLike[str] | str"):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as fh:
+            self.size = os.fstat(fh.fileno()).st_size
+            if self.size == 0:
+                raise ToeFormatError(f"{self.path}: empty file")
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        try:
+            self.frames = parse_frames(self._view, self.size)
+        except ToeFormatError as exc:
+            self.close()
+            raise ToeFormatError(f"{self.path}: {exc}") from None
+
+    def __enter__(self) -> "ToeFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<ToeFile {self.path!r} frames={len(self.frames)} size={self.size}>"
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # A caller still holds a payload view; the mapping goes away
+            # with the last reference instead.
+            pass
+        self._mm = None
+
+    @property
+    def closed(self) -> bool:
+        return self._mm is None
+
+    @property
+    def stored_size(self) -> int:
+        return sum(frame.stored_size for frame in self.frames)
+
+    @property
+    def raw_size(self) -> int:
+        return sum(frame.raw_size for frame in self.frames)
+
+    def _check_open(self) -> None:
+        if self._mm is None:
+            raise ValueError("I/O operation on closed ToeFile")
+
+    def stored(self, frame: int = 0) -> memoryview:
+        """Zero-copy view of one frame's stored payload."""
+        self._check_open()
+        f = self.frames[frame]
+        return self._view[f.data_offset:f.end]
+
+    def iter_stored(
+        self, frame: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[memoryview]:
+        """Yield block-aligned views over the stored payload.
+
+        ``frame=None`` walks every frame in order.
+        """
+        chunk_size = max(BLOCK_SIZE, chunk_size - chunk_size % BLOCK_SIZE)
+        indices = range(len(self.frames)) if frame is None else (frame,)
+        for index in indices:
+            payload = self.stored(index)
+            for start in range(0, len(payload), chunk_size):
+                yield payload[start:start + chunk_size]
+
+    def iter_decoded(
+        self,
+        frame: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        codec: Optional[PayloadCodec] = None,
+    ) -> Iterator[bytes]:
+        """Stream the decoded payload, one stored chunk at a time.
+
+        Each frame is decoded with a fresh decompressor and its output length
+        is checked against the header.
+        """
+        codec = codec or get_codec()
+        indices = range(len(self.frames)) if frame is None else (frame,)
+        for index in indices:
+            expected = self.frames[index].raw_size
+            produced = 0
+            decoder = codec.decompressobj()
+            for chunk in self.iter_stored(index, chunk_size):
+                out = decoder.decompress(chunk)
+                if out:
+                    produced += len(out)
+                    yield out
+            out = decoder.flush()
+            if out:
+                produced += len(out)
+                yield out
+            if produced != expected:
+                raise ToeFormatError(
+                    f"{self.path}: frame {index} decoded to {produced} bytes, "
+                    f"header says {expected}"
+                )
+
+    def read_decoded(self, codec: Optional[PayloadCodec] = None) -> bytearray:
+        """Decode every frame into a single preallocated buffer."""
+        out = bytearray(self.raw_size)
+        pos = 0
+        for piece in self.iter_decoded(codec=codec):
+            out[pos:pos + len(piece)] = piece
+            pos += len(piece)
+        return out
+
+
+def open_toe(path: "os.PathLike[str] | str") -> ToeFile:
+    return ToeFile(path)
+
+
+def decode_buffer(buf, codec: Optional[PayloadCodec] = None) -> bytearray:
+    """Decode a .toe image that is already in memory."""
+    view = memoryview(buf)
+    codec = codec or get_codec()
+    out = bytearray()
+    for frame in parse_frames(view, len(view)):
+        decoder = codec.decompressobj()
+        piece = decoder.decompress(view[frame.data_offset:frame.end]) + decoder.flush()
+        if len(piece) != frame.raw_size:
+            raise ToeFormatError(
+                f"frame {frame.index} decoded to {len(piece)} bytes, "
+                f"header says {frame.raw_size}"
+            )
+        out += piece
+    return out
+
+
+def _split_frames(
+    chunks: Iterable[bytes], sizes: Sequence[int]
+) -> Iterator[Tuple[int, memoryview]]:
+    """Tag each piece of a decoded stream with the frame it belongs to.
+
+    With no recorded sizes everything goes into a single frame.
+    """
+    frame = 0
+    left = sizes[0] if sizes else -1
+    for chunk in chunks:
+        view = memoryview(chunk)
+        while view:
+            if left == 0:
+                frame += 1
+                if frame >= len(sizes):
+                    raise ToeFormatError("payload is larger than the recorded frames")
+                left = sizes[frame]
+            take = len(view) if left < 0 else min(left, len(view))
+            yield frame, view[:take]
+            view = view[take:]
+            if left > 0:
+                left -= take
+
+
+def write_container(
+    out: BinaryIO,
+    chunks: Iterable[bytes],
+    frame_sizes: Sequence[int] = (),
+    codec: Optional[PayloadCodec] = None,
+) -> int:
+    """Encode a decoded payload stream as .toe frames into seekable ``out``.
+
+    ``frame_sizes`` gives the decoded size of each frame; leave it empty for
+    a single frame.  Each frame header is written as a placeholder and
+    patched once its stored length is known.  Returns the bytes written.
+    An empty payload raises :class:`ToeFormatError`, since a .toe needs at
+    least one frame.
+    """
+    codec = codec or get_codec()
+    start = out.tell()
+    current = -1
+    compressor = None
+    header_at = stored = raw = 0
+
+    def close_frame() -> None:
+        nonlocal stored
+        tail = compressor.flush()
+        out.write(tail)
+        stored += len(tail)
+        end = out.tell()
+        out.seek(header_at)
+        out.write(FRAME_HEADER.pack(MAGIC, stored, raw))
+        out.seek(end)
+
+    for frame, piece in _split_frames(chunks, frame_sizes):
+        if frame != current:
+            if compressor is not None:
+                close_frame()
+            current = frame
+            compressor = codec.compressobj()
+            header_at = out.tell()
+            out.write(bytes(FRAME_HEADER.size))
+            stored = raw = 0
+        raw += len(piece)
+        data = compressor.compress(piece)
+        if data:
+            out.write(data)
+            stored += len(data)
+    if compressor is None:
+        raise ToeFormatError("nothing to write: the payload is empty")
+    close_frame()
+    return out.tell() - start
@@ -0,0 +1,239 @@
+"""Delta-compressed version store for sketch lineages.
+
+A lineage is every dated copy of one sketch (by default, every file with the
+same name).  The first version is stored whole, and each later one as a zstd
+frame that uses its predecessor as a raw-content dictionary.  That is a
+binary delta which zstd both finds and applies.  Every ``keyframe``-th
+version is stored whole again, so no reconstruction replays a long chain.
+
+As in :mod:`tdarchive.zstore`, a version holds its decoded payload when the
+codec re-encodes it to the original bytes, and the stored bytes otherwise.
+Deltas between decoded payloads are far smaller, because a small edit
+scrambles the whole compressed stream.  Restores are checked against a
+BLAKE2b digest of the original file.  Layout::
+
+    STORE/2021-01-13/gridz.toe.tdlt
+
+Each ``.tdlt`` starts with a header (magic, mode, keyframe flag, digest,
+frame table, parent path) followed by one zstd frame.  Needs ``zstandard``.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .archive import iter_archive
+from .codec import PayloadCodec, get_codec, has_codec
+from .storage import (
+    MODE_PAYLOAD, content_digest, encode_toe, percentile, prepare_file, require_zstd,
+)
+from .zstore import DEFAULT_LEVEL, FRAME, StoreError
+
+MAGIC = b"TDL1"
+HEADER = struct.Struct(">4sBB16sIH")  # magic, mode, is_base, digest, frames, parent length
+DELTA_SUFFIX = ".tdlt"
+DEFAULT_KEYFRAME = 8
+DEFAULT_CACHE = 8
+
+
+class DeltaStats(NamedTuple):
+    lineages: int
+    versions: int
+    bases: int
+    original_bytes: int
+    store_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.store_bytes
+
+
+def lineages_by_name(root: "os.PathLike[str] | str") -> Dict[str, List[str]]:
+    """Archive .toe paths grouped by file name, each list ordered by day."""
+    groups: Dict[str, List[str]] = {}
+    for entry in iter_archive(root):
+        if entry.kind == "toe":
+            groups.setdefault(entry.path.rsplit("/", 1)[-1], []).append(entry.path)
+    return groups
+
+
+def _store_path(store: str, relpath: str) -> str:
+    return os.path.join(store, *relpath.split("/")) + DELTA_SUFFIX
+
+
+def _raw_dict(zstd, data: bytes):
+    return zstd.ZstdCompressionDict(data, dict_type=zstd.DICT_TYPE_RAWCONTENT)
+
+
+def pack(
+    root: "os.PathLike[str] | str",
+    store: "os.PathLike[str] | str",
+    lineages: Optional[Dict[str, Sequence[str]]] = None,
+    keyframe: int = DEFAULT_KEYFRAME,
+    level: int = DEFAULT_LEVEL,
+) -> DeltaStats:
+    """Write every version of every lineage into ``store``.
+
+    ``lineages`` maps a lineage name to archive paths in version order; by
+    default it is :func:`lineages_by_name`.  ``keyframe`` must be at least 1.
+    """
+    if keyframe < 1:
+        raise ValueError(f"keyframe must be at least 1, got {keyframe}")
+    zstd = require_zstd()
+    root, store = os.fspath(root), os.fspath(store)
+    codec = get_codec() if has_codec() else None
+    if lineages is None:
+        lineages = lineages_by_name(root)
+    plain = zstd.ZstdCompressor(level=level)
+    versions = bases = original = stored = 0
+    for paths in lineages.values():
+        previous: Optional[Tuple[str, bytes]] = None
+        for position, rel in enumerate(paths):
+            source = os.path.join(root, *rel.split("/"))
+            mode, data, digest, frames = prepare_file(source, codec)
+            is_base = previous is None or position % keyframe == 0
+            if is_base:
+                body = plain.compress(data)
+                parent = b""
+            else:
+                compressor = zstd.ZstdCompressor(
+                    level=level, dict_data=_raw_dict(zstd, previous[1])
+                )
+                body = compressor.compress(data)
+                parent = previous[0].encode("utf-8")
+            blob = bytearray(HEADER.pack(MAGIC, mode, is_base, digest, len(frames), len(parent)))
+            for frame in frames:
+                blob += FRAME.pack(*frame)
+            blob += parent
+            blob += body
+            target = _store_path(store, rel)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as fh:
+                fh.write(blob)
+            versions += 1
+            bases += is_base
+            original += os.path.getsize(source)
+            stored += len(blob)
+            previous = (rel, data)
+    return DeltaStats(len(lineages), versions, bases, original, stored)
+
+
+class _Version(NamedTuple):
+    mode: int
+    digest: bytes
+    frames: List[Tuple[int, int]]
+    parent: Optional[str]
+    body: memoryview
+
+
+class DeltaStore:
+    """Reconstructs versions on demand, keeping the last few in an LRU."""
+
+    def __init__(self, directory: "os.PathLike[str] | str", cache_size: int = DEFAULT_CACHE):
+        self._zstd = require_zstd()
+        self.directory = os.fspath(directory)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._plain = self._zstd.ZstdDecompressor()
+
+    def paths(self) -> List[str]:
+        out = []
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(DELTA_SUFFIX):
+                    full = os.path.join(dirpath, name[: -len(DELTA_SUFFIX)])
+                    out.append(os.path.relpath(full, self.directory).replace(os.sep, "/"))
+        return out
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _read(self, relpath: str) -> _Version:
+        path = _store_path(self.directory, relpath)
+        with open(path, "rb") as fh:
+            blob = fh.read()
+        magic, mode, is_base, digest, count, parent_len = HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise StoreError(f"{path}: bad magic {magic!r}")
+        pos = HEADER.size
+        frames = [FRAME.unpack_from(blob, pos + i * FRAME.size) for i in range(count)]
+        pos += count * FRAME.size
+        parent = None if is_base else blob[pos:pos + parent_len].decode("utf-8")
+        pos += parent_len
+        return _Version(mode, digest, frames, parent, memoryview(blob)[pos:])
+
+    def data(self, relpath: str) -> bytes:
+        """Decoded payload (payload mode) or original bytes (stored mode)."""
+        return self._data(relpath, None)
+
+    def _data(self, relpath: str, version: Optional[_Version]) -> bytes:
+        # ``version`` is relpath's record when the caller has already read it.
+        cached = self._cache.get(relpath)
+        if cached is not None:
+            self._cache.move_to_end(relpath)
+            return cached
+        chain: List[Tuple[str, _Version]] = []
+        rel: Optional[str] = relpath
+        while rel is not None and rel not in self._cache:
+            if version is None:
+                version = self._read(rel)
+            chain.append((rel, version))
+            rel, version = version.parent, None
+        data = self._cache[rel] if rel is not None else None
+        for rel, version in reversed(chain):
+            if version.parent is None:
+                data = self._plain.decompress(version.body)
+            else:
+                dictionary = _raw_dict(self._zstd, data)
+                data = self._zstd.ZstdDecompressor(dict_data=dictionary).decompress(version.body)
+            self._remember(rel, data)
+        return data
+
+    def _remember(self, relpath: str, data: bytes) -> None:
+        self._cache[relpath] = data
+        self._cache.move_to_end(relpath)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def restore(self, relpath: str, codec: Optional[PayloadCodec] = None) -> bytes:
+        """The original .toe bytes of one version, checked against its digest."""
+        version = self._read(relpath)
+        data = self._data(relpath, version)
+        if version.mode == MODE_PAYLOAD:
+            data = encode_toe(data, version.frames, codec or get_codec())
+        if content_digest(data) != version.digest:
+            raise StoreError(f"{relpath}: restored bytes do not match the original")
+        return data
+
+
+def report(
+    root: "os.PathLike[str] | str",
+    store: "os.PathLike[str] | str",
+    relpaths: Optional[Iterable[str]] = None,
+) -> Dict:
+    """Space saved and cold-cache reconstruction latency for every version."""
+    ds = DeltaStore(store)
+    root = os.fspath(root)
+    relpaths = list(relpaths) if relpaths is not None else ds.paths()
+    latencies = []
+    original = stored = 0
+    for rel in relpaths:
+        original += os.path.getsize(os.path.join(root, *rel.split("/")))
+        stored += os.path.getsize(_store_path(ds.directory, rel))
+        ds.clear_cache()
+        start = time.perf_counter()
+        ds.restore(rel)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return {
+        "versions": len(latencies),
+        "original_bytes": original,
+        "store_bytes": stored,
+        "saved_bytes": original - stored,
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+    }
@@ -0,0 +1,201 @@
+"""Structural diff between two versions of a sketch.
+
+Each operator gets a leaf hash over the raw bytes of its own members
+(``.n``, ``.parm``, ``.text``, ...), and each COMP a Merkle hash over its
+leaf and its children's hashes.  Hashing needs no parsing.  The diff walks
+both trees from the root and skips any subtree whose hash matches, so only
+operators whose leaf hash changed are parsed and compared.  Comparing two
+large versions therefore costs O(changed) once both trees are hashed.
+
+Members that belong to no operator (``.build`` and the like) change on every
+save and are left out of the hashes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .archive import iter_archive
+from .expand import load_members
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable
+from .network import parse_node, parse_parms
+
+ROOT = "/"
+TEXT_SUFFIX = ".text"
+_DIGEST_SIZE = 16
+
+
+class Change(NamedTuple):
+    kind: str  # added, removed, type, param, wire, text, node
+    path: str
+    key: Optional[str] = None  # parameter name or input slot
+    old: Optional[str] = None
+    new: Optional[str] = None
+
+    def __str__(self) -> str:
+        where = f"{self.path} {self.key}" if self.key is not None else self.path
+        if self.kind in ("added", "removed", "node"):
+            return f"{self.kind:<8}{where}"
+        return f"{self.kind:<8}{where}: {self.old!r} -> {self.new!r}"
+
+
+class DiffStats(NamedTuple):
+    operators: int  # operators in the larger of the two versions
+    visited: int  # operators whose subtree hash had to be looked at
+    compared: int  # operators that were parsed and compared
+
+
+class MerkleTree:
+    """Per-operator leaf hashes and per-COMP subtree hashes of one version."""
+
+    def __init__(self, members: MemberTable):
+        self.members = members
+        self.own: Dict[str, List[str]] = {}  # operator -> its member names
+        for name in members:
+            stem, dot, _ = name.rpartition(".")
+            if dot and stem:
+                self.own.setdefault("/" + stem, []).append(name)
+        self.own = {
+            path: names for path, names in self.own.items()
+            if path[1:] + NODE_SUFFIX in names
+        }
+        self.children: Dict[str, List[str]] = {ROOT: []}
+        for path in self.own:
+            self.children.setdefault(path, [])
+        for path in self.own:
+            parent = posixpath.dirname(path)
+            self.children.setdefault(parent, []).append(path)
+        for kids in self.children.values():
+            kids.sort()
+
+        self.leaf: Dict[str, bytes] = {}
+        self.tree: Dict[str, bytes] = {}
+        # Deepest first, so every child is hashed before its parent.
+        order = sorted(self.children, key=lambda p: p.count("/") if p != ROOT else 0)
+        for path in reversed(order):
+            self.tree[path] = self._subtree_hash(path)
+
+    @classmethod
+    def open(cls, path: "os.PathLike[str] | str") -> "MerkleTree":
+        return cls(load_members(path))
+
+    def __len__(self) -> int:
+        return len(self.own)
+
+    def _leaf_hash(self, path: str) -> bytes:
+        h = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+        for name in sorted(self.own.get(path, ())):
+            data = self.members.get(name)
+            h.update(name.rpartition(".")[2].encode())
+            h.update(len(data).to_bytes(8, "big"))
+            h.update(data)
+        digest = h.digest()
+        self.leaf[path] = digest
+        return digest
+
+    def _subtree_hash(self, path: str) -> bytes:
+        h = hashlib.blake2b(self._leaf_hash(path), digest_size=_DIGEST_SIZE)
+        for child in self.children.get(path, ()):
+            h.update(posixpath.basename(child).encode())
+            h.update(b"\0")
+            h.update(self.tree[child])
+        return h.digest()
+
+    @property
+    def root_hash(self) -> str:
+        return self.tree[ROOT].hex()
+
+    def subtree_size(self, path: str) -> int:
+        """Operators at and below ``path``."""
+        count = 1 if path in self.own else 0
+        stack = list(self.children.get(path, ()))
+        while stack:
+            child = stack.pop()
+            count += child in self.own
+            stack.extend(self.children.get(child, ()))
+        return count
+
+    def text(self, path: str, suffix: str) -> Optional[str]:
+        name = path[1:] + suffix
+        return self.members.text(name) if name in self.members else None
+
+
+def _compare_operator(a: MerkleTree, b: MerkleTree, path: str) -> List[Change]:
+    changes = []
+    fam_a, type_a, in_a = parse_node(a.text(path, NODE_SUFFIX))
+    fam_b, type_b, in_b = parse_node(b.text(path, NODE_SUFFIX))
+    if (fam_a, type_a) != (fam_b, type_b):
+        changes.append(Change("type", path, None, f"{fam_a}:{type_a}", f"{fam_b}:{type_b}"))
+
+    parms_a = {n: v for n, _, v in parse_parms(a.text(path, PARM_SUFFIX) or "")}
+    parms_b = {n: v for n, _, v in parse_parms(b.text(path, PARM_SUFFIX) or "")}
+    for name in sorted(parms_a.keys() | parms_b.keys()):
+        old, new = parms_a.get(name), parms_b.get(name)
+        if old != new:
+            changes.append(Change("param", path, name, old, new))
+
+    wires_a, wires_b = dict(in_a), dict(in_b)
+    for slot in sorted(wires_a.keys() | wires_b.keys()):
+        old, new = wires_a.get(slot), wires_b.get(slot)
+        if old != new:
+            changes.append(Change("wire", path, str(slot), old, new))
+
+    text_a, text_b = a.text(path, TEXT_SUFFIX), b.text(path, TEXT_SUFFIX)
+    if text_a != text_b:
+        changes.append(Change("text", path, None, text_a, text_b))
+    if not changes:
+        # Position, flags, colour or some other member changed.
+        changes.append(Change("node", path))
+    return changes
+
+
+def diff_trees(a: MerkleTree, b: MerkleTree) -> Tuple[List[Change], DiffStats]:
+    """Changes from ``a`` to ``b``, skipping every subtree whose hash matches.
+
+    An added or removed COMP is reported once, not per descendant.
+    """
+    changes: List[Change] = []
+    visited = compared = 0
+    stack = [ROOT]
+    while stack:
+        path = stack.pop()
+        visited += 1
+        if a.tree[path] == b.tree[path]:
+            continue
+        if path in a.own and path in b.own and a.leaf[path] != b.leaf[path]:
+            compared += 1
+            changes.extend(_compare_operator(a, b, path))
+        kids_a = set(a.children.get(path, ()))
+        kids_b = set(b.children.get(path, ()))
+        changes.extend(Change("removed", p) for p in sorted(kids_a - kids_b))
+        changes.extend(Change("added", p) for p in sorted(kids_b - kids_a))
+        stack.extend(sorted(kids_a & kids_b, reverse=True))
+    return changes, DiffStats(max(len(a), len(b)), visited - 1, compared)
+
+
+def diff_files(
+    old: "os.PathLike[str] | str", new: "os.PathLike[str] | str"
+) -> Tuple[List[Change], DiffStats]:
+    return diff_trees(MerkleTree.open(old), MerkleTree.open(new))
+
+
+def lineage(root: "os.PathLike[str] | str", name: str) -> List[str]:
+    """Archive paths of every version of ``name`` (e.g. ``gridz.toe``), by day."""
+    return [e.path for e in iter_archive(root) if e.path.rsplit("/", 1)[-1] == name]
+
+
+def diff_lineage(
+    root: "os.PathLike[str] | str", name: str
+) -> Iterator[Tuple[str, str, List[Change], DiffStats]]:
+    """Diff consecutive versions of ``name``; each version is hashed once."""
+    root = os.fspath(root)
+    previous: Optional[Tuple[str, MerkleTree]] = None
+    for rel in lineage(root, name):
+        tree = MerkleTree.open(os.path.join(root, *rel.split("/")))
+        if previous is not None:
+            changes, stats = diff_trees(previous[1], tree)
+            yield previous[0], rel, changes, stats
+        previous = (rel, tree)
@@ -0,0 +1,19 @@
+"""Exception types shared across the archive tools."""
+
+from __future__ import annotations
+
+
+class ArchiveError(Exception):
+    """Base class for every error raised by :mod:`tdarchive`."""
+
+
+class ToeFormatError(ArchiveError, ValueError):
+    """A .toe container is truncated or does not have the expected layout."""
+
+
+class CodecUnavailableError(ArchiveError, RuntimeError):
+    """No payload codec is registered, so .toe payloads cannot be decoded."""
+
+
+class MissingDependencyError(ArchiveError, ImportError):
+    """An optional third-party package needed by this feature is not installed."""
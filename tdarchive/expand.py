@@ -0,0 +1,210 @@
+"""Expand a .toe into a text tree and collapse it back.
+
+The tree uses the same layout as TouchDesigner's ``toeexpand``::
+
+    gridz.toe.toc         member names, one per line, in payload order
+    gridz.toe.dir/...     one file per member
+    gridz.toe.frames      decoded size of each frame (multi-frame files only)
+
+Both directions stream.  Expansion writes each member out as soon as it has
+been decoded, and collapse feeds the member files back through the codec one
+at a time, so neither holds more than one member in memory.  An existing
+tree is only replaced when asked to (``force``).  With a deterministic codec
+the collapsed file is byte-identical to the original.
+
+:func:`load_members` accepts either a .toe or a ``.toc`` path, so tools built
+on members also work on trees written by the official ``toeexpand``.
+"""
+
+from __future__ import annotations
+
+import filecmp
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .archive import iter_archive
+from .codec import PayloadCodec, get_codec
+from .container import open_toe, write_container
+from .errors import ArchiveError, ToeFormatError
+from .members import MemberTable, decode_members, iter_members
+
+TOC_SUFFIX = ".toc"
+DIR_SUFFIX = ".dir"
+FRAMES_SUFFIX = ".frames"
+
+
+class TreeExistsError(ArchiveError, FileExistsError):
+    """An expanded tree is already there and replacing it was not requested."""
+
+
+def _tree_paths(toc_path: str) -> Tuple[str, str]:
+    if not toc_path.endswith(TOC_SUFFIX):
+        raise ValueError(f"{toc_path}: expected a {TOC_SUFFIX} file")
+    base = toc_path[: -len(TOC_SUFFIX)]
+    return base, base + DIR_SUFFIX
+
+
+def _member_path(directory: str, name: str) -> str:
+    parts = name.split("/")
+    if not name or name.startswith("/") or ".." in parts:
+        raise ToeFormatError(f"unsafe member name {name!r}")
+    return os.path.join(directory, *parts)
+
+
+def read_toc(toc_path: str) -> List[str]:
+    with open(toc_path, encoding="utf-8") as fh:
+        return [line.rstrip("\n") for line in fh if line.strip()]
+
+
+def expand(
+    toe_path: "os.PathLike[str] | str",
+    out_dir: Optional["os.PathLike[str] | str"] = None,
+    codec: Optional[PayloadCodec] = None,
+    force: bool = False,
+) -> str:
+    """Expand ``toe_path`` and return the path of the written ``.toc``.
+
+    Raises :class:`TreeExistsError` if the tree exists, unless ``force``.
+    """
+    toe_path = os.fspath(toe_path)
+    out_dir = os.fspath(out_dir) if out_dir is not None else os.path.dirname(toe_path)
+    codec = codec or get_codec()
+    base = os.path.join(out_dir, os.path.basename(toe_path))
+    directory = base + DIR_SUFFIX
+    if os.path.lexists(directory) or os.path.lexists(base + TOC_SUFFIX):
+        if not force:
+            raise TreeExistsError(f"{base}{TOC_SUFFIX} already exists (--force replaces it)")
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+    with open_toe(toe_path) as toe:
+        frame_sizes = [frame.raw_size for frame in toe.frames]
+
+    names = []
+    made = set()
+    for name, data in iter_members(toe_path, codec):
+        target = _member_path(directory, name)
+        parent = os.path.dirname(target)
+        if parent not in made:
+            os.makedirs(parent, exist_ok=True)
+            made.add(parent)
+        with open(target, "wb") as fh:
+            fh.write(data)
+        names.append(name)
+    with open(base + TOC_SUFFIX, "w", encoding="utf-8", newline="\n") as fh:
+        fh.writelines(name + "\n" for name in names)
+    frames_path = base + FRAMES_SUFFIX
+    if len(frame_sizes) > 1:
+        with open(frames_path, "w", encoding="ascii") as fh:
+            fh.writelines(f"{size}\n" for size in frame_sizes)
+    elif os.path.exists(frames_path):
+        os.unlink(frames_path)
+    return base + TOC_SUFFIX
+
+
+def read_expanded(toc_path: "os.PathLike[str] | str") -> MemberTable:
+    """Load an expanded tree into one buffer, indexed like a decoded payload."""
+    toc_path = os.fspath(toc_path)
+    _, directory = _tree_paths(toc_path)
+    names = read_toc(toc_path)
+    paths = [_member_path(directory, name) for name in names]
+    sizes = [os.path.getsize(p) for p in paths]
+    buffer = bytearray(sum(sizes))
+    view = memoryview(buffer)
+    spans = []
+    pos = 0
+    for name, path, size in zip(names, paths, sizes):
+        with open(path, "rb", buffering=0) as fh:
+            got = fh.readinto(view[pos:pos + size])
+        if got != size:
+            raise ToeFormatError(f"{path} changed while reading")
+        spans.append((name, pos, pos + size))
+        pos += size
+    return MemberTable(buffer, spans)
+
+
+def load_members(
+    path: "os.PathLike[str] | str", codec: Optional[PayloadCodec] = None
+) -> MemberTable:
+    """Members of a .toe or of an expanded tree given by its ``.toc``."""
+    path = os.fspath(path)
+    if path.endswith(TOC_SUFFIX):
+        return read_expanded(path)
+    return decode_members(path, codec)
+
+
+def _iter_member_files(directory: str, names: Sequence[str]) -> Iterator[Tuple[str, bytes]]:
+    for name in names:
+        with open(_member_path(directory, name), "rb") as fh:
+            yield name, fh.read()
+
+
+def collapse(
+    toc_path: "os.PathLike[str] | str",
+    out_path: Optional["os.PathLike[str] | str"] = None,
+    codec: Optional[PayloadCodec] = None,
+) -> str:
+    """Rebuild a .toe from an expanded tree and return its path."""
+    toc_path = os.fspath(toc_path)
+    base, directory = _tree_paths(toc_path)
+    out_path = os.fspath(out_path) if out_path is not None else base
+    codec = codec or get_codec()
+    names = read_toc(toc_path)
+
+    frames_path = base + FRAMES_SUFFIX
+    if os.path.exists(frames_path):
+        with open(frames_path, encoding="ascii") as fh:
+            sizes = [int(line) for line in fh if line.strip()]
+    else:
+        sizes = []
+
+    plain = codec.join_members(_iter_member_files(directory, names))
+    tmp = out_path + ".collapse-tmp"
+    try:
+        with open(tmp, "wb") as out:
+            write_container(out, plain, sizes, codec)
+        os.replace(tmp, out_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return out_path
+
+
+def benchmark(
+    root: "os.PathLike[str] | str" = ".", codec: Optional[PayloadCodec] = None
+) -> Dict:
+    """Expand and collapse every archive .toe, checking byte identity.
+
+    Throughput is reported against the decoded payload size.
+    """
+    codec = codec or get_codec()
+    entries = [e for e in iter_archive(root) if e.kind == "toe"]
+    expand_s = collapse_s = 0.0
+    raw_total = 0
+    mismatched = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, entry in enumerate(entries):
+            source = entry.abspath(root)
+            with open_toe(source) as toe:
+                raw_total += toe.raw_size
+            work = os.path.join(tmp, str(i))
+            os.mkdir(work)
+            start = time.perf_counter()
+            toc = expand(source, work, codec)
+            expand_s += time.perf_counter() - start
+            rebuilt = os.path.join(work, "rebuilt.toe")
+            start = time.perf_counter()
+            collapse(toc, rebuilt, codec)
+            collapse_s += time.perf_counter() - start
+            if not filecmp.cmp(source, rebuilt, shallow=False):
+                mismatched.append(entry.path)
+            shutil.rmtree(work)
+    return {
+        "files": len(entries),
+        "raw_bytes": raw_total,
+        "expand_mb_per_s": raw_total / expand_s / 1e6 if expand_s else 0.0,
+        "collapse_mb_per_s": raw_total / collapse_s / 1e6 if collapse_s else 0.0,
+        "mismatched": mismatched,
+    }
@@ -0,0 +1,147 @@
+"""Persistent manifest index so re-scans only decode what changed.
+
+The index maps each archive path to its size, mtime, BLAKE2b digest and the
+manifest record last computed for it.  A re-scan trusts ``(size, mtime)``
+first.  If either changed it re-hashes the file, and only files whose digest
+is new get decoded again.  Sketches copied forward unchanged into a new day
+reuse the record of their twin, because records are also looked up by
+digest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .archive import ArchiveEntry, iter_archive
+from .codec import has_codec
+from .sweep import sweep
+
+INDEX_VERSION = 1
+DEFAULT_INDEX = ".tdarchive-index.json"
+DIGEST_SIZE = 16
+_READ_SIZE = 1 << 20
+
+
+class ScanStats(NamedTuple):
+    unchanged: int
+    rehashed: int
+    decoded: int  # files actually decoded or parsed, not just described from headers
+    removed: int
+
+
+def blake2_file(path: "os.PathLike[str] | str") -> str:
+    """Hex BLAKE2b digest of a file, read through one reusable buffer."""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    buf = bytearray(_READ_SIZE)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as fh:
+        while True:
+            n = fh.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def load_index(path: "os.PathLike[str] | str") -> Dict[str, Dict]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return {}
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return data["files"]
+
+
+def save_index(path: "os.PathLike[str] | str", files: Dict[str, Dict]) -> None:
+    """Write the index atomically next to its final location."""
+    path = os.fspath(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"version": INDEX_VERSION, "files": files}, fh,
+                      separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _stale(record: Dict) -> bool:
+    # Records written before a codec was available are worth redoing once
+    # one is installed.
+    return record["kind"] == "toe" and not record["decoded"] and has_codec()
+
+
+def update_index(
+    root: "os.PathLike[str] | str" = ".",
+    index_path: Optional["os.PathLike[str] | str"] = None,
+    executor: str = "process",
+    workers: Optional[int] = None,
+) -> Tuple[List[Dict], ScanStats]:
+    """Bring the index up to date and return the full manifest."""
+    root = os.fspath(root)
+    index_path = index_path or os.path.join(root, DEFAULT_INDEX)
+    old = load_index(index_path)
+    by_digest = {
+        item["blake2b"]: item["record"]
+        for item in old.values()
+        if not _stale(item["record"]) and "error" not in item["record"]
+    }
+
+    new: Dict[str, Dict] = {}
+    pending: Dict[str, Tuple[ArchiveEntry, str]] = {}
+    pending_digests = set()
+    twins: List[Tuple[ArchiveEntry, str]] = []
+    unchanged = rehashed = 0
+    for entry in iter_archive(root):
+        item = old.get(entry.path)
+        if (
+            item is not None
+            and item["size"] == entry.size
+            and item["mtime_ns"] == entry.mtime_ns
+            and not _stale(item["record"])
+        ):
+            new[entry.path] = item
+            unchanged += 1
+            continue
+        digest = blake2_file(entry.abspath(root))
+        rehashed += 1
+        if digest in by_digest:
+            new[entry.path] = _item(entry, digest, by_digest[digest])
+        elif digest in pending_digests:
+            twins.append((entry, digest))
+        else:
+            pending[entry.path] = (entry, digest)
+            pending_digests.add(digest)
+
+    decoded = 0
+    if pending:
+        entries = [entry for entry, _ in pending.values()]
+        for record in sweep(root, executor, workers, entries):
+            entry, digest = pending[record["path"]]
+            new[entry.path] = _item(entry, digest, record)
+            by_digest[digest] = record
+            decoded += bool(record["decoded"])
+    for entry, digest in twins:
+        new[entry.path] = _item(entry, digest, by_digest[digest])
+
+    save_index(index_path, new)
+    records = [new[path]["record"] for path in sorted(new)]
+    removed = len(old.keys() - new.keys())
+    return records, ScanStats(unchanged, rehashed, decoded, removed)
+
+
+def _item(entry: ArchiveEntry, digest: str, record: Dict) -> Dict:
+    record = dict(record, path=entry.path, day=entry.day, blake2b=digest)
+    return {
+        "size": entry.size,
+        "mtime_ns": entry.mtime_ns,
+        "blake2b": digest,
+        "record": record,
+    }
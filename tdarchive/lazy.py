@@ -0,0 +1,85 @@
+"""Load one COMP of a large .toe without parsing the rest of the network.
+
+The payload is decoded once into a single buffer and indexed by member name
+only.  :meth:`LazyNetwork.subtree` then parses the members of the requested
+COMP, everything below it and its ancestors.  All other members stay as byte
+ranges in the shared buffer until a caller asks for them.
+"""
+
+from __future__ import annotations
+
+import os
+import posixpath
+from typing import Dict, List, Optional, Tuple
+
+from .codec import PayloadCodec
+from .expand import load_members
+from .members import NODE_SUFFIX, MemberTable
+from .network import Network
+
+
+def ancestors(path: str) -> List[str]:
+    """``/a/b/c`` -> ``["/a", "/a/b"]``."""
+    out = []
+    parent = posixpath.dirname(path)
+    while parent not in ("/", ""):
+        out.append(parent)
+        parent = posixpath.dirname(parent)
+    return out[::-1]
+
+
+class LazyNetwork:
+    """A decoded payload whose operators are parsed per COMP on demand."""
+
+    def __init__(self, members: MemberTable):
+        self.members = members
+        self._cache: Dict[str, Network] = {}
+        self._touched: set = set()
+
+    @classmethod
+    def open(
+        cls, path: "os.PathLike[str] | str", codec: Optional[PayloadCodec] = None
+    ) -> "LazyNetwork":
+        return cls(load_members(path, codec))
+
+    def operator_paths(self) -> List[str]:
+        """Every operator path, taken from member names without parsing."""
+        return ["/" + n[: -len(NODE_SUFFIX)] for n in self.members
+                if n.endswith(NODE_SUFFIX)]
+
+    def subtree(self, comp: str) -> Network:
+        """Materialize ``comp``, its descendants and its ancestors.
+
+        Wires that come from outside the loaded operators are dropped.
+        """
+        comp = posixpath.normpath("/" + comp.strip("/"))
+        net = self._cache.get(comp)
+        if net is not None:
+            return net
+        keep = set(ancestors(comp))
+        keep.add(comp)
+        prefix = comp.rstrip("/") + "/"
+
+        def include(path: str) -> bool:
+            return path in keep or path.startswith(prefix)
+
+        net = Network.from_members(self.members, None if comp == "/" else include)
+        if comp != "/" and comp not in net:
+            raise KeyError(comp)
+        self._touched.update(net.paths)
+        self._cache[comp] = net
+        return net
+
+    def full(self) -> Network:
+        """Materialize the whole network."""
+        return self.subtree("/")
+
+    def pending_ranges(self) -> List[Tuple[str, int, int]]:
+        """Members of operators no subtree has touched yet, as byte ranges."""
+        out = []
+        for name in self.members:
+            stem = name.rsplit(".", 1)[0]
+            if "/" + stem not in self._touched:
+                start, end = self.members.span(name)
+                out.append((name, start, end))
+        return out
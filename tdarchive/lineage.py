@@ -0,0 +1,214 @@
+"""Group sketches into version chains by content, whatever their names.
+
+Each .toe becomes a set of features, and a MinHash signature estimates the
+Jaccard similarity of any two sets.  Locality-sensitive hashing over bands
+of the signature proposes candidate pairs in near-linear time, and pairs
+whose estimated similarity clears the threshold are merged with union-find.
+Each cluster, ordered by day, is one lineage.
+
+Features come from the decoded network when a codec (or an expanded
+``.toc`` tree) is available: operator types by path, parameter values and
+wires.  Without one, the fallback is the set of 8-byte cipher blocks of the
+stored payload.  Those only match between byte-identical copies, because any
+edit changes the compressed stream from that point on.  Renamed sketches
+(``mose.toe`` / ``mouse.toe``, ``lbe-bg.toe`` / ``lbe-background.toe``) are
+only linked when the network can be read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+from .archive import iter_archive
+from .codec import has_codec
+from .container import BLOCK_SIZE, open_toe
+from .expand import load_members
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable
+from .network import parse_node, parse_parms
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+NUM_PERM = 128
+BANDS = 32
+DEFAULT_THRESHOLD = 0.4
+_MASK64 = (1 << 64) - 1
+_PERM_CHUNK = 16  # permutations hashed per pass, bounding the temporary matrix
+_FEATURE_CHUNK = 1 << 16
+
+
+def network_features(members: MemberTable) -> Set[str]:
+    """Operators, parameter values and wires of one decoded file."""
+    out = set()
+    for name in members:
+        if not name.endswith(NODE_SUFFIX):
+            continue
+        stem = name[: -len(NODE_SUFFIX)]
+        family, optype, inputs = parse_node(members.text(name))
+        out.add(f"op {stem} {family}:{optype}")
+        for slot, source in inputs:
+            out.add(f"wire {posixpath.join(posixpath.dirname(stem), source)} {stem} {slot}")
+        parm = stem + PARM_SUFFIX
+        if parm in members:
+            for key, _, value in parse_parms(members.text(parm)):
+                out.add(f"parm {stem} {key}={value}")
+    return out
+
+
+def block_features(path: "os.PathLike[str] | str") -> Set[bytes]:
+    """The distinct 8-byte cipher blocks of every stored frame."""
+    out: Set[bytes] = set()
+    with open_toe(path) as toe:
+        for frame in range(len(toe.frames)):
+            data = bytes(toe.stored(frame))
+            out.update(data[i:i + BLOCK_SIZE] for i in range(0, len(data), BLOCK_SIZE))
+    return out
+
+
+def _hash64(feature) -> int:
+    data = feature.encode("utf-8", "surrogateescape") if isinstance(feature, str) else feature
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _permutations(num_perm: int) -> Tuple[List[int], List[int]]:
+    seed = hashlib.blake2b(b"tdarchive-minhash", digest_size=64).digest()
+    a, b = [], []
+    for i in range(num_perm):
+        word = hashlib.blake2b(seed + i.to_bytes(4, "big"), digest_size=16).digest()
+        a.append(int.from_bytes(word[:8], "little") | 1)
+        b.append(int.from_bytes(word[8:], "little"))
+    return a, b
+
+
+class MinHasher:
+    """MinHash signatures with multiply-add-shift hashing modulo 2**64."""
+
+    def __init__(self, num_perm: int = NUM_PERM):
+        self.num_perm = num_perm
+        self._a, self._b = _permutations(num_perm)
+
+    def signature(self, features: Iterable) -> Tuple[int, ...]:
+        hashes = [_hash64(f) for f in features]
+        if not hashes:
+            return (_MASK64,) * self.num_perm
+        if np is not None:
+            x = np.array(hashes, dtype=np.uint64)
+            a = np.array(self._a, dtype=np.uint64)[:, None]
+            b = np.array(self._b, dtype=np.uint64)[:, None]
+            out = np.full(self.num_perm, _MASK64, dtype=np.uint64)
+            # Running minimum over small blocks: at most 16 x 65536 hashes at once.
+            for p in range(0, self.num_perm, _PERM_CHUNK):
+                rows = slice(p, p + _PERM_CHUNK)
+                for f in range(0, len(x), _FEATURE_CHUNK):
+                    block = a[rows] * x[f:f + _FEATURE_CHUNK] + b[rows]
+                    np.minimum(out[rows], block.min(axis=1), out=out[rows])
+            return tuple(int(v) for v in out)
+        return tuple(
+            min((a * x + b) & _MASK64 for x in hashes)
+            for a, b in zip(self._a, self._b)
+        )
+
+
+def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+class Lineage(NamedTuple):
+    name: str  # most common file name in the chain
+    paths: List[str]  # ordered by day, then path
+
+
+def cluster(
+    signatures: Dict[str, Sequence[int]],
+    bands: int = BANDS,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[List[str]]:
+    """Clusters of paths whose signatures collide in a band and clear ``threshold``."""
+    paths = sorted(signatures)
+    if not paths:
+        return []
+    rows = len(signatures[paths[0]]) // bands
+    uf = _UnionFind(len(paths))
+    for band in range(bands):
+        buckets: Dict[Tuple[int, ...], List[int]] = {}
+        lo = band * rows
+        for i, path in enumerate(paths):
+            buckets.setdefault(tuple(signatures[path][lo:lo + rows]), []).append(i)
+        for members in buckets.values():
+            # Every pair in the bucket is a candidate, not only pairs with
+            # its first member, which may be the one unlike the rest.
+            for k, one in enumerate(members):
+                for other in members[k + 1:]:
+                    if uf.find(one) == uf.find(other):
+                        continue
+                    if similarity(signatures[paths[one]], signatures[paths[other]]) >= threshold:
+                        uf.union(one, other)
+    groups: Dict[int, List[str]] = {}
+    for i, path in enumerate(paths):
+        groups.setdefault(uf.find(i), []).append(path)
+    return list(groups.values())
+
+
+def detect(
+    root: "os.PathLike[str] | str" = ".",
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = NUM_PERM,
+    bands: int = BANDS,
+) -> List[Lineage]:
+    """Cluster every .toe under ``root`` into lineages, longest first."""
+    root = os.fspath(root)
+    hasher = MinHasher(num_perm)
+    decode = has_codec()
+    signatures = {}
+    for entry in iter_archive(root):
+        if entry.kind != "toe":
+            continue
+        source = entry.abspath(root)
+        if decode:
+            features = network_features(load_members(source))
+        else:
+            features = block_features(source)
+        signatures[entry.path] = hasher.signature(features)
+    lineages = []
+    for paths in cluster(signatures, bands, threshold):
+        paths.sort(key=lambda p: (p.split("/", 1)[0], p))
+        names = Counter(p.rsplit("/", 1)[-1] for p in paths)
+        lineages.append(Lineage(names.most_common(1)[0][0], paths))
+    lineages.sort(key=lambda l: (-len(l.paths), l.paths[0]))
+    return lineages
+
+
+def as_groups(lineages: Iterable[Lineage]) -> Dict[str, List[str]]:
+    """Lineages keyed for :func:`tdarchive.deltastore.pack`; names are made unique."""
+    out: Dict[str, List[str]] = {}
+    for lineage in lineages:
+        key = lineage.name
+        n = 1
+        while key in out:
+            n += 1
+            key = f"{lineage.name}#{n}"
+        out[key] = lineage.paths
+    return out
@@ -0,0 +1,128 @@
+"""Metadata-only listing of the archive.
+
+:func:`read_metadata` never decodes a whole sketch.  The frame headers give
+the stored and decoded sizes.  With a codec installed, the first frame is
+decoded chunk by chunk, and only until the ``.build`` member (TouchDesigner
+version and save time) has been seen and a decoded-byte budget is spent.
+Top-level COMPs come from the ``.n`` members that fit in that prefix.  When
+the budget runs out before the end of the payload, ``complete`` is false and
+the COMP list may be missing some names.
+
+Without a codec the listing falls back to the container headers and the
+file's mtime.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .archive import iter_archive
+from .codec import PayloadCodec, get_codec, has_codec
+from .container import open_toe
+from .members import NODE_SUFFIX, complete_members
+
+BUILD_MEMBER = ".build"
+DEFAULT_BUDGET = 256 * 1024
+_CHUNK_SIZE = 16 * 1024
+
+
+class Listing(NamedTuple):
+    path: str
+    day: str
+    size: int
+    frames: int
+    raw_size: int
+    build: Optional[str]  # e.g. "099 2021.12000"
+    saved: str  # .build time if decoded, otherwise the file mtime (UTC)
+    top_level: Tuple[str, ...]
+    complete: bool  # True when the whole member list was read
+
+
+def parse_build(text: str) -> Dict[str, str]:
+    """``key value`` lines of a ``.build`` member."""
+    out = {}
+    for line in text.splitlines():
+        key, _, value = line.strip().partition(" ")
+        if key:
+            out[key] = value.strip()
+    return out
+
+
+def _scan_prefix(
+    toe, codec: PayloadCodec, budget: int
+) -> Tuple[Optional[Dict[str, str]], List[str], bool]:
+    """Decode frame 0 until the budget is spent and ``.build`` was seen."""
+    buf = bytearray()
+    check_at = budget
+    for chunk in toe.iter_decoded(0, _CHUNK_SIZE, codec):
+        buf += chunk
+        if len(buf) >= check_at:
+            top, build = _summarize(codec, buf)
+            if build is not None:
+                return build, top, False
+            # Re-split only after the prefix doubles to keep this linear.
+            check_at = 2 * len(buf)
+    top, build = _summarize(codec, buf)
+    return build, top, len(toe.frames) == 1
+
+
+def _summarize(codec: PayloadCodec, buf) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    view = memoryview(buf)
+    top = []
+    build = None
+    for name, start, end in complete_members(codec, view):
+        if name == BUILD_MEMBER:
+            build = parse_build(str(view[start:end], "utf-8", "replace"))
+        elif name.endswith(NODE_SUFFIX) and "/" not in name:
+            if bytes(view[start:start + 5]) == b"COMP:":
+                top.append(name[: -len(NODE_SUFFIX)])
+    return top, build
+
+
+def read_metadata(
+    root: "os.PathLike[str] | str",
+    relpath: str,
+    codec: Optional[PayloadCodec] = None,
+    budget: int = DEFAULT_BUDGET,
+) -> Listing:
+    path = os.path.join(os.fspath(root), *relpath.split("/"))
+    st = os.stat(path)
+    saved = datetime.fromtimestamp(st.st_mtime, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    build = None
+    top: List[str] = []
+    complete = False
+    with open_toe(path) as toe:
+        frames, raw = len(toe.frames), toe.raw_size
+        if codec is not None:
+            info, top, complete = _scan_prefix(toe, codec, budget)
+            if info is not None:
+                build = " ".join(filter(None, (info.get("version"), info.get("build"))))
+                saved = info.get("time") or saved
+    return Listing(
+        relpath, relpath.split("/", 1)[0], st.st_size, frames, raw,
+        build or None, saved, tuple(top), complete,
+    )
+
+
+def list_archive(
+    root: "os.PathLike[str] | str" = ".",
+    codec: Optional[PayloadCodec] = None,
+    budget: int = DEFAULT_BUDGET,
+    decode: bool = True,
+) -> List[Listing]:
+    """One :class:`Listing` per .toe, decoding only payload prefixes.
+
+    The active codec is used when ``codec`` is omitted and one is installed.
+    With ``decode`` false nothing is decoded, even if a codec is available.
+    """
+    if not decode:
+        codec = None
+    elif codec is None and has_codec():
+        codec = get_codec()
+    return [
+        read_metadata(root, e.path, codec, budget)
+        for e in iter_archive(root)
+        if e.kind == "toe"
+    ]
@@ -0,0 +1,160 @@
+"""Named members of a decoded .toe payload.
+
+Member names follow the ``toeexpand`` layout: ``project1.n`` describes the
+``/project1`` COMP, ``project1/noise1.parm`` holds the parameters of
+``/project1/noise1`` and so on.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .codec import PayloadCodec, get_codec
+from .container import open_toe
+from .errors import ToeFormatError
+
+NODE_SUFFIX = ".n"
+PARM_SUFFIX = ".parm"
+
+# Parameter values that point at files outside the .toe.
+REFERENCE_EXTENSIONS = frozenset(
+    """
+    jpg jpeg png tif tiff exr hdr tga bmp gif dds psd
+    mov mp4 m4v avi webm mkv mpg
+    wav mp3 aif aiff flac ogg
+    obj fbx abc usd usda usdc usdz gltf glb dae 3ds bgeo tdc
+    tox toe csv tsv json xml txt glsl frag vert py
+    """.split()
+)
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+
+
+class MemberTable:
+    """Member spans over one decoded payload buffer."""
+
+    __slots__ = ("buffer", "names", "_spans", "_index")
+
+    def __init__(self, buffer, spans: Iterable[Tuple[str, int, int]]):
+        self.buffer = memoryview(buffer)
+        self.names: List[str] = []
+        self._spans: List[Tuple[int, int]] = []
+        for name, start, end in spans:
+            self.names.append(name)
+            self._spans.append((start, end))
+        self._index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def span(self, name: str) -> Tuple[int, int]:
+        return self._spans[self._index[name]]
+
+    def get(self, name: str) -> memoryview:
+        start, end = self.span(name)
+        return self.buffer[start:end]
+
+    def text(self, name: str) -> str:
+        return str(self.get(name), "utf-8", "surrogateescape")
+
+    def items(self) -> Iterator[Tuple[str, memoryview]]:
+        for name, (start, end) in zip(self.names, self._spans):
+            yield name, self.buffer[start:end]
+
+
+def decode_members(
+    path: "os.PathLike[str] | str", codec: Optional[PayloadCodec] = None
+) -> MemberTable:
+    """Decode a .toe and index its members."""
+    codec = codec or get_codec()
+    with open_toe(path) as toe:
+        payload = toe.read_decoded(codec)
+    return MemberTable(payload, codec.split_members(payload))
+
+
+def complete_members(codec: PayloadCodec, buf) -> Iterator[Tuple[str, int, int]]:
+    """Members of a decoded prefix that lie wholly inside it."""
+    try:
+        for name, start, end in codec.split_members(buf):
+            if end > len(buf):
+                return
+            yield name, start, end
+    except (ValueError, IndexError, struct.error):
+        # Codecs report truncated input as a parse error; whatever was
+        # yielded before that is still valid.
+        return
+
+
+def iter_members(
+    path: "os.PathLike[str] | str", codec: Optional[PayloadCodec] = None
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(name, data)`` while decoding, holding only the member in progress.
+
+    Each member's record is taken to start where the previous member's data
+    ends, as in every payload written by :meth:`PayloadCodec.join_members`.
+    """
+    codec = codec or get_codec()
+    buf = bytearray()
+    check_at = 0
+    with open_toe(path) as toe:
+        for chunk in toe.iter_decoded(codec=codec):
+            buf += chunk
+            if len(buf) < check_at:
+                continue
+            view = memoryview(buf)
+            spans = list(complete_members(codec, view))
+            view.release()
+            for name, start, end in spans:
+                yield name, bytes(buf[start:end])
+            if spans:
+                del buf[:spans[-1][2]]
+                check_at = 0
+            else:
+                # Re-split only after the buffer doubles to keep this linear.
+                check_at = 2 * len(buf)
+        if buf:
+            view = memoryview(buf)
+            spans = list(complete_members(codec, view))
+            view.release()
+            for name, start, end in spans:
+                yield name, bytes(buf[start:end])
+            if not spans or spans[-1][2] != len(buf):
+                raise ToeFormatError(f"{toe.path}: payload ends inside a member")
+
+
+def operator_paths(members: MemberTable) -> List[str]:
+    """Absolute operator paths, one per ``.n`` member."""
+    return [
+        "/" + name[: -len(NODE_SUFFIX)]
+        for name in members
+        if name.endswith(NODE_SUFFIX)
+    ]
+
+
+def is_reference(value: str) -> bool:
+    _, ext = os.path.splitext(value)
+    return ext[1:].lower() in REFERENCE_EXTENSIONS
+
+
+def parm_values(line: str) -> List[str]:
+    """Value tokens of one ``.parm`` line (name and mode dropped)."""
+    return [plain or quoted for quoted, plain in _TOKEN.findall(line)][2:]
+
+
+def external_references(members: MemberTable) -> List[str]:
+    """Sorted, de-duplicated file names referenced from parameter values."""
+    found = set()
+    for name, data in members.items():
+        if not name.endswith(PARM_SUFFIX):
+            continue
+        for line in str(data, "utf-8", "surrogateescape").splitlines():
+            found.update(v for v in parm_values(line) if is_reference(v))
+    return sorted(found)
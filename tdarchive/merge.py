@@ -0,0 +1,303 @@
+"""Three-way structural merge of .toe files, usable as a git merge driver.
+
+The base, ours and theirs payloads are decoded and merged member by member:
+
+* a member changed on one side only takes that side;
+* a ``.parm`` changed on both sides is merged per parameter;
+* a ``.n`` changed on both sides is merged per line (type, ``tile``,
+  ``flags``, ...) and its ``inputs`` per slot;
+* anything else changed differently on both sides is a conflict.
+
+Every step is a dict lookup per member, parameter or slot, so a merge is
+linear in the size of the three networks.  On a conflict the result keeps
+"ours" for that member and the conflict is reported.  A member deleted on
+one side and changed on the other keeps "ours" for every member of its
+operator, so a ``.text`` never survives without its ``.n``.
+
+The result is written with the codec and keeps the frame layout of "ours":
+each frame boundary stays after the same member.  If "ours" splits a
+member across frames, or a frame would end up empty, the merge fails with
+:class:`MergeLayoutError` and leaves "ours" untouched, so git keeps the
+conflict::
+
+    # .gitattributes
+    *.toe merge=tdarchive
+
+    git config merge.tdarchive.driver "python -m tdarchive merge %O %A %B %P"
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .codec import PayloadCodec, get_codec
+from .container import open_toe, write_container
+from .errors import ArchiveError
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable, decode_members
+
+
+class MergeLayoutError(ArchiveError):
+    """The merged members cannot be framed the way "ours" is."""
+
+
+DELETE_MODIFY = "deleted on one side, changed on the other"
+
+
+class Conflict(NamedTuple):
+    member: str
+    key: Optional[str]  # parameter name or input slot; None for the whole member
+    reason: str
+
+    def __str__(self) -> str:
+        where = f"{self.member} {self.key}" if self.key is not None else self.member
+        return f"{where}: {self.reason}"
+
+
+def _pick(base, ours, theirs):
+    """Three-way choice for one value; returns ``(value, conflicted)``.
+
+    ``None`` stands for "absent".
+    """
+    if ours == theirs:
+        return ours, False
+    if ours == base:
+        return theirs, False
+    if theirs == base:
+        return ours, False
+    return ours, True
+
+
+def _keyed_lines(text: str, key_of) -> Tuple[List[str], Dict[str, str]]:
+    """Split lines into an ordered key list and key -> line mapping."""
+    order, lines = [], {}
+    for i, line in enumerate(text.splitlines()):
+        key = key_of(line)
+        if key is None or key in lines:
+            key = f"\0{i}"  # unkeyed lines keep their position
+        order.append(key)
+        lines[key] = line
+    return order, lines
+
+
+def _merge_ordered(
+    base: Dict[str, str], ours: Tuple[List[str], Dict[str, str]],
+    theirs: Tuple[List[str], Dict[str, str]], member: str, conflicts: List[Conflict],
+) -> List[str]:
+    """Merge keyed lines; output follows our order with their additions after."""
+    order_o, ours_map = ours
+    order_t, theirs_map = theirs
+    out = []
+    for key in order_o + [k for k in order_t if k not in ours_map]:
+        value, conflicted = _pick(base.get(key), ours_map.get(key), theirs_map.get(key))
+        if conflicted:
+            conflicts.append(Conflict(member, key.lstrip("\0"), "changed on both sides"))
+        if value is not None:
+            out.append(value)
+    return out
+
+
+def _parm_key(line: str) -> Optional[str]:
+    head = line.split(None, 2)
+    if len(head) >= 2 and head[1].lstrip("-").isdigit():
+        return head[0]
+    return None
+
+
+def merge_parm(base: str, ours: str, theirs: str, member: str,
+               conflicts: List[Conflict]) -> str:
+    _, base_map = _keyed_lines(base, _parm_key)
+    lines = _merge_ordered(
+        base_map, _keyed_lines(ours, _parm_key), _keyed_lines(theirs, _parm_key),
+        member, conflicts,
+    )
+    return "".join(line + "\n" for line in lines)
+
+
+def _node_key(line: str) -> Optional[str]:
+    head = line.split(None, 1)
+    if not head:
+        return None
+    return "\0type" if ":" in head[0] else head[0]  # "TOP:noise" names the type
+
+
+def _split_node(text: str) -> Tuple[List[str], Optional[str], List[str], Dict[str, str]]:
+    """``(lines outside inputs, key after inputs, slot order, slot -> line)`` of a ``.n``."""
+    outside, order, slots = [], [], {}
+    follower: Optional[str] = None
+    in_block = False
+    lines = iter(text.splitlines())
+    for line in lines:
+        if line.strip() != "inputs":
+            if in_block and follower is None:
+                follower = _node_key(line)
+            outside.append(line)
+            continue
+        in_block = True
+        for line in lines:
+            stripped = line.strip()
+            if stripped == "{":
+                continue
+            if stripped == "}":
+                break
+            slot = stripped.partition(" ")[0]
+            order.append(slot)
+            slots[slot] = line
+    return outside, follower, order, slots
+
+
+def merge_node(base: str, ours: str, theirs: str, member: str,
+               conflicts: List[Conflict]) -> str:
+    """Merge a ``.n`` member per line key (type, ``tile``, ``flags``, ...) and per input slot."""
+    out_b, _, _, slots_b = _split_node(base)
+    out_o, follow_o, order_o, slots_o = _split_node(ours)
+    out_t, follow_t, order_t, slots_t = _split_node(theirs)
+    _, base_map = _keyed_lines("\n".join(out_b), _node_key)
+    outside = _merge_ordered(
+        base_map, _keyed_lines("\n".join(out_o), _node_key),
+        _keyed_lines("\n".join(out_t), _node_key), member, conflicts,
+    )
+    wires = _merge_ordered(slots_b, (order_o, slots_o), (order_t, slots_t), member, conflicts)
+    wires.sort(key=lambda line: line.strip().partition(" ")[0].zfill(8))
+
+    # The inputs block goes back in front of the line it preceded, else before "end".
+    block = ["inputs", "{", *wires, "}"] if wires else []
+    keys = [_node_key(line) for line in outside]
+    for follower in (follow_o, follow_t, "end"):
+        if follower in keys:
+            at = keys.index(follower)
+            break
+    else:
+        at = len(outside)
+    result = outside[:at] + block + outside[at:]
+    return "".join(line + "\n" for line in result)
+
+
+def _merge_member(name: str, base, ours, theirs, conflicts: List[Conflict]):
+    value, conflicted = _pick(base, ours, theirs)
+    if not conflicted:
+        return value
+    if None in (base, ours, theirs):
+        conflicts.append(Conflict(name, None, DELETE_MODIFY))
+        return ours
+    texts = [str(v, "utf-8", "surrogateescape") for v in (base, ours, theirs)]
+    if name.endswith(PARM_SUFFIX):
+        merged = merge_parm(*texts, name, conflicts)
+    elif name.endswith(NODE_SUFFIX):
+        merged = merge_node(*texts, name, conflicts)
+    else:
+        conflicts.append(Conflict(name, None, "changed on both sides"))
+        return ours
+    return merged.encode("utf-8", "surrogateescape")
+
+
+def _order(ours: Sequence[str], theirs: Sequence[str]) -> List[str]:
+    """Our member order, with names only they have placed after their predecessor."""
+    known = set(ours)
+    after: Dict[Optional[str], List[str]] = {}
+    anchor: Optional[str] = None
+    for name in theirs:
+        if name in known:
+            anchor = name
+        else:
+            after.setdefault(anchor, []).append(name)
+    out = list(after.get(None, ()))
+    for name in ours:
+        out.append(name)
+        out.extend(after.get(name, ()))
+    return out
+
+
+def merge_members(
+    base: MemberTable, ours: MemberTable, theirs: MemberTable
+) -> Tuple[List[Tuple[str, bytes]], List[Conflict]]:
+    conflicts: List[Conflict] = []
+    values = {}
+    for name in _order(ours.names, theirs.names):
+        values[name] = _merge_member(
+            name,
+            bytes(base.get(name)) if name in base else None,
+            bytes(ours.get(name)) if name in ours else None,
+            bytes(theirs.get(name)) if name in theirs else None,
+            conflicts,
+        )
+    # A delete/modify conflict keeps "ours" for the whole operator, so its
+    # .n, .parm and other members are never split between the two sides.
+    kept = {_stem(c.member) for c in conflicts if c.reason == DELETE_MODIFY}
+    merged = []
+    for name, value in values.items():
+        if _stem(name) in kept:
+            value = bytes(ours.get(name)) if name in ours else None
+        if value is not None:
+            merged.append((name, value))
+    return merged, conflicts
+
+
+def _stem(name: str) -> str:
+    """Operator path of a member (``project1/text1`` for ``project1/text1.text``)."""
+    return name.rpartition(".")[0] or name
+
+
+def _frame_sizes(
+    ours: MemberTable, sizes: Sequence[int], payload: bytes, codec: PayloadCodec
+) -> List[int]:
+    """Decoded frame sizes that cut ``payload`` after the same members as ``ours``."""
+    ends = {ours.span(name)[1]: name for name in ours.names}
+    cut_after = []
+    for boundary in itertools.accumulate(sizes[:-1]):
+        if boundary not in ends:
+            raise MergeLayoutError(
+                f"frame boundary at byte {boundary} of ours falls inside a member"
+            )
+        cut_after.append(ends[boundary])
+
+    merged_ends = {name: end for name, _, end in codec.split_members(payload)}
+    anchor: Dict[str, Optional[str]] = {}
+    survivor: Optional[str] = None
+    for name in ours.names:  # a removed member hands its boundary to the one before it
+        if name in merged_ends:
+            survivor = name
+        anchor[name] = survivor
+    cuts = [0]
+    for name in cut_after:
+        cut = merged_ends[anchor[name]] if anchor[name] is not None else 0
+        if cut <= cuts[-1]:
+            raise MergeLayoutError(f"frame {len(cuts)} of ours would be empty after the merge")
+        cuts.append(cut)
+    if len(payload) <= cuts[-1]:
+        raise MergeLayoutError(f"frame {len(cuts)} of ours would be empty after the merge")
+    cuts.append(len(payload))
+    return [b - a for a, b in zip(cuts, cuts[1:])]
+
+
+def merge_files(
+    base: "os.PathLike[str] | str",
+    ours: "os.PathLike[str] | str",
+    theirs: "os.PathLike[str] | str",
+    out: "os.PathLike[str] | str",
+    codec: Optional[PayloadCodec] = None,
+) -> List[Conflict]:
+    """Merge three .toe files into ``out`` and return the conflicts.
+
+    ``out`` may be the same path as ``ours``, as git expects.  Raises
+    :class:`MergeLayoutError`, before writing anything, when the result
+    cannot keep the frame layout of ``ours``.
+    """
+    codec = codec or get_codec()
+    tables = [decode_members(p, codec) for p in (base, ours, theirs)]
+    members, conflicts = merge_members(*tables)
+    with open_toe(ours) as toe:
+        sizes = [frame.raw_size for frame in toe.frames]
+    payload = b"".join(codec.join_members(members))
+    sizes = _frame_sizes(tables[1], sizes, payload, codec) if len(sizes) > 1 else []
+
+    tmp = os.fspath(out) + ".merge-tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            write_container(fh, [payload], sizes, codec)
+        os.replace(tmp, out)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return conflicts
@@ -0,0 +1,194 @@
+"""Merkle manifest of the archive and parallel verification against it.
+
+Every tracked file (``.toe``, ``.tdc``, ``.obj`` under the dated folders) is
+hashed with BLAKE2b.  Each directory hashes the sorted names, sizes and
+hashes of its entries, and the archive root hash covers everything.  Two
+copies of the archive match exactly when their root hashes do.  When they
+don't, following the first differing child from the root finds the
+smallest subtree that holds a difference, without looking at the rest.
+
+Verification rehashes files on a thread pool.  BLAKE2b releases the GIL, and
+each worker reads through one fixed buffer, so memory stays bounded by the
+worker count whatever the file sizes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .archive import iter_archive
+from .errors import ArchiveError
+from .index import blake2_file
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST = "archive.merkle.json"
+
+
+class ManifestError(ArchiveError, ValueError):
+    """A Merkle manifest is unreadable or its root hash does not match its files."""
+
+
+class Difference(NamedTuple):
+    path: str
+    reason: str  # missing, extra, size, content
+
+    def __str__(self) -> str:
+        return f"{self.reason:<8}{self.path}"
+
+
+class MerkleManifest:
+    """File hashes plus the directory hashes derived from them."""
+
+    def __init__(self, files: Dict[str, Tuple[int, str]]):
+        self.files = files  # path -> (size, blake2b)
+        self.children: Dict[str, List[str]] = {"": []}
+        self.hashes: Dict[str, str] = {}
+        for path in sorted(files):
+            node = path
+            while node:
+                parent = posixpath.dirname(node)
+                kids = self.children.setdefault(parent, [])
+                if node in self.hashes:
+                    break
+                kids.append(node)
+                self.hashes[node] = ""
+                node = parent
+        for kids in self.children.values():
+            kids.sort()
+        for node in sorted(self.children, key=lambda p: p.count("/") if p else -1,
+                           reverse=True):
+            self.hashes[node] = self._dir_hash(node)
+        for path, (_, digest) in files.items():
+            self.hashes[path] = digest
+
+    def _dir_hash(self, node: str) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for child in self.children[node]:
+            if child in self.files:
+                size, digest = self.files[child]
+                entry = f"f {posixpath.basename(child)} {size} {digest}\n"
+            else:
+                entry = f"d {posixpath.basename(child)} {self.hashes[child]}\n"
+            h.update(entry.encode("utf-8", "surrogateescape"))
+        return h.hexdigest()
+
+    @property
+    def root(self) -> str:
+        return self.hashes[""]
+
+    def save(self, path: "os.PathLike[str] | str") -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "root": self.root,
+            "files": {p: list(v) for p, v in sorted(self.files.items())},
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=0, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: "os.PathLike[str] | str") -> "MerkleManifest":
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except OSError as exc:
+            raise ManifestError(f"{path}: {exc.strerror or exc}") from None
+        except ValueError as exc:
+            raise ManifestError(f"{path}: not a JSON manifest ({exc})") from None
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            version = data.get("version") if isinstance(data, dict) else None
+            raise ManifestError(f"{path}: manifest version {version}")
+        try:
+            manifest = cls({p: (v[0], v[1]) for p, v in data["files"].items()})
+            root = data["root"]
+        except (KeyError, TypeError, IndexError, AttributeError) as exc:
+            raise ManifestError(f"{path}: malformed manifest ({exc!r})") from None
+        if manifest.root != root:
+            raise ManifestError(f"{path}: root hash does not match the file list")
+        return manifest
+
+
+def hash_files(
+    root: "os.PathLike[str] | str", paths: Iterable[str], workers: Optional[int] = None
+) -> Dict[str, Tuple[int, str]]:
+    """``path -> (size, blake2b)`` for archive-relative ``paths``, in parallel."""
+    root = os.fspath(root)
+    paths = list(paths)
+
+    def one(rel: str) -> Tuple[int, str]:
+        full = os.path.join(root, *rel.split("/"))
+        return os.path.getsize(full), blake2_file(full)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(paths, pool.map(one, paths)))
+
+
+def build(root: "os.PathLike[str] | str" = ".", workers: Optional[int] = None) -> MerkleManifest:
+    return MerkleManifest(hash_files(root, (e.path for e in iter_archive(root)), workers))
+
+
+def first_difference(a: MerkleManifest, b: MerkleManifest) -> Optional[str]:
+    """The deepest subtree on the first path where ``a`` and ``b`` differ.
+
+    Only the differing branch is walked.  ``None`` means the roots match.
+    """
+    if a.root == b.root:
+        return None
+    node = ""
+    while True:
+        kids_a, kids_b = a.children.get(node), b.children.get(node)
+        if kids_a is None or kids_b is None:
+            return node or "/"
+        for child in sorted(set(kids_a) | set(kids_b)):
+            if a.hashes.get(child) != b.hashes.get(child):
+                break
+        else:
+            return node or "/"
+        if child not in a.hashes or child not in b.hashes or child in a.files:
+            return child
+        node = child
+
+
+def differences(expected: MerkleManifest, actual: MerkleManifest) -> List[Difference]:
+    """Every file that is missing, extra or different, walking only changed subtrees."""
+    out = []
+    stack = [""]
+    while stack:
+        node = stack.pop()
+        if expected.hashes.get(node) == actual.hashes.get(node):
+            continue
+        kids_e = set(expected.children.get(node, ()))
+        kids_a = set(actual.children.get(node, ()))
+        for child in sorted(kids_e | kids_a, reverse=True):
+            if child not in kids_a:
+                out.append(Difference(child, "missing"))
+            elif child not in kids_e:
+                out.append(Difference(child, "extra"))
+            elif child in expected.files and child in actual.files:
+                size_e, digest_e = expected.files[child]
+                size_a, digest_a = actual.files[child]
+                if size_e != size_a:
+                    out.append(Difference(child, "size"))
+                elif digest_e != digest_a:
+                    out.append(Difference(child, "content"))
+            else:
+                stack.append(child)
+    return sorted(out)
+
+
+def verify(
+    root: "os.PathLike[str] | str",
+    manifest: MerkleManifest,
+    workers: Optional[int] = None,
+) -> Tuple[Optional[str], List[Difference]]:
+    """Rehash ``root`` and compare it with ``manifest``.
+
+    Returns the first differing subtree (``None`` if everything matches) and
+    the full list of differences.
+    """
+    actual = build(root, workers)
+    return first_difference(manifest, actual), differences(manifest, actual)
@@ -0,0 +1,338 @@
+"""Compact operator graph for a decoded .toe network.
+
+Operators live in parallel arrays indexed by a dense operator id.  Parameters
+and wires are stored CSR style: one offsets array per relation plus a flat
+array of targets, so a network costs a few arrays rather than a dict per
+operator.  Operator types, parameter names and values are interned, which
+lets many versions of the same sketch share their strings.
+
+:class:`Operator` is a two-slot view over one row; creating one does not copy
+anything out of the arrays.
+"""
+
+from __future__ import annotations
+
+import os
+import posixpath
+import sys
+import tracemalloc
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .expand import load_members
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable, parm_values
+
+FAMILIES = ("TOP", "CHOP", "SOP", "DAT", "COMP", "MAT", "POP")
+FAMILY_CODES = {name: code for code, name in enumerate(FAMILIES)}
+UNKNOWN_FAMILY = 255
+
+_intern = sys.intern
+
+
+def parse_node(text: str) -> Tuple[str, str, List[Tuple[int, str]]]:
+    """Return ``(family, type, inputs)`` from a ``.n`` member.
+
+    ``inputs`` lists ``(slot, source)`` pairs; sources are relative to the
+    operator's parent COMP.
+    """
+    lines = text.splitlines()
+    family, _, optype = lines[0].strip().partition(":") if lines else ("", "", "")
+    inputs = []
+    it = iter(lines[1:])
+    for line in it:
+        if line.strip() != "inputs":
+            continue
+        for line in it:
+            line = line.strip()
+            if line == "{":
+                continue
+            if line == "}":
+                break
+            slot, _, source = line.partition(" ")
+            source = source.strip()
+            if slot.isdigit() and source:
+                inputs.append((int(slot), source))
+        break
+    return family, optype, inputs
+
+
+def parse_parms(text: str) -> Iterator[Tuple[str, int, str]]:
+    """Yield ``(name, mode, value)`` for each line of a ``.parm`` member.
+
+    Multi-token values are joined with single spaces.
+    """
+    for line in text.splitlines():
+        head = line.split(None, 2)
+        if len(head) < 2 or not head[1].lstrip("-").isdigit():
+            continue
+        yield head[0], int(head[1]), " ".join(parm_values(line))
+
+
+def _csr(count: int, pairs: Sequence[Tuple[int, int]]) -> Tuple[array, array]:
+    """Offsets and targets for ``pairs`` grouped by their first element."""
+    offsets = array("I", bytes(4 * (count + 1)))
+    for src, _ in pairs:
+        offsets[src + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    targets = array("i", bytes(4 * len(pairs)))
+    fill = array("I", offsets[:-1])
+    for src, dst in pairs:
+        targets[fill[src]] = dst
+        fill[src] += 1
+    return offsets, targets
+
+
+class Operator:
+    """Lightweight view of one operator in a :class:`Network`."""
+
+    __slots__ = ("network", "index")
+
+    def __init__(self, network: "Network", index: int):
+        self.network = network
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"<Operator {self.path} {self.family}:{self.type}>"
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Operator)
+            and other.network is self.network
+            and other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.network), self.index))
+
+    @property
+    def path(self) -> str:
+        return self.network.paths[self.index]
+
+    @property
+    def name(self) -> str:
+        return posixpath.basename(self.path)
+
+    @property
+    def family(self) -> str:
+        code = self.network.families[self.index]
+        return FAMILIES[code] if code != UNKNOWN_FAMILY else "?"
+
+    @property
+    def type(self) -> str:
+        return self.network.types[self.index]
+
+    @property
+    def parent(self) -> Optional["Operator"]:
+        p = self.network.parents[self.index]
+        return None if p < 0 else Operator(self.network, p)
+
+    @property
+    def params(self) -> Dict[str, str]:
+        net = self.network
+        lo, hi = net.param_offsets[self.index], net.param_offsets[self.index + 1]
+        return dict(zip(net.param_names[lo:hi], net.param_values[lo:hi]))
+
+    def inputs(self) -> List["Operator"]:
+        return [Operator(self.network, i) for i in self.network.inputs_of(self.index)]
+
+    def outputs(self) -> List["Operator"]:
+        return [Operator(self.network, i) for i in self.network.outputs_of(self.index)]
+
+    def children(self) -> List["Operator"]:
+        return [Operator(self.network, i) for i in self.network.children_of(self.index)]
+
+
+class Network:
+    """All operators of one decoded .toe, in flat arrays."""
+
+    __slots__ = (
+        "paths", "families", "types", "parents",
+        "param_offsets", "param_names", "param_modes", "param_values",
+        "wire_src", "wire_dst", "wire_slot",
+        "up_offsets", "up_ids", "down_offsets", "down_ids",
+        "child_offsets", "child_ids", "_by_path",
+    )
+
+    def __init__(self) -> None:
+        self.paths: List[str] = []
+        self.families = array("B")
+        self.types: List[str] = []
+        self.parents = array("i")
+        self.param_offsets = array("I", [0])
+        self.param_names: List[str] = []
+        self.param_modes = array("b")
+        self.param_values: List[str] = []
+        self.wire_src = array("i")
+        self.wire_dst = array("i")
+        self.wire_slot = array("H")
+        self._by_path: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __iter__(self) -> Iterator[Operator]:
+        return (Operator(self, i) for i in range(len(self.paths)))
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._by_path
+
+    def __repr__(self) -> str:
+        return f"<Network {len(self)} operators, {len(self.wire_src)} wires>"
+
+    def op(self, path: str) -> Operator:
+        return Operator(self, self._by_path[path])
+
+    def id_of(self, path: str) -> int:
+        return self._by_path[path]
+
+    # -- adjacency ---------------------------------------------------------
+
+    def inputs_of(self, index: int) -> array:
+        return self.up_ids[self.up_offsets[index]:self.up_offsets[index + 1]]
+
+    def outputs_of(self, index: int) -> array:
+        return self.down_ids[self.down_offsets[index]:self.down_offsets[index + 1]]
+
+    def children_of(self, index: int) -> array:
+        return self.child_ids[self.child_offsets[index]:self.child_offsets[index + 1]]
+
+    def _walk(self, start: int, offsets: array, ids: array,
+              depth: Optional[int]) -> List[int]:
+        seen = bytearray(len(self.paths))
+        seen[start] = 1
+        order = []
+        queue = deque([(start, 0)])
+        while queue:
+            node, d = queue.popleft()
+            if depth is not None and d >= depth:
+                continue
+            for nxt in ids[offsets[node]:offsets[node + 1]]:
+                if not seen[nxt]:
+                    seen[nxt] = 1
+                    order.append(nxt)
+                    queue.append((nxt, d + 1))
+        return order
+
+    def upstream(self, path: str, depth: Optional[int] = None) -> List[Operator]:
+        """Operators feeding ``path``, nearest first."""
+        ids = self._walk(self._by_path[path], self.up_offsets, self.up_ids, depth)
+        return [Operator(self, i) for i in ids]
+
+    def downstream(self, path: str, depth: Optional[int] = None) -> List[Operator]:
+        """Operators fed by ``path``, nearest first."""
+        ids = self._walk(self._by_path[path], self.down_offsets, self.down_ids, depth)
+        return [Operator(self, i) for i in ids]
+
+    # -- construction ------------------------------------------------------
+
+    def _add(self, path: str, family: str, optype: str) -> int:
+        index = len(self.paths)
+        self.paths.append(_intern(path))
+        self.families.append(FAMILY_CODES.get(family, UNKNOWN_FAMILY))
+        self.types.append(_intern(optype))
+        self._by_path[self.paths[index]] = index
+        return index
+
+    def _add_params(self, parms: Iterable[Tuple[str, int, str]]) -> None:
+        for name, mode, value in parms:
+            self.param_names.append(_intern(name))
+            self.param_modes.append(max(-128, min(127, mode)))
+            self.param_values.append(_intern(value))
+        self.param_offsets.append(len(self.param_names))
+
+    def _finish(self, wires: List[Tuple[int, int, int]]) -> None:
+        count = len(self.paths)
+        self.parents = array("i", [
+            self._by_path.get(posixpath.dirname(p), -1) for p in self.paths
+        ])
+        for src, dst, slot in sorted(wires, key=lambda w: (w[1], w[2])):
+            self.wire_src.append(src)
+            self.wire_dst.append(dst)
+            self.wire_slot.append(slot)
+        pairs = list(zip(self.wire_dst, self.wire_src))
+        self.up_offsets, self.up_ids = _csr(count, pairs)
+        self.down_offsets, self.down_ids = _csr(count, [(s, d) for d, s in pairs])
+        self.child_offsets, self.child_ids = _csr(
+            count, [(p, i) for i, p in enumerate(self.parents) if p >= 0]
+        )
+
+    @classmethod
+    def from_members(
+        cls, members: MemberTable, include: Optional[Callable[[str], bool]] = None
+    ) -> "Network":
+        """Build a network from ``members``.
+
+        ``include`` filters operators by path before their members are parsed;
+        wires from operators that were left out are dropped.
+        """
+        net = cls()
+        pending_inputs: List[Tuple[int, List[Tuple[int, str]]]] = []
+        for name in members:
+            if not name.endswith(NODE_SUFFIX):
+                continue
+            stem = name[: -len(NODE_SUFFIX)]
+            if include is not None and not include("/" + stem):
+                continue
+            family, optype, inputs = parse_node(members.text(name))
+            index = net._add("/" + stem, family, optype)
+            parm = stem + PARM_SUFFIX
+            net._add_params(parse_parms(members.text(parm)) if parm in members else ())
+            if inputs:
+                pending_inputs.append((index, inputs))
+        wires = []
+        for dst, inputs in pending_inputs:
+            base = posixpath.dirname(net.paths[dst])
+            for slot, source in inputs:
+                src = net._by_path.get(posixpath.normpath(posixpath.join(base, source)))
+                if src is not None:
+                    wires.append((src, dst, slot))
+        net._finish(wires)
+        return net
+
+    def nbytes(self) -> int:
+        """Approximate size of the arrays and lists owned by this network.
+
+        Interned strings are shared between networks and are not counted.
+        """
+        total = 0
+        for name in self.__slots__:
+            value = getattr(self, name, None)
+            if value is not None:
+                total += sys.getsizeof(value)
+        return total
+
+
+def load_network(path: "os.PathLike[str] | str") -> Network:
+    """Load a .toe, or an expanded tree by its ``.toc``, into a :class:`Network`."""
+    return Network.from_members(load_members(path))
+
+
+def memory_report(paths: Sequence["os.PathLike[str] | str"]) -> Dict[str, int]:
+    """Load every network in ``paths`` at once and measure what they hold.
+
+    ``retained`` is the traced heap still allocated with all networks alive;
+    ``peak`` includes the transient decode buffers.  Both are relative to the
+    heap at the call.  If tracemalloc was already running it is left running
+    (with its peak reset); otherwise it is stopped again.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        networks = [load_network(p) for p in paths]
+        retained, peak = tracemalloc.get_traced_memory()
+        retained, peak = retained - base, peak - base
+    finally:
+        if started:
+            tracemalloc.stop()
+    return {
+        "networks": len(networks),
+        "operators": sum(len(n) for n in networks),
+        "retained": retained,
+        "peak": peak,
+        "arrays": sum(n.nbytes() for n in networks),
+    }
@@ -0,0 +1,218 @@
+"""Single-file pack of a dated sketch folder and its dependencies.
+
+Layout::
+
+    members    one after another; each is raw or a single zstd frame
+    index      JSON list of members (name, method, offset, size, raw size, digest)
+    trailer    magic "TDPK", u8 version, u64 index offset, u32 index size
+
+The index sits at the end, like a zip central directory, so a pack is
+written in one sequential pass.  Opening one reads only the trailer and the
+index, and extracting a member reads only its byte range.  Raw members
+start on a page boundary, so :meth:`Pack.view` can memory-map them.  That is
+how import caches (``.tdc``) are stored, so readers such as
+:mod:`tdarchive.tdc` can work on them in place.  Other members are
+zstd-compressed when that helps, and kept raw otherwise.  Compression needs
+the optional ``zstandard`` package, and without it every member is raw.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .errors import ArchiveError, MissingDependencyError
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MAGIC = b"TDPK"
+PACK_VERSION = 1
+TRAILER = struct.Struct(">4sBQI")
+PACK_SUFFIX = ".tdpk"
+METHOD_RAW = 0
+METHOD_ZSTD = 1
+ALIGN = mmap.ALLOCATIONGRANULARITY
+MMAP_SUFFIXES = (".tdc",)
+DEFAULT_LEVEL = 19
+_MIN_GAIN = 0.95  # compressed members must be at most this fraction of raw
+
+
+class PackError(ArchiveError):
+    """A pack is truncated, has a bad index, lacks a member or a member fails its digest."""
+
+
+class PackMember(NamedTuple):
+    name: str
+    method: int
+    offset: int
+    size: int  # bytes in the pack
+    raw_size: int
+    blake2b: str
+
+
+def _digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _folder_files(folder: str) -> List[Tuple[str, str]]:
+    out = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for name in sorted(filenames):
+            full = os.path.join(dirpath, name)
+            out.append((os.path.relpath(full, folder).replace(os.sep, "/"), full))
+    return out
+
+
+def write_pack(
+    out_path: "os.PathLike[str] | str",
+    files: Iterable[Tuple[str, "os.PathLike[str] | str"]],
+    level: int = DEFAULT_LEVEL,
+    mmap_suffixes: Sequence[str] = MMAP_SUFFIXES,
+) -> List[PackMember]:
+    """Write ``(name, path)`` pairs into a pack and return its index."""
+    compressor = zstandard.ZstdCompressor(level=level) if zstandard is not None else None
+    members = []
+    with open(out_path, "wb") as fh:
+        for name, path in files:
+            with open(path, "rb") as src:
+                data = src.read()
+            method, body = METHOD_RAW, data
+            raw_only = name.lower().endswith(tuple(mmap_suffixes))
+            if compressor is not None and not raw_only:
+                packed = compressor.compress(data)
+                if len(packed) <= _MIN_GAIN * len(data):
+                    method, body = METHOD_ZSTD, packed
+            if method == METHOD_RAW:
+                fh.write(bytes(-fh.tell() % ALIGN))
+            offset = fh.tell()
+            fh.write(body)
+            members.append(
+                PackMember(name, method, offset, len(body), len(data), _digest(data))
+            )
+        index = json.dumps([m._asdict() for m in members], separators=(",", ":")).encode()
+        index_offset = fh.tell()
+        fh.write(index)
+        fh.write(TRAILER.pack(MAGIC, PACK_VERSION, index_offset, len(index)))
+    return members
+
+
+def pack_folder(
+    folder: "os.PathLike[str] | str",
+    out_path: Optional["os.PathLike[str] | str"] = None,
+    level: int = DEFAULT_LEVEL,
+) -> str:
+    """Pack every file below ``folder`` (e.g. ``2021-03-12``) into one file."""
+    folder = os.path.normpath(os.fspath(folder))
+    out_path = os.fspath(out_path) if out_path else folder + PACK_SUFFIX
+    write_pack(out_path, _folder_files(folder), level)
+    return out_path
+
+
+class Pack:
+    """Random access to a pack; only the trailer and index are read up front."""
+
+    def __init__(self, path: "os.PathLike[str] | str"):
+        self.path = os.fspath(path)
+        self._fh = open(self.path, "rb")
+        self._mm: Optional[mmap.mmap] = None
+        try:
+            self.members = self._read_index()
+        except BaseException:
+            self._fh.close()
+            raise
+        self._by_name: Dict[str, PackMember] = {m.name: m for m in self.members}
+
+    def _read_index(self) -> List[PackMember]:
+        size = os.fstat(self._fh.fileno()).st_size
+        if size < TRAILER.size:
+            raise PackError(f"{self.path}: too short for a pack")
+        self._fh.seek(size - TRAILER.size)
+        magic, version, offset, length = TRAILER.unpack(self._fh.read(TRAILER.size))
+        if magic != MAGIC or version != PACK_VERSION:
+            raise PackError(f"{self.path}: not a version {PACK_VERSION} pack")
+        if offset + length + TRAILER.size != size:
+            raise PackError(f"{self.path}: index does not end at the trailer")
+        self._fh.seek(offset)
+        try:
+            rows = json.loads(self._fh.read(length))
+            members = [PackMember(**row) for row in rows]
+        except (ValueError, TypeError) as exc:
+            raise PackError(f"{self.path}: bad index: {exc}") from None
+        for m in members:
+            if m.offset + m.size > offset:
+                raise PackError(f"{self.path}: member {m.name!r} overlaps the index")
+        return members
+
+    def __enter__(self) -> "Pack":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._by_name
+
+    def names(self) -> List[str]:
+        return [m.name for m in self.members]
+
+    def member(self, name: str) -> PackMember:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise PackError(f"{name!r} is not in {self.path}") from None
+
+    def read(self, name: str, verify: bool = True) -> bytes:
+        """The original bytes of one member, reading only its range."""
+        m = self.member(name)
+        self._fh.seek(m.offset)
+        body = self._fh.read(m.size)
+        if len(body) != m.size:
+            raise PackError(f"{self.path}: member {name!r} is truncated")
+        if m.method == METHOD_ZSTD:
+            if zstandard is None:
+                raise MissingDependencyError("this pack member needs the 'zstandard' package")
+            body = zstandard.ZstdDecompressor().decompress(body, max_output_size=m.raw_size)
+        elif m.method != METHOD_RAW:
+            raise PackError(f"{self.path}: member {name!r} has unknown method {m.method}")
+        if verify and _digest(body) != m.blake2b:
+            raise PackError(f"{self.path}: member {name!r} fails its digest")
+        return body
+
+    def view(self, name: str) -> memoryview:
+        """Zero-copy view of a raw member through a shared read-only mapping."""
+        m = self.member(name)
+        if m.method != METHOD_RAW:
+            raise PackError(f"{name!r} is compressed; use read()")
+        if self._mm is None:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mm)[m.offset:m.offset + m.size]
+
+    def extract(self, name: str, out_dir: "os.PathLike[str] | str") -> str:
+        if name.startswith("/") or ".." in name.split("/"):
+            raise PackError(f"unsafe member name {name!r}")
+        target = os.path.join(os.fspath(out_dir), *name.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as fh:
+            fh.write(self.read(name))
+        return target
+
+    def extract_all(self, out_dir: "os.PathLike[str] | str") -> List[str]:
+        return [self.extract(name, out_dir) for name in self.names()]
+
+    def close(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # A caller still holds a view; the mapping goes away with it.
+                pass
+            self._mm = None
+        self._fh.close()
@@ -0,0 +1,171 @@
+"""Find embedded binary data (locked operators, media) inside decoded .toe files.
+
+A member is *graph* if it describes network structure (``.n``, ``.parm``),
+*binary* if it holds non-text bytes such as locked operator data, and *text*
+otherwise (DAT contents and the like).  The split shows whether a large
+sketch is heavy because of its data or because of its graph.
+
+Binary members are deduplicated by BLAKE2b digest into a
+:class:`PayloadStore`.  It writes each distinct payload once and serves it
+back as a memory-mapped ``memoryview`` or NumPy array, with no copy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .errors import MissingDependencyError
+from .expand import load_members
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable
+
+GRAPH_SUFFIXES = (NODE_SUFFIX, PARM_SUFFIX)
+_SNIFF = 8192
+
+
+class Payload(NamedTuple):
+    source: str
+    member: str
+    offset: int
+    size: int
+    digest: str
+
+
+class FileSplit(NamedTuple):
+    source: str
+    graph_bytes: int
+    text_bytes: int
+    binary_bytes: int
+    payloads: List[Payload]
+
+
+def is_binary(data) -> bool:
+    head = bytes(data[:_SNIFF])
+    if b"\0" in head:
+        return True
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # A multi-byte character cut off by the sniff window is still text.
+        return exc.start < len(head) - 3
+    return False
+
+
+def classify(name: str, data) -> str:
+    if name.endswith(GRAPH_SUFFIXES):
+        return "graph"
+    return "binary" if is_binary(data) else "text"
+
+
+def split_members(source: str, members: MemberTable, min_size: int = 0) -> FileSplit:
+    sizes = {"graph": 0, "text": 0, "binary": 0}
+    found = []
+    for name, data in members.items():
+        kind = classify(name, data)
+        sizes[kind] += len(data)
+        if kind == "binary" and len(data) >= min_size:
+            start, _ = members.span(name)
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            found.append(Payload(source, name, start, len(data), digest))
+    return FileSplit(source, sizes["graph"], sizes["text"], sizes["binary"], found)
+
+
+class PayloadStore:
+    """Content-addressed directory of distinct payloads, read back via mmap."""
+
+    def __init__(self, directory: "os.PathLike[str] | str"):
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def __enter__(self) -> "PayloadStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + ".bin")
+
+    def __contains__(self, digest: object) -> bool:
+        return isinstance(digest, str) and os.path.exists(self.path(digest))
+
+    def add(self, digest: str, data) -> bool:
+        """Store ``data`` unless its digest is already present."""
+        if digest in self:
+            return False
+        target = self.path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, target)
+        return True
+
+    def view(self, digest: str) -> memoryview:
+        mm = self._maps.get(digest)
+        if mm is None:
+            with open(self.path(digest), "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[digest] = mm
+        return memoryview(mm)
+
+    def array(self, digest: str, dtype: str = "uint8"):
+        """A read-only NumPy array over the mapped payload."""
+        try:
+            import numpy as np
+        except ImportError:
+            raise MissingDependencyError("array views need the 'numpy' package") from None
+        return np.frombuffer(self.view(digest), dtype=dtype)
+
+    def close(self) -> None:
+        for mm in self._maps.values():
+            try:
+                mm.close()
+            except BufferError:
+                pass
+        self._maps.clear()
+
+
+class ExtractReport(NamedTuple):
+    files: List[FileSplit]
+    unique: int
+    unique_bytes: int
+    total_bytes: int
+
+    @property
+    def duplicate_bytes(self) -> int:
+        return self.total_bytes - self.unique_bytes
+
+    def duplicates(self) -> Dict[str, List[Payload]]:
+        """Digests seen more than once, with every place they occur."""
+        seen: Dict[str, List[Payload]] = {}
+        for split in self.files:
+            for payload in split.payloads:
+                seen.setdefault(payload.digest, []).append(payload)
+        return {d: hits for d, hits in seen.items() if len(hits) > 1}
+
+
+def extract(
+    paths: Sequence["os.PathLike[str] | str"],
+    store: Optional[PayloadStore] = None,
+    min_size: int = 0,
+) -> ExtractReport:
+    """Split every file into graph/text/binary bytes and dedup binary payloads."""
+    files = []
+    unique: Dict[str, int] = {}
+    total = 0
+    for path in paths:
+        source = os.fspath(path)
+        members = load_members(source)
+        split = split_members(source, members, min_size)
+        files.append(split)
+        for payload in split.payloads:
+            total += payload.size
+            if payload.digest not in unique:
+                unique[payload.digest] = payload.size
+                if store is not None:
+                    store.add(payload.digest, members.get(payload.member))
+    return ExtractReport(files, len(unique), sum(unique.values()), total)
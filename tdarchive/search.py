@@ -0,0 +1,290 @@
+"""Corpus-wide substring search over operators, parameters and DAT text.
+
+Every searchable string in the archive goes into one string table,
+de-duplicated across files, so a parameter value repeated in 100 versions of
+a sketch is indexed once.  Each distinct string is lower-cased and split into
+trigrams.  A trigram maps to a sorted posting list of string ids, and
+occurrences record where each string was seen (file, operator, parameter,
+field).
+
+A query intersects the posting lists of its own trigrams, shortest first,
+then confirms the few surviving candidates with a plain substring test.
+Queries shorter than three characters fall back to scanning the string
+table.
+
+Fields:
+
+``type``   ``FAMILY:type`` of an operator, e.g. ``TOP:feedback``
+``name``   operator name
+``param``  constant parameter value
+``expr``   parameter in any other mode (expression, export, bind)
+``text``   contents of a DAT's ``.text`` member
+
+The index is stored as a JSON header followed by the raw arrays, so loading
+it costs one read and no per-entry parsing.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import posixpath
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .archive import iter_archive
+from .errors import ArchiveError
+from .expand import load_members
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable
+from .network import parse_node, parse_parms
+
+MAGIC = b"TDSX"
+SEARCH_VERSION = 1
+DEFAULT_SEARCH_INDEX = ".tdarchive-search.bin"
+TEXT_SUFFIX = ".text"
+FIELDS = ("type", "name", "param", "expr", "text")
+FIELD_CODES = {name: code for code, name in enumerate(FIELDS)}
+_LENGTH = struct.Struct(">4sI")
+# Occurrence and posting arrays, in the order they follow the header.
+_ARRAYS = (
+    ("gram_offsets", "I"), ("postings", "I"),
+    ("occ_offsets", "I"), ("occ_file", "I"), ("occ_op", "I"),
+    ("occ_key", "i"), ("occ_field", "B"),
+)
+
+
+class SearchIndexError(ArchiveError):
+    """A search index file is damaged or was written by another version."""
+
+
+class Hit(NamedTuple):
+    path: str
+    operator: str
+    field: str
+    key: Optional[str]  # parameter name for param/expr hits
+    text: str
+
+    @property
+    def day(self) -> str:
+        return self.path.split("/", 1)[0]
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _entries(members: MemberTable) -> Iterable[Tuple[str, str, Optional[str], str]]:
+    """Yield ``(operator, field, key, text)`` for one decoded file."""
+    for name in members:
+        if not name.endswith(NODE_SUFFIX):
+            continue
+        stem = name[: -len(NODE_SUFFIX)]
+        op = "/" + stem
+        family, optype, _ = parse_node(members.text(name))
+        yield op, "type", None, f"{family}:{optype}"
+        yield op, "name", None, posixpath.basename(stem)
+        parm = stem + PARM_SUFFIX
+        if parm in members:
+            for key, mode, value in parse_parms(members.text(parm)):
+                if value:
+                    yield op, "param" if mode == 0 else "expr", key, value
+        text = stem + TEXT_SUFFIX
+        if text in members:
+            yield op, "text", None, members.text(text)
+
+
+class SearchIndex:
+    """In-memory trigram index; build with :func:`build` or :meth:`load`."""
+
+    def __init__(self) -> None:
+        self.files: List[str] = []
+        self.strings: List[str] = []  # searchable texts, then paths and keys
+        self.searchable = 0
+        self.grams: Dict[str, int] = {}
+        for name, code in _ARRAYS:
+            setattr(self, name, array(code))
+        self._lowered: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return self.searchable
+
+    # -- queries -----------------------------------------------------------
+
+    def _posting(self, gram: str) -> Optional[memoryview]:
+        g = self.grams.get(gram)
+        if g is None:
+            return None
+        return memoryview(self.postings)[self.gram_offsets[g]:self.gram_offsets[g + 1]]
+
+    def _lower(self, sid: int) -> str:
+        if self._lowered is not None:
+            return self._lowered[sid]
+        return self.strings[sid].lower()
+
+    def candidates(self, needle: str) -> List[int]:
+        """String ids that contain ``needle`` (case-insensitive)."""
+        needle = needle.lower()
+        if len(needle) < 3:
+            if self._lowered is None:
+                self._lowered = [s.lower() for s in self.strings[: self.searchable]]
+            return [i for i, s in enumerate(self._lowered) if needle in s]
+        lists = []
+        for gram in trigrams(needle):
+            posting = self._posting(gram)
+            if posting is None:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        found = set(lists[0])
+        for posting in lists[1:]:
+            found.intersection_update(posting)
+            if not found:
+                return []
+        return sorted(sid for sid in found if needle in self._lower(sid))
+
+    def search(
+        self, needle: str, fields: Optional[Sequence[str]] = None, limit: Optional[int] = None
+    ) -> List[Hit]:
+        """Every occurrence of ``needle``, ordered by file (and so by day)."""
+        codes = None if fields is None else {FIELD_CODES[f] for f in fields}
+        hits = []
+        for sid in self.candidates(needle):
+            for o in range(self.occ_offsets[sid], self.occ_offsets[sid + 1]):
+                field = self.occ_field[o]
+                if codes is not None and field not in codes:
+                    continue
+                key = self.occ_key[o]
+                hits.append(Hit(
+                    self.files[self.occ_file[o]],
+                    self.strings[self.occ_op[o]],
+                    FIELDS[field],
+                    self.strings[key] if key >= 0 else None,
+                    self.strings[sid],
+                ))
+        hits.sort(key=lambda h: (h.path, h.operator, h.field))
+        return hits[:limit] if limit is not None else hits
+
+    def first_use(self, needle: str, fields: Optional[Sequence[str]] = None) -> Optional[Hit]:
+        """The earliest hit by archive day."""
+        hits = self.search(needle, fields)
+        return hits[0] if hits else None
+
+    # -- construction ------------------------------------------------------
+
+    @classmethod
+    def from_entries(
+        cls, files: Iterable[Tuple[str, Iterable[Tuple[str, str, Optional[str], str]]]]
+    ) -> "SearchIndex":
+        """Build from ``(path, entries)`` pairs, as produced by :func:`_entries`."""
+        texts: Dict[str, int] = {}
+        labels: Dict[str, int] = {}
+        occurrences: List[Tuple[int, int, int, Optional[int], int]] = []
+        index = cls()
+        for path, entries in files:
+            file_id = len(index.files)
+            index.files.append(path)
+            for op, field, key, text in entries:
+                sid = texts.setdefault(text, len(texts))
+                op_id = labels.setdefault(op, len(labels))
+                key_id = labels.setdefault(key, len(labels)) if key is not None else None
+                occurrences.append((sid, file_id, op_id, key_id, FIELD_CODES[field]))
+
+        index.searchable = len(texts)
+        index.strings = list(texts) + list(labels)
+        base = len(texts)
+        occurrences.sort(key=lambda o: (o[0], o[1]))
+        index.occ_offsets = array("I", bytes(4 * (base + 1)))
+        for sid, file_id, op_id, key_id, field in occurrences:
+            index.occ_offsets[sid + 1] += 1
+            index.occ_file.append(file_id)
+            index.occ_op.append(base + op_id)
+            index.occ_key.append(base + key_id if key_id is not None else -1)
+            index.occ_field.append(field)
+        for i in range(base):
+            index.occ_offsets[i + 1] += index.occ_offsets[i]
+
+        posting: Dict[str, List[int]] = {}
+        for sid, text in enumerate(index.strings[:base]):
+            for gram in trigrams(text.lower()):
+                posting.setdefault(gram, []).append(sid)
+        index.gram_offsets.append(0)
+        for g, (gram, sids) in enumerate(sorted(posting.items())):
+            index.grams[gram] = g
+            index.postings.extend(sids)
+            index.gram_offsets.append(len(index.postings))
+        return index
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path: "os.PathLike[str] | str") -> None:
+        """Write the index atomically."""
+        path = os.fspath(path)
+        header = json.dumps({
+            "version": SEARCH_VERSION,
+            "byteorder": sys.byteorder,
+            "files": self.files,
+            "strings": self.strings,
+            "searchable": self.searchable,
+            "grams": sorted(self.grams, key=self.grams.__getitem__),
+            "lengths": [len(getattr(self, name)) for name, _ in _ARRAYS],
+        }, separators=(",", ":")).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_LENGTH.pack(MAGIC, len(header)))
+                fh.write(header)
+                for name, _ in _ARRAYS:
+                    getattr(self, name).tofile(fh)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: "os.PathLike[str] | str") -> "SearchIndex":
+        with open(path, "rb") as fh:
+            blob = fh.read()
+        if len(blob) < _LENGTH.size:
+            raise SearchIndexError(f"{path}: truncated search index")
+        magic, size = _LENGTH.unpack_from(blob)
+        if magic != MAGIC:
+            raise SearchIndexError(f"{path}: not a search index")
+        header = json.loads(blob[_LENGTH.size:_LENGTH.size + size])
+        if header.get("version") != SEARCH_VERSION:
+            raise SearchIndexError(f"{path}: search index version {header.get('version')}")
+        index = cls()
+        index.files = header["files"]
+        index.strings = header["strings"]
+        index.searchable = header["searchable"]
+        index.grams = {gram: i for i, gram in enumerate(header["grams"])}
+        pos = _LENGTH.size + size
+        for (name, code), length in zip(_ARRAYS, header["lengths"]):
+            values = array(code)
+            end = pos + length * values.itemsize
+            if end > len(blob):
+                raise SearchIndexError(f"{path}: truncated search index")
+            values.frombytes(blob[pos:end])
+            if header["byteorder"] != sys.byteorder:
+                values.byteswap()
+            setattr(index, name, values)
+            pos = end
+        return index
+
+
+def build(
+    root: "os.PathLike[str] | str" = ".", paths: Optional[Sequence[str]] = None
+) -> SearchIndex:
+    """Index every .toe below ``root``, or just ``paths`` (relative to it)."""
+    root = os.fspath(root)
+    if paths is None:
+        paths = [e.path for e in iter_archive(root) if e.kind == "toe"]
+
+    def files():
+        for rel in paths:
+            members = load_members(os.path.join(root, *rel.split("/")))
+            yield rel, _entries(members)
+
+    return SearchIndex.from_entries(files())
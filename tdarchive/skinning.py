@@ -0,0 +1,227 @@
+"""CPU linear-blend skinning driven by the capture attributes of a cache.
+
+``pCapt`` on each point holds up to five ``(region, weight)`` pairs, with
+region -1 for an unused slot.  Regions index ``pCaptPath``, and
+``pCaptData`` holds each region's inverse bind matrix.  A deformed point is
+
+    p' = sum_r  w_r * (world_r @ inverse_bind_r) @ p
+
+:func:`capture_weights` turns ``pCapt`` into a CSR ``(points, regions)``
+matrix.  :meth:`Skinner.deform` computes the ``(regions, 3, 4)`` skin
+matrices for a batch of frames.  It blends them per point with one sparse
+product over all frames in the batch, then applies the blended matrices to
+the rest positions.  The product uses ``scipy.sparse`` when it is
+installed; otherwise it makes one gather per influence slot.  Batches can
+be spread over a thread pool, since NumPy releases the GIL in the heavy
+steps.
+
+Regions that are not animated joints (``jaw``, ``mouth_l``, ``eyebrow_l``
+in the Sophia rig) follow the joint named by their COMP path (``head``)
+rigidly, keeping their bind offset to it.  Other regions stay at their bind
+pose.
+
+The archived caches store ``P`` scrambled (see :mod:`tdarchive.btog`), so
+rest positions are an argument: export them once from TouchDesigner (a
+SOP to CHOP or the FBX) and pass an ``(points, 3)`` array.
+
+:meth:`Skinner.bake_pc2` writes the baked frames as a PC2 point cache
+(``POINTCACHE2``), which Blender, Houdini, Maya and 3ds Max import, so a
+render node can bake a take headlessly and hand the file on.
+"""
+
+from __future__ import annotations
+
+import os
+import posixpath
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+from .clip import Clip, _require_numpy
+from .skeleton import CAPTURE_PATHS, Skeleton, capture_matrices
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - optional dependency
+    sparse = None
+
+CAPTURE = "pCapt"
+DEFAULT_BATCH = 32  # frames per sparse product; bounds the temporary arrays
+PC2_MAGIC = b"POINTCACHE2\0"
+PC2_HEADER = struct.Struct("<12siiffi")  # magic, version, points, start, step, samples
+
+
+class CaptureWeights(NamedTuple):
+    """Compressed sparse rows: point ``i`` uses ``indices[indptr[i]:indptr[i + 1]]``."""
+
+    indptr: "np.ndarray"
+    indices: "np.ndarray"
+    weights: "np.ndarray"
+    shape: Tuple[int, int]
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def dot(self, dense):
+        """``(points, columns)`` product with a ``(regions, columns)`` array."""
+        if sparse is not None:
+            matrix = sparse.csr_matrix((self.weights, self.indices, self.indptr), self.shape)
+            return matrix @ dense
+        # One pass per influence slot (at most five): gather, scale, add.
+        counts = np.diff(self.indptr)
+        out = np.zeros((self.shape[0], dense.shape[1]), dtype=np.result_type(dense, self.weights))
+        for k in range(int(counts.max()) if len(counts) else 0):
+            rows = np.flatnonzero(counts > k)
+            at = self.indptr[rows] + k
+            out[rows] += self.weights[at, None] * dense[self.indices[at]]
+        return out
+
+    def toarray(self):
+        dense = np.zeros(self.shape, dtype=self.weights.dtype)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.weights
+        return dense
+
+
+def capture_weights(geometry, normalize: bool = True) -> CaptureWeights:
+    """CSR weights from a geometry's ``pCapt`` attribute."""
+    _require_numpy()
+    pairs = np.asarray(geometry.point(CAPTURE), dtype=np.float64)
+    pairs = pairs.reshape(len(pairs), -1, 2)
+    regions = pairs[..., 0].astype(np.intp)
+    weights = pairs[..., 1]
+    used = (regions >= 0) & (weights != 0)
+    if normalize:
+        total = np.where(used, weights, 0).sum(axis=1, keepdims=True)
+        weights = np.divide(weights, total, out=np.zeros_like(weights), where=total != 0)
+    indptr = np.concatenate(([0], np.cumsum(used.sum(axis=1))))
+    count = len(geometry.strings(CAPTURE_PATHS))
+    return CaptureWeights(indptr, regions[used], weights[used].astype(np.float32),
+                          (len(pairs), count))
+
+
+def write_pc2(
+    path: "os.PathLike[str] | str",
+    positions,
+    start: float = 0.0,
+    step: float = 1.0,
+) -> None:
+    """Write ``(frames, points, 3)`` positions as a PC2 point cache.
+
+    ``start`` is the first frame number and ``step`` the frames between
+    samples.  The file is written next to ``path`` and moved into place.
+    """
+    _require_numpy()
+    positions = np.ascontiguousarray(positions, dtype="<f4")
+    if positions.ndim != 3 or positions.shape[2] != 3:
+        raise ValueError(f"positions must be (frames, points, 3), got {positions.shape}")
+    path = os.fspath(path)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(PC2_HEADER.pack(PC2_MAGIC, 1, positions.shape[1], start, step,
+                                     positions.shape[0]))
+            fh.write(memoryview(positions).cast("B"))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class Skinner:
+    """Deforms a captured mesh with world matrices from a :class:`Skeleton`."""
+
+    def __init__(self, skeleton: Skeleton, geometry, rest, normalize: bool = True):
+        _require_numpy()
+        self.skeleton = skeleton
+        self.weights = capture_weights(geometry, normalize)
+        self.rest = np.asarray(rest, dtype=np.float32)
+        if self.rest.shape != (self.weights.shape[0], 3):
+            raise ValueError(
+                f"rest positions must be ({self.weights.shape[0]}, 3), got {self.rest.shape}"
+            )
+        regions = list(geometry.strings(CAPTURE_PATHS))
+        self.inverse_bind = capture_matrices(geometry)
+        bind = np.linalg.inv(self.inverse_bind)
+        # Each region follows one joint: itself, or the joint its COMP path names.
+        self.driver = np.full(len(regions), -1, dtype=np.intp)
+        self.offset = np.broadcast_to(np.eye(4), (len(regions), 4, 4)).copy()
+        for r, region in enumerate(regions):
+            joint = skeleton.index.get(region)
+            if joint is None:
+                joint = skeleton.index.get(posixpath.dirname(region))
+                if joint is not None:
+                    owner = regions.index(skeleton.names[joint])
+                    self.offset[r] = self.inverse_bind[owner] @ bind[r]
+            if joint is not None:
+                self.driver[r] = joint
+        self._bind = bind
+
+    def skin_matrices(self, world):
+        """``(frames, regions, 3, 4)`` skin matrices from FK world matrices."""
+        frames = world.shape[0]
+        region_world = np.broadcast_to(self._bind, (frames,) + self._bind.shape).copy()
+        driven = self.driver >= 0
+        region_world[:, driven] = world[:, self.driver[driven]] @ self.offset[driven]
+        return (region_world @ self.inverse_bind)[..., :3, :].astype(np.float32)
+
+    def _deform_batch(self, world):
+        skin = self.skin_matrices(world)  # (frames, regions, 3, 4)
+        frames, regions = skin.shape[:2]
+        blended = self.weights.dot(np.moveaxis(skin, 0, 1).reshape(regions, -1))
+        blended = blended.reshape(-1, frames, 3, 4)  # (points, frames, 3, 4)
+        out = np.einsum("pfab,pb->fpa", blended[..., :3], self.rest)
+        out += np.moveaxis(blended[..., 3], 0, 1)
+        return out
+
+    def deform(
+        self,
+        world,
+        batch: int = DEFAULT_BATCH,
+        workers: Optional[int] = None,
+    ):
+        """``(frames, points, 3)`` float32 positions for ``(frames, joints, 4, 4)`` world matrices.
+
+        Frames are processed ``batch`` at a time.  With ``workers`` above 1,
+        batches run on a thread pool of that size.
+        """
+        if batch < 1:
+            raise ValueError(f"batch must be at least 1 frame, got {batch}")
+        world = np.asarray(world, dtype=np.float64)
+        out = np.empty((world.shape[0],) + self.rest.shape, dtype=np.float32)
+        spans: List[slice] = [slice(i, i + batch) for i in range(0, world.shape[0], batch)]
+
+        def run(span: slice) -> None:
+            out[span] = self._deform_batch(world[span])
+
+        if workers and workers > 1 and len(spans) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(run, spans))
+        else:
+            for span in spans:
+                run(span)
+        return out
+
+    def bake(self, clip: Clip, batch: int = DEFAULT_BATCH, workers: Optional[int] = None):
+        """Deform every frame of ``clip`` (or a resampled copy of it)."""
+        return self.deform(self.skeleton.world_matrices(clip, "float64"), batch, workers)
+
+    def bake_pc2(
+        self,
+        path: "os.PathLike[str] | str",
+        clip: Clip,
+        batch: int = DEFAULT_BATCH,
+        workers: Optional[int] = None,
+        start: float = 0.0,
+    ) -> None:
+        """:meth:`bake` ``clip`` and write it to ``path`` as a PC2 point cache.
+
+        One sample per clip frame, numbered from ``start``.
+        """
+        write_pc2(path, self.bake(clip, batch, workers), start=start)
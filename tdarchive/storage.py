@@ -0,0 +1,63 @@
+"""Pieces shared by the zstd, delta and chunk stores.
+
+Every store keeps a file either as its decoded payload (payload mode), when
+re-encoding it through the codec was checked to give back the original
+bytes, or verbatim (stored mode).  :func:`prepare_file` makes that choice,
+and :func:`encode_toe` turns a stored payload back into .toe bytes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+from typing import List, Optional, Tuple
+
+from .codec import PayloadCodec
+from .container import open_toe, write_container
+from .errors import MissingDependencyError
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MODE_PAYLOAD = 0
+MODE_STORED = 1
+
+
+def require_zstd():
+    if zstandard is None:
+        raise MissingDependencyError("the zstd stores need the 'zstandard' package")
+    return zstandard
+
+
+def content_digest(data: bytes) -> bytes:
+    """16-byte BLAKE2b of a file's bytes, as recorded in store headers."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def encode_toe(payload: bytes, frames: List[Tuple[int, int]], codec: PayloadCodec) -> bytes:
+    """.toe bytes for a decoded payload and its ``(stored, raw)`` frame table."""
+    out = io.BytesIO()
+    write_container(out, (payload,), [raw for _, raw in frames], codec)
+    return out.getvalue()
+
+
+def prepare_file(path: str, codec: Optional[PayloadCodec]) -> Tuple[int, bytes, bytes, List]:
+    """Return ``(mode, data, digest, frames)`` for one archive file."""
+    with open(path, "rb") as fh:
+        original = fh.read()
+    digest = content_digest(original)
+    with open_toe(path) as toe:
+        frames = [(f.stored_size, f.raw_size) for f in toe.frames]
+        payload = bytes(toe.read_decoded(codec)) if codec is not None else None
+    if payload is not None and encode_toe(payload, frames, codec) == original:
+        return MODE_PAYLOAD, payload, digest, frames
+    return MODE_STORED, original, digest, frames
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
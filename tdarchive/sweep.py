@@ -0,0 +1,155 @@
+"""Fan the archive out over a worker pool and write a JSON-lines manifest.
+
+Each manifest line describes one file::
+
+    {"path": "2021-05-24/gridz.toe", "day": "2021-05-24", "kind": "toe",
+     "stored_size": 40522, "raw_size": 251561, "operators": 212,
+     "references": ["brick.obj"], "decoded": true}
+
+``stored_size`` is the size on disk.  For .toe files, ``raw_size`` is the
+decoded payload size from the frame headers.  ``operators`` and
+``references`` need a payload codec for .toe files.  Without one they are
+``null`` and ``decoded`` is false.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import IO, Dict, Iterable, List, Optional, Sequence
+
+from . import tdc
+from .archive import ArchiveEntry, iter_archive
+from .codec import has_codec
+from .container import open_toe
+from .errors import ArchiveError
+from .members import decode_members, external_references, operator_paths
+
+EXECUTORS = ("serial", "thread", "process")
+
+
+def _describe_toe(path: str, record: Dict) -> None:
+    with open_toe(path) as toe:
+        record["raw_size"] = toe.raw_size
+    if has_codec():
+        members = decode_members(path)
+        record["operators"] = len(operator_paths(members))
+        record["references"] = external_references(members)
+        record["decoded"] = True
+
+
+def _describe_tdc(path: str, record: Dict) -> None:
+    header = tdc.read_header(path)
+    record["raw_size"] = header.file_size
+    record["references"] = sorted({e.source for e in header.entries if e.source})
+    record["decoded"] = True
+
+
+def _describe_obj(path: str, record: Dict) -> None:
+    refs = set()
+    with open(path, "rb") as fh:
+        for line in fh:
+            if line.startswith(b"mtllib"):
+                refs.update(line.decode("utf-8", "replace").split()[1:])
+    record["raw_size"] = record["stored_size"]
+    record["references"] = sorted(refs)
+    record["decoded"] = True
+
+
+_DESCRIBERS = {"toe": _describe_toe, "tdc": _describe_tdc, "obj": _describe_obj}
+
+
+def describe(root: str, entry: ArchiveEntry) -> Dict:
+    """Build the manifest record for one archive file."""
+    record = {
+        "path": entry.path,
+        "day": entry.day,
+        "kind": entry.kind,
+        "stored_size": entry.size,
+        "raw_size": None,
+        "operators": None,
+        "references": None,
+        "decoded": False,
+    }
+    try:
+        _DESCRIBERS[entry.kind](entry.abspath(root), record)
+    except (ArchiveError, OSError) as exc:
+        record["error"] = str(exc)
+    return record
+
+
+def _describe_task(task) -> Dict:
+    return describe(*task)
+
+
+def _make_executor(kind: str, workers: Optional[int]) -> Optional[Executor]:
+    if kind == "serial":
+        return None
+    if kind == "thread":
+        return ThreadPoolExecutor(workers)
+    if kind == "process":
+        return ProcessPoolExecutor(workers)
+    raise ValueError(f"unknown executor {kind!r}; expected one of {EXECUTORS}")
+
+
+def sweep(
+    root: "os.PathLike[str] | str" = ".",
+    executor: str = "process",
+    workers: Optional[int] = None,
+    entries: Optional[Sequence[ArchiveEntry]] = None,
+) -> List[Dict]:
+    """Describe every archive file and return records sorted by path.
+
+    Files are submitted largest first so one big sketch does not end up as
+    the last task on an otherwise idle pool.
+    """
+    root = os.fspath(root)
+    if entries is None:
+        entries = list(iter_archive(root))
+    tasks = [(root, e) for e in sorted(entries, key=lambda e: -e.size)]
+    pool = _make_executor(executor, workers)
+    if pool is None:
+        records = [_describe_task(t) for t in tasks]
+    else:
+        with pool:
+            chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+            records = list(pool.map(_describe_task, tasks, chunksize=chunksize))
+    records.sort(key=lambda r: r["path"])
+    return records
+
+
+def write_manifest(records: Iterable[Dict], fh: IO[str]) -> None:
+    for record in records:
+        fh.write(json.dumps(record, separators=(",", ":")))
+        fh.write("\n")
+
+
+def read_manifest(fh: IO[str]) -> List[Dict]:
+    return [json.loads(line) for line in fh if line.strip()]
+
+
+def benchmark(
+    root: "os.PathLike[str] | str" = ".",
+    executors: Sequence[str] = EXECUTORS,
+    workers: Optional[int] = None,
+    repeat: int = 3,
+) -> List[Dict]:
+    """Time full sweeps per executor; the best of ``repeat`` runs is kept."""
+    entries = list(iter_archive(root))
+    total = sum(e.size for e in entries)
+    results = []
+    for kind in executors:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sweep(root, kind, workers, entries)
+            best = min(best, time.perf_counter() - start)
+        results.append({
+            "executor": kind,
+            "seconds": best,
+            "files_per_s": len(entries) / best,
+            "mb_per_s": total / best / 1e6,
+        })
+    return results
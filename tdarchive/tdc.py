@@ -0,0 +1,205 @@
+"""Reader for TouchDesigner import caches (``TDImportCache/*.tdc``).
+
+Layout, all integers big-endian::
+
+    8 bytes   magic d4cc6faa2a2baad1
+    u32       cache id
+    u32       creation time (unix seconds)
+    u64       data section size
+    u64       header size (the data section starts here)
+    u32       entry count
+    entries   string name, u32 kind, u64 offset, u64 size, string source
+    padding   ASCII '0' up to the header size
+
+Strings are a u32 length followed by that many bytes including the NUL.
+Entry offsets are relative to the start of the data section.
+
+:class:`TdcFile` memory-maps a cache and hands out entries as views of the
+mapping, so opening the 8.6 MB character cache reads only its header.
+Geometry entries decode through :mod:`tdarchive.btog` and clips through
+:mod:`tdarchive.clip`.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import NamedTuple, Optional, Tuple, Union
+
+from .errors import ArchiveError
+
+MAGIC = bytes.fromhex("d4cc6faa2a2baad1")
+PREAMBLE = struct.Struct(">8sIIQQI")
+ENTRY_FIELDS = struct.Struct(">IQQ")
+_U32 = struct.Struct(">I")
+
+KIND_GEOMETRY = 0
+KIND_CLIP = 1
+KIND_IMAGE = 3
+
+
+class TdcFormatError(ArchiveError, ValueError):
+    """A .tdc cache is truncated or does not have the expected layout."""
+
+
+class TdcEntry(NamedTuple):
+    name: str
+    kind: int
+    offset: int
+    size: int
+    source: str
+
+
+class TdcHeader(NamedTuple):
+    cache_id: int
+    created: int
+    data_size: int
+    header_size: int
+    entries: Tuple[TdcEntry, ...]
+
+    @property
+    def file_size(self) -> int:
+        return self.header_size + self.data_size
+
+
+def _read_string(buf, offset: int) -> Tuple[str, int]:
+    (length,) = _U32.unpack_from(buf, offset)
+    start = offset + _U32.size
+    end = start + length
+    if end > len(buf):
+        raise TdcFormatError(f"string at offset {offset} runs past the header")
+    raw = bytes(buf[start:end]).rstrip(b"\0")
+    return raw.decode("utf-8", "surrogateescape"), end
+
+
+def parse_header(buf) -> TdcHeader:
+    """Parse the preamble and entry table from the start of a cache."""
+    if len(buf) < PREAMBLE.size:
+        raise TdcFormatError("truncated preamble")
+    magic, cache_id, created, data_size, header_size, count = PREAMBLE.unpack_from(buf)
+    if magic != MAGIC:
+        raise TdcFormatError(f"bad magic {bytes(magic).hex()}")
+    if header_size > len(buf):
+        raise TdcFormatError(f"header needs {header_size} bytes, have {len(buf)}")
+    buf = buf[:header_size]
+    entries = []
+    offset = PREAMBLE.size
+    try:
+        for _ in range(count):
+            name, offset = _read_string(buf, offset)
+            kind, data_offset, size = ENTRY_FIELDS.unpack_from(buf, offset)
+            source, offset = _read_string(buf, offset + ENTRY_FIELDS.size)
+            if data_offset + size > data_size:
+                raise TdcFormatError(f"entry {name!r} extends past the data section")
+            entries.append(TdcEntry(name, kind, data_offset, size, source))
+    except struct.error:
+        raise TdcFormatError("entry table runs past the header") from None
+    return TdcHeader(cache_id, created, data_size, header_size, tuple(entries))
+
+
+def read_header(path: "os.PathLike[str] | str") -> TdcHeader:
+    """Read just enough of ``path`` to parse its header."""
+    with open(path, "rb") as fh:
+        head = fh.read(PREAMBLE.size)
+        if len(head) < PREAMBLE.size:
+            raise TdcFormatError(f"{os.fspath(path)}: truncated preamble")
+        header_size = PREAMBLE.unpack(head)[4]
+        head += fh.read(max(0, header_size - len(head)))
+        size = os.fstat(fh.fileno()).st_size
+    header = parse_header(head)
+    if header.file_size != size:
+        raise TdcFormatError(
+            f"{os.fspath(path)}: header describes {header.file_size} bytes, "
+            f"file has {size}"
+        )
+    return header
+
+
+class TdcFile:
+    """A read-only, memory-mapped import cache.
+
+    Entry accessors return views of the mapping (NumPy views for geometry),
+    so they must be released before :meth:`close` is called.
+    """
+
+    def __init__(self, path: "os.PathLike[str] | str"):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as fh:
+            self.size = os.fstat(fh.fileno()).st_size
+            if self.size < PREAMBLE.size:
+                raise TdcFormatError(f"{self.path}: truncated preamble")
+            self._mm: Optional[mmap.mmap] = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        try:
+            self.header = parse_header(self._view)
+            if self.header.file_size != self.size:
+                raise TdcFormatError(
+                    f"header describes {self.header.file_size} bytes, file has {self.size}"
+                )
+        except TdcFormatError as exc:
+            self.close()
+            raise TdcFormatError(f"{self.path}: {exc}") from None
+
+    def __enter__(self) -> "TdcFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<TdcFile {self.path!r} entries={len(self.header.entries)} size={self.size}>"
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # A caller still holds a view; the mapping goes away with it.
+            pass
+        self._mm = None
+
+    @property
+    def entries(self) -> Tuple[TdcEntry, ...]:
+        return self.header.entries
+
+    def entry(self, name: str) -> TdcEntry:
+        for e in self.header.entries:
+            if e.name == name:
+                return e
+        raise KeyError(f"{name!r} is not in {self.path}")
+
+    def view(self, entry: Union[TdcEntry, str]) -> memoryview:
+        """Zero-copy view of one entry's data."""
+        if self._mm is None:
+            raise ValueError("I/O operation on closed TdcFile")
+        if isinstance(entry, str):
+            entry = self.entry(entry)
+        start = self.header.header_size + entry.offset
+        return self._view[start:start + entry.size]
+
+    def geometry(self, entry: Union[TdcEntry, str, None] = None):
+        """A :class:`tdarchive.btog.Geometry` over a geometry entry (default: the first)."""
+        from .btog import Geometry
+
+        if entry is None:
+            entry = next((e for e in self.entries if e.kind == KIND_GEOMETRY), None)
+            if entry is None:
+                raise KeyError(f"{self.path} has no geometry entry")
+        return Geometry(self.view(entry))
+
+    def clip(self, entry: Union[TdcEntry, str, None] = None):
+        """A decoded :class:`tdarchive.clip.Clip` (default: the first clip entry)."""
+        from .clip import decode_clip
+
+        if entry is None:
+            entry = next((e for e in self.entries if e.kind == KIND_CLIP), None)
+            if entry is None:
+                raise KeyError(f"{self.path} has no clip entry")
+        view = self.view(entry)
+        try:
+            return decode_clip(view)
+        finally:
+            view.release()
@@ -0,0 +1,137 @@
+"""Text rendering of .toe and .tdc files for ``git diff``.
+
+Git calls the textconv command with a temporary copy of each blob::
+
+    # .gitattributes
+    *.toe diff=tdarchive
+    *.tdc diff=tdarchive
+
+    git config diff.tdarchive.textconv "python -m tdarchive textconv"
+
+A .toe renders as its decoded network with operators, parameters and inputs
+sorted, so that the diff follows edits and not the order in which
+TouchDesigner happened to save them.  Without a codec only the container
+header and a digest are shown.  A .tdc renders as its header and entry
+table.
+
+Renderings are cached under the blob's git SHA-1 and the codec name, so
+``git log -p`` pays for each historical version once.  The cache lives in
+``$TDARCHIVE_CACHE`` or ``$XDG_CACHE_HOME/tdarchive`` (``~/.cache/tdarchive``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from . import tdc
+from .codec import get_codec, has_codec
+from .container import MAGIC as TOE_MAGIC
+from .container import decode_buffer, parse_frames
+from .members import NODE_SUFFIX, PARM_SUFFIX, MemberTable
+from .network import parse_node, parse_parms
+
+RENDER_VERSION = 1
+CACHE_ENV = "TDARCHIVE_CACHE"
+TEXT_SUFFIX = ".text"
+_UNSAFE = re.compile(r"[^\w.-]")
+
+
+def cache_dir() -> str:
+    explicit = os.environ.get(CACHE_ENV)
+    if explicit:
+        return explicit
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "tdarchive")
+
+
+def blob_sha(data: bytes) -> str:
+    """The SHA-1 git assigns to a blob with these contents."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def render_members(members: MemberTable) -> List[str]:
+    lines = []
+    for name in sorted(n for n in members if n.endswith(NODE_SUFFIX)):
+        stem = name[: -len(NODE_SUFFIX)]
+        family, optype, inputs = parse_node(members.text(name))
+        lines.append(f"/{stem}  {family}:{optype}")
+        for slot, source in sorted(inputs):
+            lines.append(f"  input {slot} <- {source}")
+        parm = stem + PARM_SUFFIX
+        if parm in members:
+            for key, mode, value in sorted(parse_parms(members.text(parm))):
+                suffix = f"  [mode {mode}]" if mode else ""
+                lines.append(f"  parm {key} = {value}{suffix}")
+        text = stem + TEXT_SUFFIX
+        if text in members:
+            lines.extend(f"  | {line}" for line in members.text(text).splitlines())
+    return lines
+
+
+def render_toe(data: bytes) -> List[str]:
+    frames = parse_frames(memoryview(data), len(data))
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    lines = [f"# toe {len(data)} bytes, blake2b {digest}"]
+    lines.extend(
+        f"# frame {f.index}: stored {f.stored_size} raw {f.raw_size}" for f in frames
+    )
+    if not has_codec():
+        lines.append("# payload not decoded: no codec registered")
+        return lines
+    codec = get_codec()
+    payload = decode_buffer(data, codec)
+    lines.extend(render_members(MemberTable(payload, codec.split_members(payload))))
+    return lines
+
+
+def render_tdc(data: bytes) -> List[str]:
+    header = tdc.parse_header(data)
+    created = datetime.fromtimestamp(header.created, timezone.utc).isoformat()
+    lines = [
+        f"# tdc cache {header.cache_id}, created {created}",
+        f"# header {header.header_size} bytes, data {header.data_size} bytes",
+    ]
+    for e in sorted(header.entries):
+        lines.append(f"{e.name}  kind {e.kind}  offset {e.offset}  size {e.size}")
+        if e.source:
+            lines.append(f"  source {e.source}")
+    return lines
+
+
+def render(data: bytes) -> str:
+    """Text rendering of a .toe or .tdc image; anything else is passed through."""
+    if data[:len(tdc.MAGIC)] == tdc.MAGIC:
+        lines = render_tdc(data)
+    elif data[:len(TOE_MAGIC)] == TOE_MAGIC:
+        lines = render_toe(data)
+    else:
+        return data.decode("utf-8", "surrogateescape")
+    return "\n".join(lines) + "\n"
+
+
+def textconv(path: "os.PathLike[str] | str", cache: Optional[str] = None) -> str:
+    """Render ``path``, reusing an earlier rendering of the same blob."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    # Output depends on the codec that decoded it, so its name is in the key.
+    variant = _UNSAFE.sub("_", get_codec().name) if has_codec() else "hdr"
+    sha = blob_sha(data)
+    cache = cache or cache_dir()
+    cached = os.path.join(cache, "textconv", sha[:2], f"{sha}-{RENDER_VERSION}-{variant}.txt")
+    try:
+        with open(cached, encoding="utf-8", errors="surrogateescape") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        pass
+    text = render(data)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(cached), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8", errors="surrogateescape") as fh:
+        fh.write(text)
+    os.replace(tmp, cached)
+    return text
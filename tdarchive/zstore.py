@@ -0,0 +1,199 @@
+"""Dictionary-compressed storage mode for the .toe corpus.
+
+Most sketches are small and nearly identical from one day to the next, so a
+zstd dictionary trained on the archive does much of the work that each
+file's own compressor has to repeat.  The store keeps::
+
+    STORE/dictionary.zdict
+    STORE/2021-05-24/gridz.toe.tzst
+
+Each ``.tzst`` starts with a small header (magic, mode, BLAKE2b of the
+original file, frame table) followed by one zstd frame.  In payload mode the
+zstd frame holds the decoded payload, and reading re-encodes it through the
+codec.  A file only goes in that mode if re-encoding was checked to give back
+the original bytes.  Every other file is stored verbatim (stored mode), so
+restores are always bit-exact.
+
+Needs the optional ``zstandard`` package.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .archive import iter_archive
+from .codec import PayloadCodec, get_codec, has_codec
+from .container import decode_buffer, open_toe
+from .errors import ArchiveError
+from .storage import (
+    MODE_PAYLOAD, MODE_STORED, content_digest, encode_toe, percentile, prepare_file, require_zstd,
+)
+
+MAGIC = b"TZS1"
+HEADER = struct.Struct(">4sB16sI")
+FRAME = struct.Struct(">II")
+DICT_NAME = "dictionary.zdict"
+STORE_SUFFIX = ".tzst"
+DEFAULT_DICT_SIZE = 112_640
+DEFAULT_LEVEL = 19
+
+
+class StoreError(ArchiveError):
+    """A store file is damaged or does not restore to the original bytes."""
+
+
+class PackStats(NamedTuple):
+    files: int
+    payload_mode: int
+    original_bytes: int
+    store_bytes: int
+    dictionary_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.store_bytes - self.dictionary_bytes
+
+
+def pack(
+    root: "os.PathLike[str] | str",
+    store: "os.PathLike[str] | str",
+    level: int = DEFAULT_LEVEL,
+    dict_size: int = DEFAULT_DICT_SIZE,
+) -> PackStats:
+    """Train a dictionary on the archive and write every .toe into ``store``."""
+    zstd = require_zstd()
+    root, store = os.fspath(root), os.fspath(store)
+    codec = get_codec() if has_codec() else None
+    entries = [e for e in iter_archive(root) if e.kind == "toe"]
+    prepared = [prepare_file(e.abspath(root), codec) for e in entries]
+
+    dictionary = zstd.train_dictionary(dict_size, [data for _, data, _, _ in prepared])
+    os.makedirs(store, exist_ok=True)
+    dict_bytes = dictionary.as_bytes()
+    with open(os.path.join(store, DICT_NAME), "wb") as fh:
+        fh.write(dict_bytes)
+
+    compressor = zstd.ZstdCompressor(level=level, dict_data=dictionary)
+    store_bytes = payload_mode = 0
+    for entry, (mode, data, digest, frames) in zip(entries, prepared):
+        target = os.path.join(store, *entry.path.split("/")) + STORE_SUFFIX
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        blob = bytearray(HEADER.pack(MAGIC, mode, digest, len(frames)))
+        for stored, raw in frames:
+            blob += FRAME.pack(stored, raw)
+        blob += compressor.compress(data)
+        with open(target, "wb") as fh:
+            fh.write(blob)
+        store_bytes += len(blob)
+        payload_mode += mode == MODE_PAYLOAD
+    return PackStats(
+        len(entries), payload_mode, sum(e.size for e in entries), store_bytes, len(dict_bytes)
+    )
+
+
+class ZStore:
+    """Read access to a store written by :func:`pack`."""
+
+    def __init__(self, directory: "os.PathLike[str] | str"):
+        zstd = require_zstd()
+        self.directory = os.fspath(directory)
+        with open(os.path.join(self.directory, DICT_NAME), "rb") as fh:
+            self._dict = zstd.ZstdCompressionDict(fh.read())
+        self._decompressor = zstd.ZstdDecompressor(dict_data=self._dict)
+
+    def paths(self) -> Iterator[str]:
+        """Archive-relative paths of every stored file."""
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(STORE_SUFFIX):
+                    full = os.path.join(dirpath, name[: -len(STORE_SUFFIX)])
+                    yield os.path.relpath(full, self.directory).replace(os.sep, "/")
+
+    def _read(self, relpath: str) -> Tuple[int, bytes, List[Tuple[int, int]], bytes]:
+        path = os.path.join(self.directory, *relpath.split("/")) + STORE_SUFFIX
+        with open(path, "rb") as fh:
+            blob = fh.read()
+        magic, mode, digest, count = HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise StoreError(f"{path}: bad magic {magic!r}")
+        offset = HEADER.size
+        frames = [FRAME.unpack_from(blob, offset + i * FRAME.size) for i in range(count)]
+        offset += count * FRAME.size
+        data = self._decompressor.decompress(memoryview(blob)[offset:])
+        return mode, digest, frames, data
+
+    def payload(self, relpath: str) -> bytes:
+        """The decoded payload of one stored file."""
+        mode, _, _, data = self._read(relpath)
+        if mode == MODE_PAYLOAD:
+            return data
+        return bytes(decode_buffer(data))
+
+    def restore(self, relpath: str, codec: Optional[PayloadCodec] = None) -> bytes:
+        """The original .toe bytes, checked against the stored digest."""
+        mode, digest, frames, data = self._read(relpath)
+        if mode == MODE_PAYLOAD:
+            data = encode_toe(data, frames, codec or get_codec())
+        if content_digest(data) != digest:
+            raise StoreError(f"{relpath}: restored bytes do not match the original")
+        return data
+
+    def restore_all(self, out_root: "os.PathLike[str] | str") -> int:
+        count = 0
+        for relpath in self.paths():
+            target = os.path.join(os.fspath(out_root), *relpath.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as fh:
+                fh.write(self.restore(relpath))
+            count += 1
+        return count
+
+
+def report(
+    root: "os.PathLike[str] | str", store: "os.PathLike[str] | str"
+) -> Dict:
+    """Compare the store with the native containers: size and read latency.
+
+    The native side decodes the payload from the .toe when a codec is
+    installed and otherwise just reads the file.  The store side runs
+    :meth:`ZStore.payload` or :meth:`ZStore.restore` to match.
+    """
+    zs = ZStore(store)
+    decode = has_codec()
+    root = os.fspath(root)
+    native_ms, store_ms = [], []
+    original = stored = 0
+    for relpath in zs.paths():
+        source = os.path.join(root, *relpath.split("/"))
+        original += os.path.getsize(source)
+        stored += os.path.getsize(os.path.join(zs.directory, *relpath.split("/")) + STORE_SUFFIX)
+        start = time.perf_counter()
+        if decode:
+            with open_toe(source) as toe:
+                toe.read_decoded()
+        else:
+            with open(source, "rb") as fh:
+                fh.read()
+        native_ms.append((time.perf_counter() - start) * 1e3)
+        start = time.perf_counter()
+        if decode:
+            zs.payload(relpath)
+        else:
+            zs.restore(relpath)
+        store_ms.append((time.perf_counter() - start) * 1e3)
+    dictionary = os.path.getsize(os.path.join(zs.directory, DICT_NAME))
+    return {
+        "files": len(native_ms),
+        "original_bytes": original,
+        "store_bytes": stored,
+        "dictionary_bytes": dictionary,
+        "saved_bytes": original - stored - dictionary,
+        "native_p50_ms": percentile(native_ms, 0.5),
+        "native_p99_ms": percentile(native_ms, 0.99),
+        "store_p50_ms": percentile(store_ms, 0.5),
+        "store_p99_ms": percentile(store_ms, 0.99),
+    }
@@ -0,0 +1,136 @@
+"""Shared fixtures: a stand-in payload codec and small synthetic archives."""
+
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from tdarchive import PayloadCodec, register_codec
+from tdarchive.container import write_container
+
+_MEMBER = struct.Struct(">II")
+
+
+class _Compressor:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level)
+        self._n = 0
+
+    def compress(self, data):
+        out = self._z.compress(data)
+        self._n += len(out)
+        return out
+
+    def flush(self):
+        out = self._z.flush()
+        self._n += len(out)
+        return out + b"\0" * (-self._n % 8)
+
+
+class ZlibCodec(PayloadCodec):
+    """Stand-in codec: zlib frames, members as ``name length, data length, name, data``."""
+
+    name = "zlib-test"
+
+    def __init__(self, level=9):
+        self.level = level
+
+    def decompressobj(self):
+        return zlib.decompressobj()
+
+    def compressobj(self):
+        return _Compressor(self.level)
+
+    def split_members(self, payload):
+        payload = memoryview(payload)
+        offset = 0
+        while offset < len(payload):
+            nlen, dlen = _MEMBER.unpack_from(payload, offset)
+            offset += _MEMBER.size
+            name = bytes(payload[offset:offset + nlen]).decode()
+            offset += nlen
+            yield name, offset, offset + dlen
+            offset += dlen
+
+    def join_members(self, members):
+        for name, data in members:
+            name = name.encode()
+            yield _MEMBER.pack(len(name), len(data)) + name
+            yield bytes(data)
+
+
+def network(seed):
+    """A small project whose noise seed is ``seed``; odd seeds add a wired Level TOP."""
+    members = [
+        (".build", b"version 099\nbuild 2021.12000\n"),
+        ("project1.n", b"COMP:container\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.n", b"TOP:noise\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.parm", b"?\nseed 0 %d\n" % seed),
+    ]
+    if seed % 2:
+        members.append(("project1/level1.n",
+                        b"TOP:level\ntile 200 0 130 90\ninputs\n{\n0 \tnoise1\n}\nend\n"))
+    return members
+
+
+def payload(members):
+    return b"".join(ZlibCodec().join_members(members))
+
+
+def make_toe(path, members, frame_sizes=(), codec=None):
+    """Write ``members`` to a .toe at ``path``, creating its folder.
+
+    Pass a ``codec`` with another level for a file the default codec does
+    not re-encode byte for byte.
+    """
+    codec = codec or ZlibCodec()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as fh:
+        write_container(fh, codec.join_members(members), frame_sizes, codec)
+    return path
+
+
+class ArchiveTestCase(unittest.TestCase):
+    """Registers :class:`ZlibCodec` and provides an empty archive root."""
+
+    def setUp(self):
+        self.codec = ZlibCodec()
+        register_codec(self.codec)
+        self.addCleanup(register_codec, None)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+
+    def path(self, rel):
+        return os.path.join(self.root, *rel.split("/"))
+
+    def add(self, rel, members, frame_sizes=(), codec=None):
+        """Write an archive-relative .toe and return its absolute path."""
+        return make_toe(self.path(rel), members, frame_sizes, codec)
+
+    def add_versions(self, name, count, first=0):
+        """Dated copies of ``name`` from 2021-01-10 on, one :func:`sketch` version each."""
+        rels = [f"2021-01-{10 + i}/{name}" for i in range(count)]
+        for i, rel in enumerate(rels):
+            self.add(rel, sketch(first + i))
+        return rels
+
+    def write(self, rel, data):
+        path = self.path(rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def read(self, rel):
+        with open(self.path(rel), "rb") as fh:
+            return fh.read()
+
+
+def sketch(version):
+    """:func:`network` plus a DAT of a few dozen KiB that each version edits slightly."""
+    lines = [b"row %d: position %d %d %d\n" % (i, i * 7 % 101, i * 13 % 97, i % 11)
+             for i in range(2000)]
+    lines[version * 37 % len(lines)] = b"edited in version %d\n" % version
+    return network(version) + [("project1/table1.dat", b"".join(lines))]
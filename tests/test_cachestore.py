@@ -0,0 +1,82 @@
+"""Import caches are stored once, linked read-only and relinked in fresh checkouts."""
+
+import contextlib
+import io
+import os
+import shutil
+import stat
+import unittest
+
+from support import ArchiveTestCase
+
+from tdarchive import cachestore, cli
+from tdarchive.index import blake2_file
+
+SOPHIA = os.urandom(3000)
+BRICK = os.urandom(1000)
+
+
+class CacheStoreTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        for day in ("2021-02-26", "2021-03-12", "2021-03-13"):
+            self.write(f"{day}/TDImportCache/sophia.tdc", SOPHIA)
+        self.write("2021-03-13/TDImportCache/brick.tdc", BRICK)
+        self.write("2021-03-13/brick.tdc", BRICK)  # not in a cache folder
+        self.write("backup/TDImportCache/sophia.tdc", SOPHIA)  # not a dated folder
+        self.store = self.path("store")
+
+    def test_find_caches_only_looks_in_dated_folders(self):
+        self.assertEqual(cachestore.find_caches(self.root), [
+            "2021-02-26/TDImportCache/sophia.tdc",
+            "2021-03-12/TDImportCache/sophia.tdc",
+            "2021-03-13/TDImportCache/brick.tdc",
+            "2021-03-13/TDImportCache/sophia.tdc",
+        ])
+        r = cachestore.report(self.root)
+        self.assertEqual((r.caches, r.distinct, r.duplicate_bytes), (4, 2, 2 * len(SOPHIA)))
+
+    def test_dedup_links_every_copy_to_a_read_only_object(self):
+        r = cachestore.dedup(self.root, self.store)
+        self.assertEqual((r.caches, r.distinct, r.linked), (4, 2, 4))
+        self.assertEqual(r.saved_bytes, 2 * len(SOPHIA))
+        for rel in cachestore.find_caches(self.root):
+            obj = cachestore.resolve(self.store, rel)
+            self.assertTrue(os.path.samefile(self.path(rel), obj))
+            self.assertEqual(stat.S_IMODE(os.stat(obj).st_mode), cachestore.READ_ONLY)
+            self.assertEqual(os.path.basename(obj), blake2_file(obj) + ".tdc")
+        self.assertEqual(self.read("backup/TDImportCache/sophia.tdc"), SOPHIA)
+        again = cachestore.dedup(self.root, self.store)
+        self.assertEqual((again.linked, again.saved_bytes), (0, 0))
+
+    def test_relink_restores_a_fresh_checkout(self):
+        cachestore.dedup(self.root, self.store)
+        shutil.rmtree(self.path("2021-03-12"))
+        os.remove(self.path("2021-03-13/TDImportCache/sophia.tdc"))
+        self.write("2021-03-13/TDImportCache/sophia.tdc", SOPHIA)  # an unlinked copy
+        self.assertEqual(cachestore.relink(self.root, self.store), 2)
+        for rel in cachestore.find_caches(self.root):
+            self.assertTrue(os.path.samefile(self.path(rel), cachestore.resolve(self.store, rel)))
+        self.assertEqual(cachestore.relink(self.root, self.store), 0)
+
+    def test_damaged_object_and_unknown_path(self):
+        cachestore.dedup(self.root, self.store)
+        obj = cachestore.resolve(self.store, "2021-03-13/TDImportCache/brick.tdc")
+        os.chmod(obj, 0o644)
+        with open(obj, "r+b") as fh:
+            fh.write(b"#")
+        with self.assertRaises(cachestore.CacheStoreError):
+            cachestore.relink(self.root, self.store)
+        with self.assertRaises(cachestore.CacheStoreError):
+            cachestore.resolve(self.store, "2021-03-13/TDImportCache/nope.tdc")
+
+    def test_cli_needs_a_store(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err, \
+                self.assertRaises(SystemExit) as cm:
+            cli.main(["importcache", "dedup", "--root", self.root])
+        self.assertEqual(cm.exception.code, 2)
+        self.assertIn("importcache dedup needs a store directory", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
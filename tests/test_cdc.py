@@ -0,0 +1,101 @@
+"""Chunk boundaries are content-defined and the chunk store restores bit for bit."""
+
+import os
+import random
+import unittest
+from unittest import mock
+
+from support import ArchiveTestCase, ZlibCodec, sketch
+
+from tdarchive import cdc
+from tdarchive.zstore import StoreError
+
+
+def _reference_cuts(data, min_size=cdc.MIN_SIZE, avg_size=cdc.AVG_SIZE, max_size=cdc.MAX_SIZE):
+    """FastCDC as published: a fresh gear hash per chunk, one byte at a time."""
+    bits = max(1, avg_size.bit_length() - 1)
+    mask_s, mask_l = cdc._mask(bits + 1), cdc._mask(bits - 1)
+    cuts, start, n = [], 0, len(data)
+    while start < n:
+        if n - start <= min_size:
+            cuts.append(n)
+            break
+        end = min(start + max_size, n)
+        h = 0
+        for i in range(start, end):
+            h = ((h << 1) + cdc.GEAR[data[i]]) & cdc._WORD
+            if i + 1 - start <= min_size:
+                continue
+            mask = mask_s if i < start + avg_size else mask_l
+            if not h & mask:
+                end = i + 1
+                break
+        cuts.append(end)
+        start = end
+    return cuts
+
+
+class CutPointTest(unittest.TestCase):
+    def setUp(self):
+        self.data = random.Random(7).randbytes(200_000)
+
+    def test_matches_reference(self):
+        self.assertEqual(cdc.cut_points(self.data), _reference_cuts(self.data))
+
+    def test_plain_loop_matches_numpy(self):
+        with mock.patch.object(cdc, "np", None):
+            plain = cdc.cut_points(self.data)
+        self.assertEqual(plain, cdc.cut_points(self.data))
+
+    def test_sizes_are_respected(self):
+        cuts = cdc.cut_points(self.data)
+        sizes = [b - a for a, b in zip([0] + cuts, cuts)]
+        self.assertEqual(sum(sizes), len(self.data))
+        self.assertTrue(all(cdc.MIN_SIZE < s <= cdc.MAX_SIZE for s in sizes[:-1]))
+        self.assertEqual(cdc.cut_points(b""), [])
+        with self.assertRaises(ValueError):
+            cdc.cut_points(self.data, min_size=16)
+
+    def test_insert_only_moves_nearby_cuts(self):
+        edited = self.data[:100_000] + b"inserted" + self.data[100_000:]
+        before = set(cdc.cut_points(self.data))
+        after = {c - 8 if c > 100_000 else c for c in cdc.cut_points(edited)}
+        self.assertGreater(len(before & after), len(before) - 3)
+
+
+class ChunkStoreTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rels = self.add_versions("gridz.toe", 4)
+        self.add("2021-01-13/odd.toe", sketch(9), codec=ZlibCodec(1))
+        self.rels.append("2021-01-13/odd.toe")
+        self.rels.append("2021-01-10/brick.obj")
+        self.write("2021-01-10/brick.obj", b"mtllib brick.mtl\nv 0 0 0\n" * 500)
+
+    def test_restore_is_bit_exact(self):
+        stats = cdc.pack(self.root, self.path("store"))
+        cs = cdc.ChunkStore(self.path("store"))
+        self.assertEqual(sorted(cs.recipes()), sorted(self.rels))
+        for rel in self.rels:
+            with self.subTest(rel):
+                self.assertEqual(cs.restore(rel), self.read(rel))
+        self.assertEqual(stats.files, 6)
+        self.assertGreater(stats.dedup_ratio, 2)
+
+    def test_repack_writes_nothing_new(self):
+        cdc.pack(self.root, self.path("store"))
+        stats = cdc.pack(self.root, self.path("store"))
+        self.assertEqual((stats.new_chunks, stats.new_bytes), (0, 0))
+
+    def test_damaged_chunk_is_reported(self):
+        cdc.pack(self.root, self.path("store"))
+        cs = cdc.ChunkStore(self.path("store"))
+        path = cs.chunk_path(cs.read_recipe(self.rels[0])["chunks"][0])
+        with open(path, "r+b") as fh:
+            fh.write(b"#")
+        with self.assertRaises(StoreError):
+            cs.restore(self.rels[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Container round trips, frame validation and streaming member decode."""
+
+import io
+import unittest
+
+from support import ArchiveTestCase, network, payload
+
+from tdarchive.container import FRAME_HEADER, decode_buffer, open_toe, write_container
+from tdarchive.errors import ToeFormatError
+from tdarchive.members import decode_members, iter_members
+
+
+class ContainerTest(ArchiveTestCase):
+    def test_single_frame_round_trip(self):
+        members = network(1)
+        path = self.add("2021-01-10/gridz.toe", members)
+        with open_toe(path) as toe:
+            self.assertEqual(len(toe.frames), 1)
+            self.assertEqual(toe.raw_size, len(payload(members)))
+            self.assertEqual(bytes(toe.read_decoded()), payload(members))
+            self.assertEqual(toe.stored_size % 8, 0)
+
+    def test_multi_frame_round_trip(self):
+        raw = payload(network(1))
+        sizes = (40, len(raw) - 40)
+        path = self.add("2021-01-10/block.toe", network(1), sizes)
+        with open_toe(path) as toe:
+            self.assertEqual([f.raw_size for f in toe.frames], list(sizes))
+            self.assertEqual(bytes(toe.read_decoded()), raw)
+            self.assertEqual(b"".join(toe.iter_decoded(frame=1)), raw[40:])
+        self.assertEqual(bytes(decode_buffer(self.read("2021-01-10/block.toe"))), raw)
+
+    def test_frame_sizes_must_cover_the_payload(self):
+        with self.assertRaises(ToeFormatError):
+            write_container(io.BytesIO(), [payload(network(0))], (10,))
+
+    def test_empty_payload_is_refused(self):
+        with self.assertRaises(ToeFormatError):
+            write_container(io.BytesIO(), [])
+
+    def test_bad_headers_are_reported(self):
+        self.add("a.toe", network(0))
+        good = self.read("a.toe")
+        for name, data in (
+            ("empty.toe", b""),
+            ("magic.toe", b"XX" + good[2:]),
+            ("short.toe", good[:-8]),
+        ):
+            with self.subTest(name), self.assertRaises(ToeFormatError):
+                open_toe(self.write(name, data)).close()
+
+    def test_raw_size_mismatch_is_reported(self):
+        self.add("a.toe", network(0))
+        good = self.read("a.toe")
+        magic, stored, raw = FRAME_HEADER.unpack_from(good)
+        bad = FRAME_HEADER.pack(magic, stored, raw + 1) + good[FRAME_HEADER.size:]
+        with open_toe(self.write("bad.toe", bad)) as toe, self.assertRaises(ToeFormatError):
+            toe.read_decoded()
+
+    def test_iter_members_matches_decode_members(self):
+        members = network(1) + [("project1/big.bin", bytes(range(256)) * 4096)]
+        raw = payload(members)
+        path = self.add("2021-01-10/big.toe", members, (len(raw) // 2, len(raw) - len(raw) // 2))
+        table = decode_members(path)
+        streamed = list(iter_members(path))
+        self.assertEqual(streamed, [(name, bytes(data)) for name, data in table.items()])
+        self.assertEqual(streamed, members)
+
+
+if __name__ == "__main__":
+    unittest.main()
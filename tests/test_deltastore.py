@@ -0,0 +1,58 @@
+"""Delta chains restore every version bit for bit, with keyframes bounding them."""
+
+import unittest
+from unittest import mock
+
+from support import ArchiveTestCase, ZlibCodec, sketch
+
+from tdarchive import deltastore, storage
+from tdarchive.zstore import StoreError
+
+
+@unittest.skipIf(storage.zstandard is None, "needs zstandard")
+class DeltaStoreTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.gridz = self.add_versions("gridz.toe", 7)
+        self.other = self.add_versions("other.toe", 3, 10)
+        self.add("2021-01-13/other.toe", sketch(13), codec=ZlibCodec(1))
+        self.other.append("2021-01-13/other.toe")
+        self.stats = deltastore.pack(self.root, self.path("store"), keyframe=3)
+
+    def test_restore_is_bit_exact(self):
+        self.assertEqual((self.stats.lineages, self.stats.versions, self.stats.bases), (2, 11, 5))
+        self.assertLess(self.stats.store_bytes, self.stats.original_bytes)
+        ds = deltastore.DeltaStore(self.path("store"))
+        self.assertEqual(ds.paths(), sorted(self.gridz + self.other))
+        for rel in self.gridz + self.other:
+            with self.subTest(rel):
+                ds.clear_cache()
+                self.assertEqual(ds.restore(rel), self.read(rel))
+
+    def test_keyframes_bound_the_chain(self):
+        ds = deltastore.DeltaStore(self.path("store"))
+        with mock.patch.object(ds, "_read", wraps=ds._read) as read:
+            ds.restore(self.gridz[5])
+        self.assertEqual([c.args[0] for c in read.call_args_list],
+                         [self.gridz[5], self.gridz[4], self.gridz[3]])
+
+    def test_cache_serves_later_versions(self):
+        ds = deltastore.DeltaStore(self.path("store"), cache_size=2)
+        ds.restore(self.gridz[1])
+        with mock.patch.object(ds, "_read", wraps=ds._read) as read:
+            ds.restore(self.gridz[2])
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(list(ds._cache), [self.gridz[1], self.gridz[2]])
+
+    def test_keyframe_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            deltastore.pack(self.root, self.path("store2"), keyframe=0)
+
+    def test_corrupt_file_is_reported(self):
+        self.write("store/" + self.gridz[0] + deltastore.DELTA_SUFFIX, b"XXXX" + bytes(40))
+        with self.assertRaises(StoreError):
+            deltastore.DeltaStore(self.path("store")).restore(self.gridz[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
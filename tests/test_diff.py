@@ -0,0 +1,94 @@
+"""Structural diff reports each kind of change and skips unchanged subtrees."""
+
+import contextlib
+import io
+import unittest
+
+from support import ArchiveTestCase, network
+
+from tdarchive import cli
+from tdarchive.diff import Change, diff_files, diff_lineage
+
+
+def _project(level=b"TOP:level\ntile 200 0 130 90\ninputs\n{\n0 \tnoise1\n}\nend\n",
+             text=b"hello\n", seed=b"1"):
+    return [
+        (".build", b"version 099\nbuild 2021.12000\n"),
+        ("project1.n", b"COMP:container\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.n", b"TOP:noise\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.parm", b"?\nseed 0 " + seed + b"\n"),
+        ("project1/noise2.n", b"TOP:noise\ntile 0 100 130 90\nend\n"),
+        ("project1/level1.n", level),
+        ("project1/text1.n", b"DAT:text\ntile 400 0 130 90\nend\n"),
+        ("project1/text1.text", text),
+        ("archive1.n", b"COMP:base\ntile 0 200 130 90\nend\n"),
+        ("archive1/null1.n", b"TOP:null\ntile 0 0 130 90\nend\n"),
+        ("archive1/null2.n", b"TOP:null\ntile 0 0 130 90\nend\n"),
+    ]
+
+
+class DiffTest(ArchiveTestCase):
+    def diff(self, old, new):
+        return diff_files(self.add("a.toe", old), self.add("b.toe", new))
+
+    def test_identical_apart_from_build(self):
+        new = _project()
+        new[0] = (".build", b"version 099\nbuild 2022.24200\n")
+        changes, stats = self.diff(_project(), new)
+        self.assertEqual(changes, [])
+        self.assertEqual((stats.operators, stats.visited, stats.compared), (8, 0, 0))
+
+    def test_param_change_compares_one_operator(self):
+        changes, stats = self.diff(_project(), _project(seed=b"7"))
+        self.assertEqual(changes, [Change("param", "/project1/noise1", "seed", "1", "7")])
+        self.assertEqual(stats.compared, 1)
+        self.assertLess(stats.visited, stats.operators)
+
+    def test_type_wire_text_and_layout(self):
+        level = b"TOP:blur\ntile 200 0 130 90\ninputs\n{\n0 \tnoise2\n}\nend\n"
+        changes, _ = self.diff(_project(), _project(level=level, text=b"bye\n"))
+        self.assertEqual(changes, [
+            Change("type", "/project1/level1", None, "TOP:level", "TOP:blur"),
+            Change("wire", "/project1/level1", "0", "noise1", "noise2"),
+            Change("text", "/project1/text1", None, "hello\n", "bye\n"),
+        ])
+        moved = b"TOP:level\ntile 300 0 130 90\ninputs\n{\n0 \tnoise1\n}\nend\n"
+        changes, _ = self.diff(_project(), _project(level=moved))
+        self.assertEqual(changes, [Change("node", "/project1/level1")])
+        self.assertEqual(str(changes[0]), "node    /project1/level1")
+
+    def test_removed_comp_is_reported_once(self):
+        new = [m for m in _project() if not m[0].startswith("archive1")]
+        changes, _ = self.diff(_project(), new)
+        self.assertEqual(changes, [Change("removed", "/archive1")])
+        changes, _ = self.diff(new, _project())
+        self.assertEqual(changes, [Change("added", "/archive1")])
+
+    def test_lineage_and_cli(self):
+        for i, day in enumerate(("2021-01-10", "2021-01-11", "2021-01-12")):
+            self.add(f"{day}/gridz.toe", network(i))
+        pairs = list(diff_lineage(self.root, "gridz.toe"))
+        self.assertEqual([new for _, new, _, _ in pairs],
+                         ["2021-01-11/gridz.toe", "2021-01-12/gridz.toe"])
+        self.assertEqual(pairs[0][2], [
+            Change("added", "/project1/level1"),
+            Change("param", "/project1/noise1", "seed", "0", "1"),
+        ])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = cli.main(["diff", self.path("2021-01-10/gridz.toe"),
+                               self.path("2021-01-11/gridz.toe")])
+        self.assertEqual(status, 0)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[2:4], [
+            "  added   /project1/level1",
+            "  param   /project1/noise1 seed: '0' -> '1'",
+        ])
+        self.assertTrue(lines[4].startswith("  2 change(s);"))
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as cm:
+            cli.main(["diff", self.path("2021-01-10/gridz.toe")])
+        self.assertEqual(cm.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
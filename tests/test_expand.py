@@ -0,0 +1,51 @@
+"""Expanded trees collapse back to byte-identical .toe files."""
+
+import os
+import unittest
+
+from support import ArchiveTestCase, network, payload
+
+from tdarchive.expand import TreeExistsError, collapse, expand, load_members, read_toc
+
+
+class ExpandCollapseTest(ArchiveTestCase):
+    def round_trip(self, rel, members, frame_sizes=()):
+        source = self.add(rel, members, frame_sizes)
+        toc = expand(source, self.path("work"))
+        rebuilt = collapse(toc, self.path("rebuilt.toe"))
+        with open(source, "rb") as a, open(rebuilt, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+        return toc
+
+    def test_single_frame_is_byte_identical(self):
+        toc = self.round_trip("2021-01-10/gridz.toe", network(1))
+        self.assertEqual(read_toc(toc), [name for name, _ in network(1)])
+        self.assertEqual(self.read("work/gridz.toe.dir/project1/noise1.parm"), b"?\nseed 0 1\n")
+        self.assertFalse(os.path.exists(self.path("work/gridz.toe.frames")))
+
+    def test_multi_frame_is_byte_identical(self):
+        members = network(1) + [("project1/big.bin", os.urandom(1 << 20))]
+        raw = len(payload(members))
+        self.round_trip("2021-06-09/block-time.toe", members, (raw - 4096, 4096))
+        self.assertEqual(self.read("work/block-time.toe.frames"), f"{raw - 4096}\n4096\n".encode())
+
+    def test_tree_members_match_the_payload(self):
+        toc = self.round_trip("2021-01-10/gridz.toe", network(0))
+        expanded = load_members(toc)
+        decoded = load_members(self.path("2021-01-10/gridz.toe"))
+        self.assertEqual(list(expanded.items()), list(decoded.items()))
+
+    def test_existing_tree_needs_force(self):
+        source = self.add("2021-01-10/gridz.toe", network(1))
+        expand(source, self.path("work"))
+        self.add("2021-01-10/gridz.toe", network(0))
+        with self.assertRaises(TreeExistsError):
+            expand(source, self.path("work"))
+        self.assertTrue(os.path.exists(self.path("work/gridz.toe.dir/project1/level1.n")))
+        expand(source, self.path("work"), force=True)
+        self.assertFalse(os.path.exists(self.path("work/gridz.toe.dir/project1/level1.n")))
+        self.assertEqual(self.read("work/gridz.toe.dir/project1/noise1.parm"), b"?\nseed 0 0\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Re-scans trust size and mtime, reuse twins by digest and count real decodes."""
+
+import os
+import shutil
+import unittest
+
+from support import ArchiveTestCase, network
+
+from tdarchive import register_codec
+from tdarchive.index import update_index
+
+
+class IndexRescanTest(ArchiveTestCase):
+    def scan(self):
+        return update_index(self.root, executor="serial")
+
+    def test_rescan_of_unchanged_archive_decodes_nothing(self):
+        self.add("2021-01-10/gridz.toe", network(0))
+        self.add("2021-01-10/other.toe", network(1))
+        records, stats = self.scan()
+        self.assertEqual((stats.unchanged, stats.rehashed, stats.decoded), (0, 2, 2))
+        self.assertEqual([r["operators"] for r in records], [2, 3])
+        records_again, stats = self.scan()
+        self.assertEqual((stats.unchanged, stats.rehashed, stats.decoded), (2, 0, 0))
+        self.assertEqual(records_again, records)
+
+    def test_copied_forward_file_reuses_its_twin(self):
+        self.add("2021-01-10/gridz.toe", network(0))
+        self.scan()
+        os.makedirs(self.path("2021-01-11"))
+        shutil.copy(self.path("2021-01-10/gridz.toe"), self.path("2021-01-11/gridz.toe"))
+        records, stats = self.scan()
+        self.assertEqual((stats.unchanged, stats.rehashed, stats.decoded), (1, 1, 0))
+        self.assertEqual(records[1]["path"], "2021-01-11/gridz.toe")
+        self.assertEqual(records[1]["day"], "2021-01-11")
+
+    def test_new_twins_in_one_scan_are_decoded_once(self):
+        self.add("2021-01-10/gridz.toe", network(1))
+        self.add("2021-01-11/gridz.toe", network(1))
+        records, stats = self.scan()
+        self.assertEqual((stats.rehashed, stats.decoded), (2, 1))
+        self.assertEqual(records[0]["blake2b"], records[1]["blake2b"])
+
+    def test_changed_and_removed_files(self):
+        self.add("2021-01-10/gridz.toe", network(0))
+        self.add("2021-01-10/other.toe", network(0))
+        self.scan()
+        self.add("2021-01-10/gridz.toe", network(1))
+        os.remove(self.path("2021-01-10/other.toe"))
+        records, stats = self.scan()
+        self.assertEqual(stats, (0, 1, 1, 1))
+        self.assertEqual(records[0]["operators"], 3)
+
+    def test_header_only_records_are_redone_once_a_codec_exists(self):
+        self.add("2021-01-10/gridz.toe", network(0))
+        register_codec(None)
+        records, stats = self.scan()
+        self.assertEqual(stats.decoded, 0)
+        self.assertFalse(records[0]["decoded"])
+        register_codec(self.codec)
+        records, stats = self.scan()
+        self.assertEqual((stats.rehashed, stats.decoded), (1, 1))
+        self.assertEqual(records[0]["operators"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
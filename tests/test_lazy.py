@@ -0,0 +1,64 @@
+"""Subtrees parse only their own COMP, its descendants and its ancestors."""
+
+import contextlib
+import io
+import unittest
+
+from support import ArchiveTestCase
+
+from tdarchive import cli
+from tdarchive.lazy import LazyNetwork, ancestors
+
+
+def _two_comps():
+    return [
+        (".build", b"version 099\nbuild 2021.12000\n"),
+        ("project1.n", b"COMP:container\nend\n"),
+        ("project1/noise1.n", b"TOP:noise\nend\n"),
+        ("project1/noise1.parm", b"?\nseed 0 4\n"),
+        ("project1/fx.n", b"COMP:base\nend\n"),
+        ("project1/fx/blur1.n", b"TOP:blur\ninputs\n{\n0 \t../noise1\n1 \tlevel1\n}\nend\n"),
+        ("project1/fx/level1.n", b"TOP:level\nend\n"),
+        ("perform.n", b"COMP:window\nend\n"),
+        ("perform/out1.n", b"TOP:null\nend\n"),
+    ]
+
+
+class LazyNetworkTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.toe = self.add("2021-01-10/gridz.toe", _two_comps())
+        self.lazy = LazyNetwork.open(self.toe)
+
+    def test_subtree_loads_only_what_it_needs(self):
+        net = self.lazy.subtree("project1/fx")
+        self.assertEqual(net.paths, ["/project1", "/project1/fx", "/project1/fx/blur1",
+                                     "/project1/fx/level1"])
+        # The wire from /project1/noise1 comes from outside the loaded operators.
+        self.assertEqual([op.name for op in net.op("/project1/fx/blur1").inputs()], ["level1"])
+        self.assertIs(self.lazy.subtree("/project1/fx/"), net)
+        pending = [name for name, _, _ in self.lazy.pending_ranges()]
+        self.assertEqual(pending, [".build", "project1/noise1.n", "project1/noise1.parm",
+                                   "perform.n", "perform/out1.n"])
+
+    def test_full_network(self):
+        self.assertEqual(len(self.lazy.operator_paths()), 7)
+        self.assertEqual(len(self.lazy.full()), 7)
+        self.assertEqual([name for name, _, _ in self.lazy.pending_ranges()], [".build"])
+
+    def test_missing_comp(self):
+        with self.assertRaises(KeyError):
+            self.lazy.subtree("/project1/nope")
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            status = cli.main(["subtree", self.toe, "/project1/nope"])
+        self.assertEqual(status, 1)
+        self.assertIn("/project1/nope not found", err.getvalue())
+
+    def test_ancestors(self):
+        self.assertEqual(ancestors("/a/b/c"), ["/a", "/a/b"])
+        self.assertEqual(ancestors("/a"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Lineages follow content across renames and keep unrelated sketches apart."""
+
+import shutil
+import unittest
+
+from support import ArchiveTestCase
+
+from tdarchive import register_codec
+from tdarchive.lineage import Lineage, as_groups, cluster, detect
+
+
+def _sketch(kind, version):
+    """Forty operators of ``kind``; each version retunes a few of them."""
+    members = [(".build", b"version 099\nbuild 2021.12000\n"),
+               ("project1.n", b"COMP:container\nend\n")]
+    for i in range(40):
+        stem = f"project1/{kind}{i}"
+        members.append((stem + ".n", b"TOP:%s\nend\n" % kind.encode()))
+        value = i + 100 * version if i < 3 else i
+        members.append((stem + ".parm", b"?\nperiod 0 %d\n" % value))
+    return members
+
+
+class DetectTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add("2021-01-10/mose.toe", _sketch("noise", 0))
+        self.add("2021-01-11/mouse.toe", _sketch("noise", 1))
+        self.add("2021-01-12/mouse.toe", _sketch("noise", 2))
+        self.add("2021-01-11/gridz.toe", _sketch("ramp", 0))
+        self.add("2021-01-12/gridz.toe", _sketch("ramp", 1))
+
+    def test_renamed_versions_are_linked(self):
+        self.assertEqual(detect(self.root), [
+            Lineage("mouse.toe", ["2021-01-10/mose.toe", "2021-01-11/mouse.toe",
+                                  "2021-01-12/mouse.toe"]),
+            Lineage("gridz.toe", ["2021-01-11/gridz.toe", "2021-01-12/gridz.toe"]),
+        ])
+
+    def test_without_a_codec_only_copies_are_linked(self):
+        shutil.copy(self.path("2021-01-12/gridz.toe"), self.write("2021-01-13/gridz.toe", b""))
+        register_codec(None)
+        lineages = detect(self.root)
+        self.assertEqual(lineages[0].paths, ["2021-01-12/gridz.toe", "2021-01-13/gridz.toe"])
+        self.assertEqual([len(l.paths) for l in lineages], [2, 1, 1, 1, 1])
+
+
+class ClusterTest(unittest.TestCase):
+    def test_every_pair_in_a_bucket_is_compared(self):
+        # All three share the first band; only b and c are similar.
+        signatures = {"a": (1, 1, 9, 9), "b": (1, 1, 2, 3), "c": (1, 1, 2, 4)}
+        groups = cluster(signatures, bands=2, threshold=0.6)
+        self.assertEqual(sorted(groups), [["a"], ["b", "c"]])
+
+    def test_group_names_are_unique(self):
+        groups = as_groups([Lineage("gridz.toe", ["x"]), Lineage("gridz.toe", ["y"])])
+        self.assertEqual(groups, {"gridz.toe": ["x"], "gridz.toe#2": ["y"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Listings read headers and payload prefixes, and nothing at all with --headers-only."""
+
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+from support import ArchiveTestCase, ZlibCodec, network, payload
+
+from tdarchive import cli, listing
+
+
+def _saved(seed):
+    members = network(seed)
+    members[0] = (".build", b"version 099\nbuild 2021.12000\ntime 2021-01-10 21:04:55\n")
+    members.append(("perform.n", b"COMP:window\ntile 0 0 130 90\nend\n"))
+    members.append(("local.n", b"BASE:local\nend\n"))
+    return members
+
+
+class ListingTest(ArchiveTestCase):
+    def test_prefix_metadata(self):
+        self.add("2021-01-10/gridz.toe", _saved(1))
+        row, = listing.list_archive(self.root)
+        self.assertEqual(row.build, "099 2021.12000")
+        self.assertEqual(row.saved, "2021-01-10 21:04:55")
+        self.assertEqual(row.top_level, ("project1", "perform"))
+        self.assertTrue(row.complete)
+        self.assertEqual((row.day, row.frames), ("2021-01-10", 1))
+        self.assertEqual(row.raw_size, len(payload(_saved(1))))
+
+    def test_budget_stops_after_build(self):
+        members = _saved(0)
+        members.insert(2, ("project1/big.bin", os.urandom(1 << 20)))
+        self.add("2021-01-10/gridz.toe", members)
+        row, = listing.list_archive(self.root, budget=1024)
+        self.assertEqual(row.build, "099 2021.12000")
+        self.assertFalse(row.complete)
+        self.assertEqual(row.top_level, ("project1",))
+
+    def test_headers_only_decodes_nothing(self):
+        self.add("2021-01-10/gridz.toe", _saved(1))
+        with mock.patch.object(ZlibCodec, "decompressobj", side_effect=AssertionError):
+            row, = listing.list_archive(self.root, decode=False)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                status = cli.main(["ls", "--root", self.root, "--headers-only"])
+        self.assertEqual(status, 0)
+        self.assertIsNone(row.build)
+        self.assertEqual((row.top_level, row.complete), ((), False))
+        self.assertEqual(out.getvalue().split()[4], "-")
+
+
+if __name__ == "__main__":
+    unittest.main()
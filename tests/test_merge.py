@@ -0,0 +1,115 @@
+"""Three-way merges per member, parameter and input slot, keeping the frame layout."""
+
+import contextlib
+import io
+import unittest
+
+from support import ArchiveTestCase, network, payload
+
+from tdarchive import cli
+from tdarchive.container import open_toe
+from tdarchive.members import decode_members
+from tdarchive.merge import DELETE_MODIFY, Conflict, MergeLayoutError, merge_files
+
+NOISE = b"TOP:noise\ntile 0 0 130 90\nend\n"
+LEVEL = b"TOP:level\ntile 200 0 130 90\ninputs\n{\n0 \tnoise1\n}\nend\n"
+
+
+def _base(parm=b"?\nseed 0 1\nperiod 0 1\n", level=LEVEL, text=b"notes\n"):
+    return [
+        (".build", b"version 099\nbuild 2021.12000\n"),
+        ("project1.n", b"COMP:container\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.n", NOISE),
+        ("project1/noise1.parm", parm),
+        ("project1/noise2.n", NOISE),
+        ("project1/level1.n", level),
+        ("project1/text1.n", b"DAT:text\ntile 400 0 130 90\nend\n"),
+        ("project1/text1.text", text),
+    ]
+
+
+def _without(members, stem):
+    return [(name, data) for name, data in members if not name.startswith(stem + ".")]
+
+
+class MergeTest(ArchiveTestCase):
+    def merge(self, base, ours, theirs, ours_frames=()):
+        paths = [self.add("base.toe", base), self.add("ours.toe", ours, ours_frames),
+                 self.add("theirs.toe", theirs)]
+        conflicts = merge_files(*paths, self.path("out.toe"))
+        merged = decode_members(self.path("out.toe"))
+        return {name: bytes(data) for name, data in merged.items()}, conflicts
+
+    def test_one_sided_changes_combine(self):
+        theirs = _base() + [("project1/blur1.n", b"TOP:blur\nend\n")]
+        merged, conflicts = self.merge(_base(), _base(text=b"ours\n"), theirs)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged["project1/text1.text"], b"ours\n")
+        self.assertIn("project1/blur1.n", merged)
+
+    def test_parameters_merge_per_key(self):
+        merged, conflicts = self.merge(
+            _base(), _base(b"?\nseed 0 7\nperiod 0 1\n"), _base(b"?\nseed 0 1\nperiod 0 3\n"))
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged["project1/noise1.parm"], b"?\nseed 0 7\nperiod 0 3\n")
+
+    def test_same_parameter_conflicts_and_keeps_ours(self):
+        merged, conflicts = self.merge(
+            _base(), _base(b"?\nseed 0 7\nperiod 0 1\n"), _base(b"?\nseed 0 8\nperiod 0 1\n"))
+        self.assertEqual(conflicts, [Conflict("project1/noise1.parm", "seed",
+                                              "changed on both sides")])
+        self.assertEqual(merged["project1/noise1.parm"], b"?\nseed 0 7\nperiod 0 1\n")
+
+    def test_node_merges_tile_and_inputs(self):
+        moved = LEVEL.replace(b"tile 200", b"tile 300")
+        rewired = LEVEL.replace(b"0 \tnoise1\n", b"0 \tnoise1\n1 \tnoise2\n")
+        merged, conflicts = self.merge(_base(), _base(level=moved), _base(level=rewired))
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged["project1/level1.n"], rewired.replace(b"tile 200", b"tile 300"))
+
+    def test_delete_modify_keeps_our_operator(self):
+        modified = _base(text=b"theirs\n")
+        merged, conflicts = self.merge(_base(), _without(_base(), "project1/text1"), modified)
+        self.assertEqual(conflicts, [Conflict("project1/text1.text", None, DELETE_MODIFY)])
+        self.assertNotIn("project1/text1.n", merged)
+        self.assertNotIn("project1/text1.text", merged)
+
+        merged, conflicts = self.merge(_base(), modified, _without(_base(), "project1/text1"))
+        self.assertEqual(conflicts, [Conflict("project1/text1.text", None, DELETE_MODIFY)])
+        self.assertEqual(merged["project1/text1.n"], dict(_base())["project1/text1.n"])
+        self.assertEqual(merged["project1/text1.text"], b"theirs\n")
+
+    def test_frame_layout_of_ours_is_kept(self):
+        ours = _base(text=b"ours\n")
+        first = len(payload(ours[:4]))
+        theirs = _base(b"?\nseed 0 1234\nperiod 0 1\n")
+        merged, _ = self.merge(_base(), ours, theirs, (first, len(payload(ours)) - first))
+        with open_toe(self.path("out.toe")) as toe:
+            sizes = [frame.raw_size for frame in toe.frames]
+        self.assertEqual(sizes, [first + 3, len(payload(list(merged.items()))) - first - 3])
+
+    def test_boundary_inside_a_member_leaves_ours_alone(self):
+        ours = _base(text=b"ours\n")
+        paths = [self.add("base.toe", _base()),
+                 self.add("ours.toe", ours, (10, len(payload(ours)) - 10)),
+                 self.add("theirs.toe", _base(b"?\nseed 0 9\n"))]
+        before = self.read("ours.toe")
+        with self.assertRaises(MergeLayoutError):
+            merge_files(*paths, paths[1])
+        self.assertEqual(self.read("ours.toe"), before)
+
+    def test_driver_reports_conflicts(self):
+        paths = [self.add("base.toe", network(0)), self.add("ours.toe", network(2)),
+                 self.add("theirs.toe", network(4))]
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            status = cli.main(["merge", *paths, "project.toe"])
+        self.assertEqual(status, 1)
+        self.assertEqual(err.getvalue(), "tdarchive merge: project.toe: "
+                                         "project1/noise1.parm seed: changed on both sides\n")
+        self.assertEqual(bytes(decode_members(paths[1]).get("project1/noise1.parm")),
+                         b"?\nseed 0 2\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Merkle manifests: verification, subtree compare and malformed manifests."""
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from support import ArchiveTestCase, network
+
+from tdarchive import cli, merkle
+from tdarchive.merkle import Difference, ManifestError, MerkleManifest
+
+
+class MerkleTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add("2021-01-10/gridz.toe", network(0))
+        self.add("2021-01-11/gridz.toe", network(1))
+        self.write("2021-01-11/models/brick.obj", b"v 0 0 0\n")
+        self.write("2021-01-12/TDImportCache/sophia.tdc", b"cache")
+        self.manifest = merkle.build(self.root, workers=2)
+
+    def test_unchanged_archive_verifies(self):
+        self.assertEqual(merkle.verify(self.root, self.manifest), (None, []))
+        self.assertEqual(len(self.manifest.files), 4)
+
+    def test_first_difference_and_full_list(self):
+        self.add("2021-01-11/gridz.toe", network(0))
+        with open(self.path("2021-01-11/models/brick.obj"), "r+b") as fh:
+            fh.write(b"v 1")
+        os.remove(self.path("2021-01-12/TDImportCache/sophia.tdc"))
+        self.write("2021-01-12/extra.obj", b"v 0 0 0\n")
+        first, diffs = merkle.verify(self.root, self.manifest)
+        self.assertEqual(first, "2021-01-11/gridz.toe")
+        self.assertEqual(diffs, [
+            Difference("2021-01-11/gridz.toe", "size"),
+            Difference("2021-01-11/models/brick.obj", "content"),
+            Difference("2021-01-12/TDImportCache", "missing"),
+            Difference("2021-01-12/extra.obj", "extra"),
+        ])
+
+    def test_save_load_and_compare(self):
+        self.manifest.save(self.path("a.json"))
+        loaded = MerkleManifest.load(self.path("a.json"))
+        self.assertEqual(loaded.root, self.manifest.root)
+        self.write("2021-01-10/models/new.obj", b"v 0 0 0\n")
+        merkle.build(self.root).save(self.path("b.json"))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = cli.main(["merkle", "compare", self.path("a.json"), self.path("b.json")])
+        self.assertEqual(status, 1)
+        self.assertEqual(out.getvalue(), "first differing subtree: 2021-01-10/models\n"
+                                         "  extra   2021-01-10/models\n")
+
+    def test_malformed_manifests(self):
+        self.manifest.save(self.path("good.json"))
+        with open(self.path("good.json"), encoding="utf-8") as fh:
+            good = json.load(fh)
+        tampered = dict(good, files=dict(good["files"], **{"2021-01-10/gridz.toe": [1, "00"]}))
+        for name, text in (
+            ("truncated", "{\"version\": 1, "),
+            ("list", "[1, 2]"),
+            ("version", json.dumps(dict(good, version=99))),
+            ("no files", json.dumps({"version": 1, "root": ""})),
+            ("bad entry", json.dumps(dict(good, files={"a.toe": 5}))),
+            ("tampered", json.dumps(tampered)),
+        ):
+            with self.subTest(name), self.assertRaises(ManifestError):
+                MerkleManifest.load(self.write(name + ".json", text.encode()))
+        with self.assertRaises(ManifestError):
+            MerkleManifest.load(self.path("missing.json"))
+
+    def test_cli_reports_bad_manifest_and_jobs(self):
+        self.write("bad.json", b"not json")
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            status = cli.main(["merkle", "verify", self.path("bad.json"), "--root", self.root])
+        self.assertEqual(status, 1)
+        self.assertTrue(err.getvalue().startswith("tdarchive: "))
+        for argv in (["merkle", "build", "-j", "0"], ["merkle", "compare", "a.json"]):
+            with self.subTest(argv), contextlib.redirect_stderr(io.StringIO()), \
+                    self.assertRaises(SystemExit) as cm:
+                cli.main(argv)
+            self.assertEqual(cm.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
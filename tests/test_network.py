@@ -0,0 +1,68 @@
+"""The array-backed network model: operators, parameters, wires and memory report."""
+
+import tracemalloc
+import unittest
+
+from support import ArchiveTestCase
+
+from tdarchive.network import load_network, memory_report
+
+
+def _chain():
+    return [
+        (".build", b"version 099\nbuild 2021.12000\n"),
+        ("project1.n", b"COMP:container\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.n", b"TOP:noise\ntile 0 0 130 90\nend\n"),
+        ("project1/noise1.parm", b"?\nseed 0 4\nperiod 1 \"me.time.frame\"\n"),
+        ("project1/level1.n", b"TOP:level\ninputs\n{\n0 \tnoise1\n}\nend\n"),
+        ("project1/comp1.n", b"TOP:composite\ninputs\n{\n0 \tlevel1\n1 \tnoise1\n}\nend\n"),
+        ("project1/inner.n", b"COMP:base\nend\n"),
+        ("project1/inner/out1.n", b"TOP:null\ninputs\n{\n0 \t../comp1\n}\nend\n"),
+        ("project1/inner/mystery1.n", b"XYZ:thing\nend\n"),
+    ]
+
+
+class NetworkTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.toe = self.add("2021-01-10/gridz.toe", _chain())
+        self.net = load_network(self.toe)
+
+    def test_operators(self):
+        self.assertEqual(len(self.net), 7)
+        noise = self.net.op("/project1/noise1")
+        self.assertEqual((noise.name, noise.family, noise.type), ("noise1", "TOP", "noise"))
+        self.assertEqual(noise.params, {"seed": "4", "period": "me.time.frame"})
+        self.assertEqual(noise.parent.path, "/project1")
+        self.assertIsNone(self.net.op("/project1").parent)
+        self.assertEqual([c.name for c in self.net.op("/project1/inner").children()],
+                         ["out1", "mystery1"])
+        mystery = self.net.op("/project1/inner/mystery1")
+        self.assertEqual((mystery.family, mystery.type), ("?", "thing"))
+
+    def test_wires(self):
+        comp = self.net.op("/project1/comp1")
+        self.assertEqual([op.name for op in comp.inputs()], ["level1", "noise1"])
+        self.assertEqual([op.name for op in self.net.op("/project1/noise1").outputs()],
+                         ["level1", "comp1"])
+        self.assertEqual([op.path for op in self.net.downstream("/project1/noise1")],
+                         ["/project1/level1", "/project1/comp1", "/project1/inner/out1"])
+        self.assertEqual([op.name for op in self.net.upstream("/project1/inner/out1", 1)],
+                         ["comp1"])
+
+    def test_memory_report_leaves_a_running_trace_running(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        report = memory_report([self.toe, self.toe])
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual((report["networks"], report["operators"]), (2, 14))
+        self.assertGreater(report["retained"], 0)
+        self.assertGreaterEqual(report["peak"], report["retained"])
+
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        memory_report([self.toe])
+        self.assertTrue(tracemalloc.is_tracing())
+
+
+if __name__ == "__main__":
+    unittest.main()
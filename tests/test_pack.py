@@ -0,0 +1,82 @@
+"""Packs round-trip a folder, map raw members in place and reject damage."""
+
+import contextlib
+import io
+import os
+import unittest
+
+from support import ArchiveTestCase, network
+
+from tdarchive import cli, pack
+
+
+class PackTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add("2021-03-12/gridz.toe", network(1))
+        self.write("2021-03-12/notes.txt", b"gallery wall, second floor\n" * 200)
+        self.write("2021-03-12/TDImportCache/sophia.tdc", os.urandom(5000))
+        self.write("2021-03-12/models/brick.obj", b"v 0 0 0\n" * 300)
+        self.packed = pack.pack_folder(self.path("2021-03-12"))
+
+    def test_round_trip(self):
+        with pack.Pack(self.packed) as pk:
+            self.assertEqual(pk.names(), [
+                "gridz.toe", "notes.txt", "TDImportCache/sophia.tdc", "models/brick.obj",
+            ])
+            out = pk.extract_all(self.path("out"))
+        self.assertEqual(len(out), 4)
+        for name in ("gridz.toe", "notes.txt", "TDImportCache/sophia.tdc", "models/brick.obj"):
+            self.assertEqual(self.read("out/" + name), self.read("2021-03-12/" + name))
+
+    def test_caches_are_raw_and_aligned(self):
+        with pack.Pack(self.packed) as pk:
+            cache = pk.member("TDImportCache/sophia.tdc")
+            self.assertEqual(cache.method, pack.METHOD_RAW)
+            self.assertEqual(cache.offset % pack.ALIGN, 0)
+            view = pk.view(cache.name)
+            self.assertEqual(bytes(view), self.read("2021-03-12/TDImportCache/sophia.tdc"))
+            view.release()
+            if pack.zstandard is not None:
+                self.assertEqual(pk.member("notes.txt").method, pack.METHOD_ZSTD)
+                with self.assertRaises(pack.PackError):
+                    pk.view("notes.txt")
+
+    def test_missing_member(self):
+        with pack.Pack(self.packed) as pk:
+            self.assertNotIn("nope.toe", pk)
+            with self.assertRaises(pack.PackError):
+                pk.read("nope.toe")
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err), contextlib.redirect_stdout(io.StringIO()):
+            status = cli.main(["pack", "extract", self.packed, "nope.toe",
+                               "-o", self.path("out")])
+        self.assertEqual(status, 1)
+        self.assertIn("'nope.toe' is not in", err.getvalue())
+
+    def test_damage_is_reported(self):
+        with open(self.packed, "rb") as fh:
+            good = fh.read()
+        with pack.Pack(self.packed) as pk:
+            cache = pk.member("TDImportCache/sophia.tdc")
+        flipped = bytearray(good)
+        flipped[cache.offset] ^= 0xFF
+        for name, data in (("short", good[:8]), ("trailer", good[:-1]),
+                           ("magic", good[:-pack.TRAILER.size] + b"XXXX" + good[-13:])):
+            with self.subTest(name), self.assertRaises(pack.PackError):
+                pack.Pack(self.write(name + ".tdpk", data))
+        with pack.Pack(self.write("flipped.tdpk", bytes(flipped))) as pk:
+            with self.assertRaises(pack.PackError):
+                pk.read(cache.name)
+            self.assertEqual(len(pk.read(cache.name, verify=False)), cache.raw_size)
+
+    def test_unsafe_names_are_not_extracted(self):
+        self.write("evil/x.txt", b"x")
+        path = self.path("evil.tdpk")
+        pack.write_pack(path, [("../x.txt", self.path("evil/x.txt"))])
+        with pack.Pack(path) as pk, self.assertRaises(pack.PackError):
+            pk.extract("../x.txt", self.path("out"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Binary members are found, split from graph and text, and stored once."""
+
+import unittest
+
+from support import ArchiveTestCase, network
+
+from tdarchive import payloads
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+LOCKED = bytes(range(256)) * 64
+MEDIA = b"\x89PNG\r\n\x1a\n" + bytes(1000)
+
+
+class PayloadsTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.a = self.add("2021-01-10/gridz.toe", network(0) + [
+            ("project1/noise1.lock", LOCKED),
+            ("project1/text1.dat", "café\n".encode() * 10),
+        ])
+        self.b = self.add("2021-01-11/gridz.toe", network(1) + [
+            ("project1/noise1.lock", LOCKED),
+            ("project1/movie1.lock", MEDIA),
+        ])
+
+    def test_split_by_kind(self):
+        report = payloads.extract([self.a])
+        split = report.files[0]
+        graph = sum(len(data) for name, data in network(0) if name.endswith((".n", ".parm")))
+        self.assertEqual(split.graph_bytes, graph)
+        self.assertEqual(split.binary_bytes, len(LOCKED))
+        self.assertEqual(split.text_bytes, len(network(0)[0][1]) + 60)
+        self.assertEqual([p.member for p in split.payloads], ["project1/noise1.lock"])
+
+    def test_duplicates_are_stored_once(self):
+        with payloads.PayloadStore(self.path("store")) as store:
+            report = payloads.extract([self.a, self.b], store)
+            self.assertEqual(report.unique, 2)
+            self.assertEqual(report.total_bytes, 2 * len(LOCKED) + len(MEDIA))
+            self.assertEqual(report.duplicate_bytes, len(LOCKED))
+            (digest, hits), = report.duplicates().items()
+            self.assertEqual([hit.source for hit in hits], [self.a, self.b])
+            self.assertEqual(bytes(store.view(digest)), LOCKED)
+            self.assertFalse(store.add(digest, LOCKED))
+
+    def test_min_size_skips_small_payloads(self):
+        report = payloads.extract([self.b], min_size=len(MEDIA) + 1)
+        self.assertEqual([p.member for p in report.files[0].payloads], ["project1/noise1.lock"])
+
+    @unittest.skipIf(np is None, "needs numpy")
+    def test_array_view(self):
+        with payloads.PayloadStore(self.path("store")) as store:
+            report = payloads.extract([self.a], store)
+            array = store.array(report.files[0].payloads[0].digest)
+            self.assertEqual(array.tolist(), list(LOCKED))
+            del array
+
+    def test_truncated_utf8_is_still_text(self):
+        data = b"a" + "é".encode() * payloads._SNIFF
+        self.assertFalse(payloads.is_binary(data))
+        self.assertTrue(payloads.is_binary(b"text\0more"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Trigram search by field, earliest use and the saved index format."""
+
+import contextlib
+import io
+import unittest
+
+from support import ArchiveTestCase, network
+
+from tdarchive import cli, search
+
+
+def _with_feedback(seed):
+    return network(seed) + [
+        ("project1/feedback1.n", b"TOP:feedback\ntile 0 200 130 90\nend\n"),
+        ("project1/feedback1.parm", b"?\ntop 1 \"op('noise1')\"\nresetpulse 0 0\n"),
+        ("project1/notes.n", b"DAT:text\ntile 0 400 130 90\nend\n"),
+        ("project1/notes.text", b"Feedback loop tuned for the gallery wall\n"),
+    ]
+
+
+class SearchTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add("2021-01-10/gridz.toe", network(0))
+        self.add("2021-01-12/gridz.toe", _with_feedback(1))
+        self.add("2021-01-13/other.toe", _with_feedback(2))
+        self.index = search.build(self.root)
+
+    def test_fields(self):
+        hits = self.index.search("feedback", ["type"])
+        self.assertEqual([(h.path, h.operator) for h in hits], [
+            ("2021-01-12/gridz.toe", "/project1/feedback1"),
+            ("2021-01-13/other.toe", "/project1/feedback1"),
+        ])
+        self.assertEqual({h.field for h in self.index.search("feedback")},
+                         {"type", "name", "text"})
+        (expr, _) = self.index.search("op('noise1')", ["expr"])
+        self.assertEqual((expr.key, expr.text), ("top", "op('noise1')"))
+        self.assertEqual(self.index.search("op('noise1')", ["param"]), [])
+        self.assertEqual([h.text for h in self.index.search("GALLERY", ["text"])],
+                         ["Feedback loop tuned for the gallery wall\n"] * 2)
+
+    def test_strings_are_shared_across_files(self):
+        texts = self.index.strings[:len(self.index)]
+        self.assertEqual(texts.count("TOP:noise"), 1)
+        self.assertEqual(len(self.index.search("TOP:noise", ["type"])), 3)
+
+    def test_first_use_and_short_queries(self):
+        self.assertEqual(self.index.first_use("feedback").day, "2021-01-12")
+        self.assertEqual(self.index.first_use("level1", ["name"]).path, "2021-01-12/gridz.toe")
+        self.assertIsNone(self.index.first_use("no such thing"))
+        self.assertEqual({h.text for h in self.index.search("1", ["param"])}, {"1"})
+
+    def test_save_and_load(self):
+        self.index.save(self.path("index.bin"))
+        loaded = search.SearchIndex.load(self.path("index.bin"))
+        for needle in ("feedback", "noise", "0"):
+            self.assertEqual(loaded.search(needle), self.index.search(needle))
+        self.write("bad.bin", b"NOPE" + bytes(8))
+        with self.assertRaises(search.SearchIndexError):
+            search.SearchIndex.load(self.path("bad.bin"))
+
+    def test_cli_first(self):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = cli.main(["search", "feedback", "--root", self.root,
+                               "--field", "name", "--first"])
+        self.assertEqual(status, 0)
+        self.assertEqual(out.getvalue(),
+                         "2021-01-12/gridz.toe\t/project1/feedback1\tname\t'feedback1'\n")
+        self.assertTrue(err.getvalue().startswith("1 hit(s)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Textconv renders networks in a stable order and caches per blob and codec."""
+
+import contextlib
+import io
+import shlex
+import sys
+import unittest
+from unittest import mock
+
+from support import ArchiveTestCase, ZlibCodec, network
+
+from tdarchive import cli, register_codec, textconv
+
+
+class _OtherCodec(ZlibCodec):
+    name = "other codec/2"
+
+
+class TextconvTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.toe = self.add("2021-01-11/gridz.toe", network(1))
+        self.cache = self.path("cache")
+
+    def test_render_is_sorted(self):
+        shuffled = self.add("shuffled.toe", list(reversed(network(1))))
+        lines = textconv.textconv(self.toe, self.cache).splitlines()
+        self.assertEqual(lines[2:], [
+            "/project1  COMP:container",
+            "/project1/level1  TOP:level",
+            "  input 0 <- noise1",
+            "/project1/noise1  TOP:noise",
+            "  parm seed = 1",
+        ])
+        self.assertEqual(textconv.textconv(shuffled, self.cache).splitlines()[2:], lines[2:])
+
+    def test_cache_is_keyed_by_blob_and_codec(self):
+        first = textconv.textconv(self.toe, self.cache)
+        with mock.patch.object(textconv, "render", side_effect=AssertionError):
+            self.assertEqual(textconv.textconv(self.toe, self.cache), first)
+        register_codec(_OtherCodec())
+        with mock.patch.object(textconv, "render", return_value="other\n") as render:
+            self.assertEqual(textconv.textconv(self.toe, self.cache), "other\n")
+        render.assert_called_once()
+        register_codec(None)
+        headers = textconv.textconv(self.toe, self.cache)
+        self.assertIn("# payload not decoded: no codec registered", headers)
+
+    def test_other_files_pass_through(self):
+        path = self.write("notes.txt", b"plain text\n")
+        self.assertEqual(textconv.textconv(path, self.cache), "plain text\n")
+
+    def test_git_setup_defaults_to_this_interpreter(self):
+        with mock.patch.object(cli.subprocess, "run") as run, \
+                contextlib.redirect_stdout(io.StringIO()):
+            cli.main(["git-setup"])
+        settings = dict(call.args[0][2:] for call in run.call_args_list)
+        command = f"{shlex.quote(sys.executable)} -m tdarchive"
+        self.assertEqual(settings["diff.tdarchive.textconv"], f"{command} textconv")
+        self.assertEqual(settings["merge.tdarchive.driver"], f"{command} merge %O %A %B %P")
+
+
+if __name__ == "__main__":
+    unittest.main()
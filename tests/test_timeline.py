@@ -0,0 +1,56 @@
+"""Timeline decodes each version at most once, and only what its cache lacks."""
+
+import os
+import unittest
+from unittest import mock
+
+from support import ArchiveTestCase, network
+
+from tdarchive.diff import MerkleTree
+from tdarchive.timeline import timeline
+
+
+class TimelineDecodeTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.paths = []
+
+    def add_day(self, day):
+        rel = f"{day}/gridz.toe"
+        self.add(rel, network(len(self.paths)))
+        self.paths.append(rel)
+
+    def opened(self):
+        """Run the timeline, returning it and the paths ``MerkleTree.open`` decoded."""
+        calls = []
+        real = MerkleTree.open
+
+        def counting(path):
+            calls.append(os.path.relpath(path, self.root).replace(os.sep, "/"))
+            return real(path)
+
+        with mock.patch.object(MerkleTree, "open", side_effect=counting):
+            points = timeline(self.root, self.paths)
+        return points, calls
+
+    def test_cold_run_decodes_each_version_once(self):
+        for day in ("2021-01-10", "2021-01-13", "2021-01-14", "2021-01-15"):
+            self.add_day(day)
+        points, calls = self.opened()
+        self.assertEqual(calls, self.paths)
+        self.assertEqual([p.added for p in points], [2, 1, 0, 1])
+
+    def test_append_decodes_new_version_and_its_predecessor(self):
+        for day in ("2021-01-10", "2021-01-13", "2021-01-14"):
+            self.add_day(day)
+        self.opened()
+        self.add_day("2021-01-15")
+        points, calls = self.opened()
+        self.assertEqual(sorted(calls), ["2021-01-14/gridz.toe", "2021-01-15/gridz.toe"])
+        self.assertEqual(points[-1].added, 1)
+        _, calls = self.opened()
+        self.assertEqual(calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""The dictionary store restores every file bit for bit."""
+
+import unittest
+
+from support import ArchiveTestCase, ZlibCodec, payload, sketch
+
+from tdarchive import storage, zstore
+
+
+@unittest.skipIf(storage.zstandard is None, "needs zstandard")
+class ZStoreTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rels = self.add_versions("gridz.toe", 6) + self.add_versions("other.toe", 6, 10)
+        self.add("2021-01-10/odd.toe", sketch(3), codec=ZlibCodec(1))
+        self.rels.append("2021-01-10/odd.toe")
+        self.stats = zstore.pack(self.root, self.path("store"), dict_size=4096)
+
+    def test_restore_is_bit_exact(self):
+        self.assertEqual((self.stats.files, self.stats.payload_mode), (13, 12))
+        zs = zstore.ZStore(self.path("store"))
+        self.assertEqual(sorted(zs.paths()), sorted(self.rels))
+        for rel in self.rels:
+            with self.subTest(rel):
+                self.assertEqual(zs.restore(rel), self.read(rel))
+
+    def test_payload_of_both_modes(self):
+        zs = zstore.ZStore(self.path("store"))
+        self.assertEqual(zs.payload("2021-01-12/gridz.toe"), payload(sketch(2)))
+        self.assertEqual(zs.payload("2021-01-10/odd.toe"), payload(sketch(3)))
+
+    def test_restore_all(self):
+        count = zstore.ZStore(self.path("store")).restore_all(self.path("out"))
+        self.assertEqual(count, 13)
+        for rel in self.rels:
+            self.assertEqual(self.read("out/" + rel), self.read(rel))
+
+    def test_corrupt_file_is_reported(self):
+        self.write("store/2021-01-10/gridz.toe.tzst", b"XXXX" + bytes(40))
+        with self.assertRaises(zstore.StoreError):
+            zstore.ZStore(self.path("store")).restore("2021-01-10/gridz.toe")
+
+
+if __name__ == "__main__":
+    unittest.main()